@@ -0,0 +1,415 @@
+#!/usr/bin/env python
+from typing import Any, Callable, Dict, List, Tuple  # noqa: F401
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+from lunchbox.enforce import (
+    Comparator, Each, Enforce, EnforceError, RuleSet, Schema
+)
+import lunchbox.enforce as lbe
+from timing import benchmark
+# ------------------------------------------------------------------------------
+
+'''
+Benchmarks for the enforce module. Runs locally, with no network access.
+
+Usage, from the python directory, so that lunchbox need not be installed:
+
+    PYTHONPATH=. python benchmarks/enforce_benchmark.py
+    PYTHONPATH=. python benchmarks/enforce_benchmark.py --suite comparators --json > results.json
+'''
+
+
+def benchmark_adaptive(function, min_time=0.02, repeat=3):
+    # type: (Callable[[], Any], float, int) -> Dict[str, Any]
+    '''
+    Times given function, with a number of calls per repetition chosen so that
+    each repetition takes at least min_time seconds.
+
+    Args:
+        function (function): Function of signature lambda: None.
+        min_time (float, optional): Minimum seconds per repetition.
+            Default: 0.02.
+        repeat (int, optional): Number of repetitions. Default: 3.
+
+    Returns:
+        dict: Best time per call in nanoseconds and calls per repetition.
+    '''
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 10
+    times = timer.repeat(number=number, repeat=repeat)
+    return dict(ns=min(times) / number * 1e9, number=number)
+
+
+class Box:
+    '''
+    Container of a value, which is read by the value attribute getter of
+    EnforceBox.
+    '''
+    def __init__(self, value):
+        # type: (Any) -> None
+        self.value = value
+
+
+class EnforceBox(Enforce):
+    def get_value(self, item):
+        # type: (Box) -> Any
+        return item.value
+
+
+SMALL = list(range(10))
+HUGE = list(range(100000))
+
+# comparator function: size: (passing a, passing b, failing a, failing b)
+# negated comparators swap passing and failing operands
+CASES = {
+    'eq': dict(
+        small=(SMALL, list(SMALL), SMALL, SMALL + [0]),
+        huge=(HUGE, list(HUGE), HUGE, HUGE + [0]),
+    ),
+    'gt': dict(
+        small=(SMALL + [0], SMALL, SMALL, SMALL + [0]),
+        huge=(HUGE + [0], HUGE, HUGE, HUGE + [0]),
+    ),
+    'gte': dict(
+        small=(SMALL, list(SMALL), SMALL, SMALL + [0]),
+        huge=(HUGE, list(HUGE), HUGE, HUGE + [0]),
+    ),
+    'lt': dict(
+        small=(SMALL, SMALL + [0], SMALL + [0], SMALL),
+        huge=(HUGE, HUGE + [0], HUGE + [0], HUGE),
+    ),
+    'lte': dict(
+        small=(SMALL, list(SMALL), SMALL + [0], SMALL),
+        huge=(HUGE, list(HUGE), HUGE + [0], HUGE),
+    ),
+    'similar': dict(
+        small=(1.0, 1.001, 1.0, 2.0),
+        huge=(10**1000, 10**1000, 10**1000, 10**1000 + 1),
+    ),
+    'in_': dict(
+        small=(9, SMALL, -1, SMALL),
+        huge=(99999, HUGE, -1, HUGE),
+    ),
+    'instance_of': dict(
+        small=(SMALL, list, SMALL, dict),
+        huge=(HUGE, list, HUGE, dict),
+    ),
+    'match': dict(
+        small=('foo@bar', '@', 'foobar', '@'),
+        huge=('x' * 100000 + '@', '@', 'x' * 100000, '@'),
+    ),
+    'starts_with': dict(
+        small=('foobar', 'foo', 'foobar', 'bar'),
+        huge=('x' * 100000, 'x' * 1000, 'x' * 100000, 'y' * 1000),
+    ),
+    'length_between': dict(
+        small=(SMALL, (0, 20), SMALL, (20, 30)),
+        huge=(HUGE, (0, 10**6), HUGE, (0, 10)),
+    ),
+    'subset': dict(
+        small=(SMALL, set(SMALL), SMALL + [-1], set(SMALL)),
+        huge=(HUGE, set(HUGE), HUGE + [-1], set(HUGE)),
+    ),
+    'superset': dict(
+        small=(SMALL, {1, 2}, SMALL, {-1}),
+        huge=(HUGE, {1, 2}, HUGE, {-1}),
+    ),
+    'relatively_similar': dict(
+        small=(100.0, 100.5, 100.0, 200.0),
+        huge=(1e300, 1.001e300, 1e300, 2e300),
+    ),
+}  # type: Dict[str, Dict[str, Tuple]]
+
+
+def get_comparators():
+    # type: () -> List[Any]
+    '''
+    Gets all built-in and registered comparators, in registration order.
+
+    Returns:
+        list: Comparators.
+    '''
+    output = list(Comparator)
+    for comp in lbe._COMPARATOR_LUT.values():
+        if comp not in output:
+            output.append(comp)
+    return output
+
+
+def benchmark_comparators(min_time=0.02):
+    # type: (float) -> List[Dict[str, Any]]
+    '''
+    Times Enforce for every comparator, in passing and failing cases, with
+    and without an attribute getter, for small and huge operands. Failing
+    cases include raising and catching the EnforceError, but not formatting
+    its message.
+
+    Args:
+        min_time (float, optional): Minimum seconds per repetition.
+            Default: 0.02.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    results = []
+    for comp in get_comparators():
+        cases = CASES.get(comp.function)
+        if cases is None:
+            continue
+        membership = comp in [Comparator.IN, Comparator.NOT_IN]
+        for size, (pass_a, pass_b, fail_a, fail_b) in cases.items():
+            items = dict(passing=(pass_a, pass_b), failing=(fail_a, fail_b))
+            if comp.negation:
+                items = dict(passing=(fail_a, fail_b), failing=(pass_a, pass_b))
+
+            for case, (a, b) in items.items():
+                for attribute in [False, True]:
+                    enforce = Enforce  # type: Any
+                    attr = None
+                    if attribute:
+                        enforce = EnforceBox
+                        attr = 'value'
+                        a = Box(a)
+                        b = [Box(x) for x in b] if membership else Box(b)
+
+                    def func(a=a, b=b, enforce=enforce, attr=attr):
+                        try:
+                            enforce(a, comp.symbol, b, attr)
+                        except EnforceError:
+                            pass
+
+                    results.append(dict(
+                        comparator=comp.name.lower(),
+                        symbol=comp.symbol,
+                        case=case,
+                        attribute=attribute,
+                        size=size,
+                        **benchmark_adaptive(func, min_time=min_time),
+                    ))
+    return results
+
+
+def benchmark_baselines(min_time=0.02):
+    # type: (float) -> List[Dict[str, Any]]
+    '''
+    Times bare assert and isinstance checks, equivalent to passing Enforce
+    checks, as baselines for the overhead of Enforce.
+
+    Args:
+        min_time (float, optional): Minimum seconds per repetition.
+            Default: 0.02.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    small = list(SMALL)
+    huge = list(HUGE)
+
+    def assert_eq_small():
+        assert SMALL == small
+
+    def assert_eq_huge():
+        assert HUGE == huge
+
+    def assert_gt():
+        assert 2 > 1
+
+    def assert_in_small():
+        assert 9 in SMALL
+
+    def assert_in_huge():
+        assert 99999 in HUGE
+
+    def assert_isinstance():
+        assert isinstance(SMALL, list)
+
+    def bare_isinstance():
+        isinstance(SMALL, list)
+
+    def enforce_gt():
+        Enforce(2, '>', 1)
+
+    def enforce_instance_of():
+        Enforce(SMALL, 'instance of', list)
+
+    rule = Enforce.compile('instance of', list)
+
+    def compiled_instance_of():
+        rule(SMALL)
+
+    cases = [
+        ('assert == small', assert_eq_small),
+        ('assert == huge', assert_eq_huge),
+        ('assert >', assert_gt),
+        ('assert in small', assert_in_small),
+        ('assert in huge', assert_in_huge),
+        ('assert isinstance', assert_isinstance),
+        ('isinstance', bare_isinstance),
+        ('Enforce >', enforce_gt),
+        ('Enforce instance of', enforce_instance_of),
+        ('compiled instance of', compiled_instance_of),
+    ]
+    return [
+        dict(name=k, **benchmark_adaptive(v, min_time=min_time))
+        for k, v in cases
+    ]
+
+
+def benchmark_passing_message():
+    # type: () -> List[Dict[str, Any]]
+    '''
+    Compares the cost of passing checks on small and huge operands. Error
+    messages are only formatted on failure, so both should cost the same.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    small = list(range(10))
+    huge = list(range(100000))
+    small_dict = dict(zip(map(str, small), small))
+    huge_dict = dict(zip(map(str, huge), huge))
+
+    cases = [
+        ('!= list small', lambda: Enforce(small, '!=', None)),
+        ('!= list huge', lambda: Enforce(huge, '!=', None)),
+        ('!= dict small', lambda: Enforce(small_dict, '!=', None)),
+        ('!= dict huge', lambda: Enforce(huge_dict, '!=', None)),
+        ('isinstance list small', lambda: Enforce(small, 'instance of', list)),
+        ('isinstance list huge', lambda: Enforce(huge, 'instance of', list)),
+    ]
+    return [dict(name=k, ns=benchmark(v, number=1000)) for k, v in cases]
+
+
+def benchmark_column_validator(rows=10000):
+    # type: (int) -> List[Dict[str, Any]]
+    '''
+    Compares row by row validation of a batch of records with Schema against
+    columnar validation with ColumnValidator. Requires numpy.
+
+    Args:
+        rows (int, optional): Number of records in batch. Default: 10000.
+
+    Returns:
+        list[dict]: Benchmark results, in nanoseconds per batch.
+    '''
+    from lunchbox.enforce_array import ColumnValidator
+
+    rules = dict(id=[int, ('>=', 0)], name=('in', ['a', 'b']), x=('<', 10.0))
+    records = [dict(id=i, name='a', x=1.0) for i in range(rows)]
+    columns = dict(
+        id=list(range(rows)), name=['a'] * rows, x=[1.0] * rows
+    )
+    schema = Schema(Each(rules))
+    validator = ColumnValidator(rules)
+
+    cases = [
+        (f'schema {rows} records', lambda: schema.errors(records)),
+        (f'columns {rows} records', lambda: validator.validate(records)),
+        (f'columns {rows} column dict', lambda: validator.validate(columns)),
+    ]
+    return [dict(name=k, ns=benchmark(v, number=3, repeat=3)) for k, v in cases]
+
+
+def benchmark_rule_set(size=30):
+    # type: (int) -> List[Dict[str, Any]]
+    '''
+    Compares a code generated RuleSet against the interpreted paths, Schema
+    and a loop over compiled rules, for a flat record with given number of
+    keys and 3 rules per key.
+
+    Args:
+        size (int, optional): Number of record keys. Default: 30.
+
+    Returns:
+        list[dict]: Benchmark results, in nanoseconds per record.
+    '''
+    rules = {f'key{i}': [int, ('>=', 0), ('<', 100)] for i in range(size)}
+    record = {f'key{i}': i for i in range(size)}
+    compiled = [
+        (k, Enforce.compile_rules(v)) for k, v in rules.items()
+    ]
+
+    def interpreted():
+        for key, items in compiled:
+            value = record[key]
+            for rule in items:
+                rule(value)
+
+    schema = Schema(rules)
+    rule_set = RuleSet(rules)
+    cases = [
+        (f'compiled rules {size * 3}', interpreted),
+        (f'schema {size * 3}', lambda: schema.errors(record)),
+        (f'rule set {size * 3}', lambda: rule_set.errors(record)),
+    ]
+    return [dict(name=k, ns=benchmark(v, number=1000)) for k, v in cases]
+
+
+SUITES = dict(
+    baselines=benchmark_baselines,
+    comparators=benchmark_comparators,
+    passing_message=benchmark_passing_message,
+    rule_set=benchmark_rule_set,
+    column_validator=benchmark_column_validator,
+)  # type: Dict[str, Callable[[], List[Dict[str, Any]]]]
+
+
+def print_results(suite, results):
+    # type: (str, List[Dict[str, Any]]) -> None
+    '''
+    Prints benchmark results as a table.
+
+    Args:
+        suite (str): Suite name.
+        results (list[dict]): Benchmark results.
+    '''
+    print(f'{suite.upper()}')
+    for row in results:
+        name = row.get('name')
+        if name is None:
+            name = '{comparator} {case} {size}'.format(**row)
+            if row['attribute']:
+                name += ' attribute'
+        print('    {:<48}{:>14.1f} ns'.format(name, row['ns']))
+
+
+def main():
+    # type: () -> None
+    '''
+    Runs benchmarks and prints results as a table or JSON.
+    '''
+    parser = argparse.ArgumentParser(description='Enforce benchmarks.')
+    parser.add_argument(
+        '--suite', choices=list(SUITES), action='append',
+        help='Suite to run. May be repeated. Default: all suites.'
+    )
+    parser.add_argument(
+        '--json', action='store_true', help='Print results as JSON.'
+    )
+    args = parser.parse_args()
+
+    suites = args.suite or list(SUITES)
+    results = {}
+    for suite in suites:
+        results[suite] = SUITES[suite]()
+        if not args.json:
+            print_results(suite, results[suite])
+
+    if args.json:
+        output = dict(
+            python=sys.version,
+            platform=platform.platform(),
+            results=results,
+        )
+        print(json.dumps(output, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+from typing import Any, Dict, List  # noqa: F401
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import json
+import os
+import time
+
+from lunchbox.enforce_parallel import validate_jsonl
+# ------------------------------------------------------------------------------
+
+'''
+Benchmarks for the enforce_parallel module. Measures scaling of validate_jsonl
+over a range of worker counts, up to 16 or the number of cores.
+
+Usage, from the python directory, so that lunchbox need not be installed:
+
+    PYTHONPATH=. python benchmarks/enforce_parallel_benchmark.py
+'''
+
+
+SCHEMA = {
+    'id': [int, ('>=', 0)],
+    'name': [str, ('length between', (1, 32))],
+    'score': [(int, float), ('>=', 0), ('<=', 1)],
+    'tags': list,
+    'user': {'email': [str, ('matches', '.+@.+')], 'active': bool},
+}
+
+
+def write_dataset(filepath, records=200000):
+    # type: (Path, int) -> None
+    '''
+    Writes a JSONL dataset of given number of records.
+
+    Args:
+        filepath (Path): JSONL filepath.
+        records (int, optional): Number of records. Default: 200000.
+    '''
+    with open(filepath, 'w') as f:
+        for i in range(records):
+            item = dict(
+                id=i,
+                name=f'name-{i}',
+                score=(i % 100) / 100,
+                tags=['a', 'b'],
+                user=dict(email=f'user{i}@example.com', active=i % 2 == 0),
+            )
+            f.write(json.dumps(item) + '\n')
+
+
+def benchmark_workers(records=200000):
+    # type: (int) -> List[Dict[str, Any]]
+    '''
+    Times validate_jsonl for 1, 2, 4, 8 and 16 workers, capped to the number
+    of cores.
+
+    Args:
+        records (int, optional): Number of records. Default: 200000.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    cores = os.cpu_count() or 1
+    counts = [x for x in [1, 2, 4, 8, 16] if x <= cores]
+    results = []
+    with TemporaryDirectory() as root:
+        filepath = Path(root, 'data.jsonl')
+        write_dataset(filepath, records=records)
+        chunk_size = max(os.path.getsize(filepath) // (max(counts) * 8), 1)
+
+        base = 0.0
+        for workers in counts:
+            start = time.perf_counter()
+            validate_jsonl(
+                filepath, SCHEMA, workers=workers, chunk_size=chunk_size
+            )
+            seconds = time.perf_counter() - start
+            base = base or seconds
+            results.append(dict(
+                workers=workers,
+                seconds=seconds,
+                records_per_second=records / seconds,
+                speedup=base / seconds,
+            ))
+    return results
+
+
+def main():
+    # type: () -> None
+    '''
+    Runs all benchmarks and prints results.
+    '''
+    for row in benchmark_workers():
+        msg = '{workers:>3} workers{seconds:>10.2f} s{records_per_second:>14.0f} '
+        msg += 'records/s{speedup:>8.2f}x'
+        print(msg.format(**row))
+
+
+if __name__ == '__main__':
+    main()
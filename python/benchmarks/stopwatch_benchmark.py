@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+from typing import Any, Callable, Dict, List  # noqa: F401
+
+import datetime
+
+from lunchbox.stopwatch import StopWatch
+from timing import benchmark
+# ------------------------------------------------------------------------------
+
+'''
+Benchmarks for the stopwatch module.
+
+Usage, from the python directory, so that lunchbox need not be installed:
+
+    PYTHONPATH=. python benchmarks/stopwatch_benchmark.py
+'''
+
+
+def benchmark_start_stop():
+    # type: () -> List[Dict[str, Any]]
+    '''
+    Compares the cost of a start/stop pair for each clock against a pair of
+    datetime.datetime.now calls, as well as the cost of reading delta_ns
+    versus delta.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    def datetime_now():
+        start = datetime.datetime.now()
+        return datetime.datetime.now() - start
+
+    wall = StopWatch()
+    system = StopWatch(clock='system')
+
+    def start_stop(stopwatch):
+        def func():
+            stopwatch.start()
+            stopwatch.stop()
+        return func
+
+    wall.start()
+    wall.stop()
+    cases = [
+        ('datetime.now pair', datetime_now),
+        ('start/stop wall', start_stop(wall)),
+        ('start/stop system', start_stop(system)),
+        ('delta_ns', lambda: wall.delta_ns),
+        ('delta', lambda: wall.delta),
+    ]
+    return [dict(name=k, ns=benchmark(v)) for k, v in cases]
+
+
+def benchmark_laps(laps=1000000):
+    # type: (int) -> List[Dict[str, Any]]
+    '''
+    Times lap and lap_stats over given number of laps and measures the size
+    of the lap array.
+
+    Args:
+        laps (int, optional): Number of laps. Default: 1000000.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    stopwatch = StopWatch()
+    stopwatch.start()
+    lap = stopwatch.lap
+    ns = benchmark(lap, number=laps, repeat=1)
+    size = stopwatch.laps.itemsize * len(stopwatch.laps)
+    stats = benchmark(lambda: stopwatch.lap_stats, number=1, repeat=1)
+    return [
+        dict(name='lap', value=ns, unit='ns'),
+        dict(name=f'lap_stats {laps} laps', value=stats / 1e6, unit='ms'),
+        dict(name=f'laps array {laps} laps', value=size / 1e6, unit='MB'),
+    ]
+
+
+def main():
+    # type: () -> None
+    '''
+    Runs all benchmarks and prints results.
+    '''
+    for row in benchmark_start_stop():
+        print('{name:<30}{ns:>12.1f} ns'.format(**row))
+    for row in benchmark_laps():
+        print('{name:<30}{value:>12.1f} {unit}'.format(**row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+from typing import Any, Callable, Dict, List  # noqa: F401
+
+from lunchbox.stopwatch import StopWatch
+from lunchbox.timers import (
+    CallScope, CallTree, Histogram, TimerRegistry, TraceRecorder
+)
+from lunchbox.tools import LogRuntime
+from timing import benchmark
+# ------------------------------------------------------------------------------
+
+'''
+Benchmarks for the timers module.
+
+Usage, from the python directory, so that lunchbox need not be installed:
+
+    PYTHONPATH=. python benchmarks/timers_benchmark.py
+'''
+
+
+def benchmark_updates():
+    # type: () -> List[Dict[str, Any]]
+    '''
+    Compares the cost of recording a duration with TimerRegistry against an
+    empty with block and a StopWatch start/stop pair.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    timers = TimerRegistry()
+    hist = timers.get('foo')
+    stopwatch = StopWatch()
+
+    class Empty:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+    empty = Empty()
+
+    def with_empty():
+        with empty:
+            pass
+
+    def with_time():
+        with timers.time('foo'):
+            pass
+
+    def start_stop():
+        stopwatch.start()
+        stopwatch.stop()
+
+    cases = [
+        ('empty with block', with_empty),
+        ('StopWatch start/stop', start_stop),
+        ('Histogram.record', lambda: hist.record(123456)),
+        ('TimerRegistry.record', lambda: timers.record('foo', 123456)),
+        ('TimerRegistry.time', with_time),
+    ]
+    return [dict(name=k, value=benchmark(v), unit='ns') for k, v in cases]
+
+
+def benchmark_snapshot(values=1000000):
+    # type: (int) -> List[Dict[str, Any]]
+    '''
+    Times snapshot of a histogram of given number of values and measures its
+    memory footprint.
+
+    Args:
+        values (int, optional): Number of values. Default: 1000000.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    hist = Histogram()
+    for i in range(values):
+        hist.record(i * 997)
+    ns = benchmark(hist.snapshot, number=100, repeat=3)
+    size = hist._counts.itemsize * len(hist._counts)
+    return [
+        dict(name=f'snapshot {values} values', value=ns / 1e3, unit='us'),
+        dict(name='histogram size', value=size / 1e3, unit='KB'),
+    ]
+
+
+def benchmark_call_tree():
+    # type: () -> List[Dict[str, Any]]
+    '''
+    Times CallScope blocks and named StopWatch start/stop pairs, with and
+    without an active CallTree.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    named = StopWatch(name='foo')
+
+    def with_scope():
+        with CallScope('foo'):
+            pass
+
+    def start_stop():
+        named.start()
+        named.stop()
+
+    output = [
+        dict(name='CallScope no tree', value=benchmark(with_scope), unit='ns'),
+        dict(name='named StopWatch no tree', value=benchmark(start_stop), unit='ns'),
+    ]
+    with CallTree():
+        output.extend([
+            dict(name='CallScope in tree', value=benchmark(with_scope), unit='ns'),
+            dict(name='named StopWatch in tree', value=benchmark(start_stop), unit='ns'),
+        ])
+    return output
+
+
+def benchmark_trace():
+    # type: () -> List[Dict[str, Any]]
+    '''
+    Times TraceRecorder.record and suppressed LogRuntime blocks, with and
+    without an active TraceRecorder.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    tracer = TraceRecorder()
+
+    def log_runtime():
+        with LogRuntime('foo', suppress=True):
+            pass
+
+    output = [
+        dict(
+            name='TraceRecorder.record',
+            value=benchmark(lambda: tracer.record('foo', 0, 1)),
+            unit='ns',
+        ),
+        dict(name='LogRuntime no tracer', value=benchmark(log_runtime), unit='ns'),
+    ]
+    with tracer:
+        output.append(
+            dict(name='LogRuntime in tracer', value=benchmark(log_runtime), unit='ns')
+        )
+    return output
+
+
+def main():
+    # type: () -> None
+    '''
+    Runs all benchmarks and prints results.
+    '''
+    rows = benchmark_updates() + benchmark_snapshot() + benchmark_call_tree()
+    rows += benchmark_trace()
+    for row in rows:
+        print('{name:<30}{value:>12.1f} {unit}'.format(**row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+from typing import Any, Callable  # noqa: F401
+
+import timeit
+# ------------------------------------------------------------------------------
+
+'''
+Timing helpers shared by the benchmark scripts of this directory.
+'''
+
+
+def benchmark(function, number=100000, repeat=5):
+    # type: (Callable[[], Any], int, int) -> float
+    '''
+    Times given function.
+
+    Args:
+        function (function): Function of signature lambda: None.
+        number (int, optional): Calls per repetition. Default: 100000.
+        repeat (int, optional): Number of repetitions. Default: 5.
+
+    Returns:
+        float: Best time per call in nanoseconds.
+    '''
+    times = timeit.repeat(function, number=number, repeat=repeat)
+    return min(times) / number * 1e9
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+from typing import Any, Dict, List, Optional  # noqa: F401
+
+import asyncio
+
+import lunchbox.tools as lbt
+from timing import benchmark
+# ------------------------------------------------------------------------------
+
+'''
+Benchmarks for the tools module.
+
+Usage, from the python directory, so that lunchbox need not be installed:
+
+    PYTHONPATH=. python benchmarks/tools_benchmark.py
+'''
+
+
+def benchmark_enforce_signature():
+    # type: () -> List[Dict[str, Any]]
+    '''
+    Compares the call cost of an undecorated function, the same function
+    decorated with enforce_signature and the same function decorated with
+    api_function.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    def func(a: int, b: str, c: Optional[float] = None) -> str:
+        return b
+
+    def kwfunc(a=0, b='', c=None):
+        return b
+
+    checked = lbt.enforce_signature(func)
+    api = lbt.api_function(kwfunc)
+
+    cases = [
+        ('undecorated', lambda: func(1, 'b', c=1.0)),
+        ('enforce_signature', lambda: checked(1, 'b', c=1.0)),
+        ('api_function', lambda: api(a=1, b='b', c=1.0)),
+    ]
+    return [dict(name=k, ns=benchmark(v)) for k, v in cases]
+
+
+def benchmark_loop_timer(steps=100000):
+    # type: (int) -> List[Dict[str, Any]]
+    '''
+    Compares the per step cost of awaiting a coroutine of given number of
+    steps directly and through the loop timer used by log_runtime with
+    loop_time_=True.
+
+    Args:
+        steps (int, optional): Number of coroutine steps. Default: 100000.
+
+    Returns:
+        list[dict]: Benchmark results.
+    '''
+    async def func():
+        for _ in range(steps):
+            await asyncio.sleep(0)
+
+    async def direct():
+        await func()
+
+    async def timed():
+        await lbt._LoopTimer(func())
+
+    cases = [
+        ('await step', direct),
+        ('_LoopTimer step', timed),
+    ]
+    return [
+        dict(name=k, ns=benchmark(lambda: asyncio.run(v()), number=1, repeat=3) / steps)
+        for k, v in cases
+    ]
+
+
+def main():
+    # type: () -> None
+    '''
+    Runs all benchmarks and prints results.
+    '''
+    for row in benchmark_enforce_signature() + benchmark_loop_timer():
+        print('{name:<30}{ns:>12.1f} ns'.format(**row))
+
+
+if __name__ == '__main__':
+    main()
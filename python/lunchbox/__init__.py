@@ -7,7 +7,9 @@
 '''
 from lunchbox import command  # noqa F401
 from lunchbox import enforce  # noqa F401
+from lunchbox import enforce_parallel  # noqa F401
 from lunchbox import singleton  # noqa F401
 from lunchbox import stopwatch  # noqa F401
 from lunchbox import theme  # noqa F401
+from lunchbox import timers  # noqa F401
 from lunchbox import tools  # noqa F401
@@ -1,7 +1,12 @@
+import json
 import subprocess
+import sys
 
 import click
 
+from lunchbox.enforce import EnforceError
+from lunchbox.stopwatch import StopWatch
+import lunchbox.enforce_parallel as lbep
 import lunchbox.tools as lbt
 # ------------------------------------------------------------------------------
 
@@ -32,6 +37,68 @@ def slack(url, channel, message):
     lbt.post_to_slack(url, channel, message)
 
 
+@main.command()
+@click.argument('rules', type=click.Path(exists=True, dir_okay=False), nargs=1)
+@click.argument(
+    'sources', type=click.Path(exists=True, dir_okay=False, allow_dash=True), nargs=-1
+)
+@click.option(
+    '--workers', type=int, default=1, show_default=True,
+    help='Number of worker processes.'
+)
+@click.option(
+    '--chunk-size', type=int, default=None,
+    help='Bytes per shard for files, or lines per shard for stdin.'
+)
+def enforce(rules, sources, workers, chunk_size):
+    '''
+        Validates JSONL files or stdin against a rule file, as a data quality
+        gate. Failures are written to stdout as JSONL and a throughput summary
+        is written to stderr. Exits with 1 if any line fails.
+
+          RULES   - JSON or YAML file mapping field paths to rules, such as:
+
+                    {"id": ["int", [">", 0]], "user.email": ["matches", "@"]}
+
+          SOURCES - JSONL files, read from stdin if none or -
+    '''
+    try:
+        schema = lbep.read_rules(rules)
+    except (EnforceError, ValueError) as e:
+        raise click.BadParameter(str(e), param_hint="'RULES'")
+    sources = sources or ('-',)
+    stopwatch = StopWatch()
+    stopwatch.start()
+    lines = 0
+    count = 0
+    for source in sources:
+        name = '<stdin>' if source == '-' else source
+        data = sys.stdin.buffer if source == '-' else source
+
+        def write(failure):
+            failure = dict(source=name, **failure)
+            click.echo(json.dumps(failure))
+
+        report = lbep.validate_jsonl(
+            data,
+            schema,
+            workers=workers,
+            chunk_size=chunk_size,
+            max_failures=0,
+            callback=write,
+        )
+        lines += report.lines
+        count += report.count
+    stopwatch.stop()
+
+    seconds = max(stopwatch.delta.total_seconds(), 1e-6)
+    msg = f'{count} of {lines} lines failed. Validated in '
+    msg += f'{stopwatch.human_readable_delta} ({lines / seconds:.0f} lines/s).'
+    click.echo(msg, err=True)
+    if count > 0:
+        sys.exit(1)
+
+
 @main.command()
 def bash_completion():
     '''
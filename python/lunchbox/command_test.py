@@ -0,0 +1,99 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import json
+import unittest
+
+from click.testing import CliRunner
+
+from lunchbox.command import main
+# ------------------------------------------------------------------------------
+
+
+class CommandTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        root = self.tempdir.name
+        self.rules = Path(root, 'rules.json')
+        with open(self.rules, 'w') as f:
+            json.dump({'id': ['int', ['>', 0]], 'user.email': 'str'}, f)
+
+        self.data = '\n'.join([
+            json.dumps(dict(id=1, user=dict(email='a@b'))),
+            json.dumps(dict(id=0, user=dict(email='a@b'))),
+            json.dumps(dict(id=2, user=dict())),
+        ]) + '\n'
+        self.source = Path(root, 'data.jsonl')
+        with open(self.source, 'w') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_enforce(self):
+        result = CliRunner().invoke(
+            main, ['enforce', str(self.rules), str(self.source)]
+        )
+        self.assertEqual(result.exit_code, 1)
+        lines = [json.loads(x) for x in result.stdout.strip().split('\n')]
+        expected = [
+            dict(
+                source=str(self.source),
+                line=2,
+                errors=[dict(path='$.id', message='0 is not greater than 0. 0 <= 0.')],
+            ),
+            dict(
+                source=str(self.source),
+                line=3,
+                errors=[dict(path='$.user.email', message='email is missing.')],
+            ),
+        ]
+        self.assertEqual(lines, expected)
+        self.assertRegex(result.stderr, r'2 of 3 lines failed\. Validated in ')
+
+    def test_enforce_stdin(self):
+        result = CliRunner().invoke(
+            main, ['enforce', str(self.rules)], input=self.data
+        )
+        self.assertEqual(result.exit_code, 1)
+        lines = [json.loads(x) for x in result.stdout.strip().split('\n')]
+        self.assertEqual([x['source'] for x in lines], ['<stdin>'] * 2)
+        self.assertEqual([x['line'] for x in lines], [2, 3])
+
+    def test_enforce_workers(self):
+        result = CliRunner().invoke(
+            main,
+            ['enforce', str(self.rules), str(self.source), str(self.source),
+             '--workers', '2', '--chunk-size', '10'],
+        )
+        self.assertEqual(result.exit_code, 1)
+        lines = [json.loads(x) for x in result.stdout.strip().split('\n')]
+        self.assertEqual([x['line'] for x in lines], [2, 3, 2, 3])
+        self.assertRegex(result.stderr, '4 of 6 lines failed')
+
+    def test_enforce_passing(self):
+        with open(self.source, 'w') as f:
+            f.write(json.dumps(dict(id=1, user=dict(email='a@b'))) + '\n')
+        result = CliRunner().invoke(
+            main, ['enforce', str(self.rules), str(self.source)]
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.stdout, '')
+        self.assertRegex(result.stderr, '0 of 1 lines failed')
+
+    def test_enforce_missing_source(self):
+        missing = str(Path(self.tempdir.name, 'missing.jsonl'))
+        result = CliRunner().invoke(main, ['enforce', str(self.rules), missing])
+        self.assertEqual(result.exit_code, 2)
+        self.assertNotIsInstance(result.exception, FileNotFoundError)
+        self.assertRegex(result.stderr, r'Invalid value for .*SOURCES.*: File .*does not exist')
+
+    def test_enforce_illegal_rules(self):
+        with open(self.rules, 'w') as f:
+            json.dump({'id': ['matches', '[']}, f)
+        result = CliRunner().invoke(
+            main, ['enforce', str(self.rules), str(self.source)]
+        )
+        self.assertEqual(result.exit_code, 2)
+        self.assertRegex(
+            result.stderr, "Invalid value for 'RULES': Illegal regular expression"
+        )
@@ -1,6 +1,21 @@
-from typing import Any, List, Optional, Set, Tuple, Union  # noqa: F401
+from typing import (  # noqa: F401
+    Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+)
 
 from enum import Enum
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import operator
+import os
+import re
+import sys
+import threading
+import time
+import warnings
+import weakref
 # ------------------------------------------------------------------------------
 
 
@@ -74,70 +89,1595 @@ def canonical(self):
 
     @staticmethod
     def from_string(string):
-        # type: (str) -> Comparator
+        # type: (str) -> Any
         '''
-        Constructs Comparator from given string.
+        Constructs Comparator from given string. Looks up built-in and
+        registered comparators alike.
 
         Args:
             string (str): Comparator name.
 
         Returns:
-            Comparator: Comparator.
+            Comparator or CustomComparator: Comparator.
         '''
-        lut = {}
-        for val in Comparator.__members__.values():
-            lut[val.text] = val
-            lut[val.symbol] = val
-        return lut[string.lower()]
+        return _COMPARATOR_LUT[string.lower()]
+
+
+class CustomComparator:
+    '''
+    Comparator registered with register_comparator. Has the same interface as
+    Comparator.
+    '''
+    def __init__(
+        self,
+        name,
+        function,
+        text,
+        symbol,
+        negation,
+        negation_symbol,
+        message,
+        uses_epsilon=False,
+    ):
+        # type: (str, Any, str, str, bool, str, str, bool) -> None
+        '''
+        Constructs CustomComparator instance.
+
+        Args:
+            name (str): Comparator name.
+            function (str or function): Enforce method name or function of
+                signature (a, b) -> bool.
+            text (str): Comparator as text.
+            symbol (str): Comparator as symbol.
+            negation (bool): Function is a negation.
+            negation_symbol (str): Negated comparator as symbol.
+            message  (str): Error message fragment.
+            uses_epsilon (bool, optional): Function takes an epsilon keyword
+                argument. Default: False.
+        '''
+        self.name = name
+        self.function = function
+        self.text = text
+        self.symbol = symbol
+        self.negation = negation
+        self.negation_symbol = negation_symbol
+        self.message = message
+        self.uses_epsilon = uses_epsilon
+
+    def __repr__(self):
+        # type: () -> str
+        return f'<CustomComparator.{self.name}>'
+
+    @property
+    def canonical(self):
+        # type: () -> str
+        '''
+        str: Canonical name of CustomComparator
+        '''
+        return self.name.lower()
+
+
+_COMPARATOR_LUT = {}  # type: Dict[str, Any]
+for _comp in Comparator.__members__.values():
+    _COMPARATOR_LUT[_comp.text] = _comp
+    _COMPARATOR_LUT[_comp.symbol] = _comp
+
+
+def register_comparator(
+    name,
+    function,
+    text,
+    symbol,
+    negation,
+    negation_symbol,
+    message,
+    uses_epsilon=False,
+):
+    # type: (str, Any, str, str, bool, str, str, bool) -> CustomComparator
+    '''
+    Registers a new comparator for use by Enforce, compiled rules, checks,
+    Enforce.all and Schema. Registered comparators are resolved through the
+    same lookup table and dispatch as built-in ones, so they run equally fast.
+
+    Example:
+
+        >>> register_comparator(
+                'ENDS_WITH', lambda a, b: a.endswith(b), 'ends with',
+                'endswith', False, 'not endswith', 'not ending with'
+            )
+        >>> Enforce('foobar', 'ends with', 'foo')
+        EnforceError: foobar is not ending with foo.
+
+    Args:
+        name (str): Comparator name.
+        function (str or function): Enforce method name or function of
+            signature (a, b) -> bool.
+        text (str): Comparator as text.
+        symbol (str): Comparator as symbol.
+        negation (bool): Function result is negated.
+        negation_symbol (str): Negated comparator as symbol.
+        message  (str): Error message fragment.
+        uses_epsilon (bool, optional): Function takes an epsilon keyword
+            argument. Default: False.
+
+    Raises:
+        EnforceError: If text or symbol is already registered.
+
+    Returns:
+        CustomComparator: Registered comparator.
+    '''
+    for key in [text, symbol]:
+        if key.lower() in _COMPARATOR_LUT:
+            msg = f'Comparator {key} is already registered.'
+            raise EnforceError(msg)
+
+    comp = CustomComparator(
+        name,
+        function,
+        text,
+        symbol,
+        negation,
+        negation_symbol,
+        message,
+        uses_epsilon=uses_epsilon,
+    )
+    _COMPARATOR_LUT[text.lower()] = comp
+    _COMPARATOR_LUT[symbol.lower()] = comp
+    return comp
 
 
 class EnforceError(Exception):
     '''
     Enforce error class.
+
+    Formatting of the error message is deferred until the error is converted
+    to a string.
     '''
-    pass
-# ------------------------------------------------------------------------------
+    def __init__(self, message='', **kwargs):
+        # type: (str, Any) -> None
+        r'''
+        Constructs an EnforceError instance.
+
+        Args:
+            message (str, optional): Error message or message template.
+                Default: ''.
+            \*\*kwargs (object, optional): Template fields. If given, message
+                is formatted with them when the error is converted to a string.
+        '''
+        super().__init__(message)
+        self.fields = kwargs
+        self._message = None  # type: Optional[str]
 
+    def __str__(self):
+        # type: () -> str
+        '''
+        Formats error message on first call. If the template cannot be
+        formatted with the fields, the raw template and fields are returned,
+        so that the error is never lost.
 
-class Enforce:
+        Returns:
+            str: Error message.
+        '''
+        if self._message is None:
+            message = str(self.args[0]) if len(self.args) > 0 else ''
+            if self.fields:
+                try:
+                    message = message.format(**self.fields)
+                except (KeyError, IndexError, ValueError, AttributeError):
+                    message = f'{message} {self.fields!r}'
+            self._message = message
+        return self._message
+
+    def __repr__(self):
+        # type: () -> str
+        return f'{self.__class__.__name__}({str(self)!r})'
+
+    def __reduce__(self):
+        # type: () -> Tuple
+        '''
+        Pickles error with formatted message, so it survives processes.
+
+        Returns:
+            tuple: Class and arguments.
+        '''
+        return (self.__class__, (str(self),))
+
+
+# MODE--------------------------------------------------------------------------
+ENFORCE_MODES = ['full', 'sampled', 'off']
+_MODE = 'full'
+_SAMPLE_RATE = 100
+_SAMPLE_COUNTS = {}  # type: Dict[Any, int]
+
+
+def set_mode(mode, sample_rate=None):
+    # type: (str, Optional[int]) -> None
     '''
-    Faciltates inline testing. Super class for Enforcer subclasses.
+    Sets process-wide enforcement mode. Modes are:
+
+        * full - every check is run
+        * sampled - 1 in sample_rate calls at each call site is run
+        * off - no checks are run
+
+    The initial mode and sample rate are read from the
+    LUNCHBOX_ENFORCE_MODE and LUNCHBOX_ENFORCE_SAMPLE_RATE environment
+    variables. Affects Enforce, compiled rules and Enforce.all, including the
+    checks made within lunchbox itself.
+
+    Args:
+        mode (str): Enforcement mode.
+        sample_rate (int, optional): Run 1 in sample_rate checks per call site
+            in sampled mode. Default: None, which leaves it unchanged.
+
+    Raises:
+        EnforceError: If mode is illegal.
+        EnforceError: If sample_rate is not an integer greater than 0.
+    '''
+    global _MODE, _SAMPLE_RATE
+    if mode not in ENFORCE_MODES:
+        msg = f'Mode must be one of {ENFORCE_MODES}. Given value: {mode}.'
+        raise EnforceError(msg)
+    if sample_rate is not None:
+        if not isinstance(sample_rate, int) or sample_rate < 1:
+            msg = 'Sample rate must be an integer greater than 0. '
+            msg += f'Given value: {sample_rate}.'
+            raise EnforceError(msg)
+        _SAMPLE_RATE = sample_rate
+    _SAMPLE_COUNTS.clear()
+    _MODE = mode
+
+
+def get_mode():
+    # type: () -> str
+    '''
+    Gets process-wide enforcement mode.
+
+    Returns:
+        str: Enforcement mode.
+    '''
+    return _MODE
+
+
+def get_sample_rate():
+    # type: () -> int
+    '''
+    Gets process-wide sample rate used by sampled enforcement mode.
+
+    Returns:
+        int: Sample rate.
+    '''
+    return _SAMPLE_RATE
+
+
+def _skip(key):
+    # type: (Any) -> bool
+    '''
+    Determines whether a check at a given call site should be skipped under
+    sampled enforcement mode.
+
+    Args:
+        key (object): Call site key.
+
+    Returns:
+        bool: True if check should be skipped.
+    '''
+    count = _SAMPLE_COUNTS.get(key, 0)
+    _SAMPLE_COUNTS[key] = count + 1
+    return count % _SAMPLE_RATE != 0
+
+
+# code objects of __init__ methods overridden by Enforce subclasses, which
+# call sites skip, so that subclass checks resolve to their callers
+_INIT_CODES = set()  # type: Set[Any]
+
+
+def _call_site(depth=2):
+    # type: (int) -> Tuple
+    '''
+    Gets call site of the function calling this function. Frames of
+    overridden Enforce subclass __init__ methods are skipped.
+
+    Args:
+        depth (int, optional): Frame depth. Default: 2.
+
+    Returns:
+        tuple: Code object and line number.
+    '''
+    frame = sys._getframe(depth)
+    while frame.f_code in _INIT_CODES and frame.f_back is not None:
+        frame = frame.f_back
+    return (frame.f_code, frame.f_lineno)
+
+
+def _set_mode_from_env():
+    # type: () -> None
+    '''
+    Sets enforcement mode and sample rate from the LUNCHBOX_ENFORCE_MODE and
+    LUNCHBOX_ENFORCE_SAMPLE_RATE environment variables. Illegal values are
+    warned about and replaced with full and 100, so that they do not break
+    importing lunchbox.
+    '''
+    mode = os.environ.get('LUNCHBOX_ENFORCE_MODE', 'full').lower()
+    if mode not in ENFORCE_MODES:
+        msg = f'LUNCHBOX_ENFORCE_MODE must be one of {ENFORCE_MODES}. '
+        msg += f'Given value: {mode}. Using full.'
+        warnings.warn(msg, RuntimeWarning)
+        mode = 'full'
+
+    rate = os.environ.get('LUNCHBOX_ENFORCE_SAMPLE_RATE', '100')
+    try:
+        sample_rate = int(rate)
+    except ValueError:
+        sample_rate = 0
+    if sample_rate < 1:
+        msg = 'LUNCHBOX_ENFORCE_SAMPLE_RATE must be an integer greater than 0. '
+        msg += f'Given value: {rate}. Using 100.'
+        warnings.warn(msg, RuntimeWarning)
+        sample_rate = 100
+
+    set_mode(mode, sample_rate=sample_rate)
+
+
+_set_mode_from_env()
+
+
+# INSTRUMENTATION---------------------------------------------------------------
+_INSTRUMENT = False
+_STATS = {}  # type: Dict[Tuple, List[int]]
+_STATS_LOCK = threading.Lock()
+
+
+def enable_instrumentation():
+    # type: () -> None
+    '''
+    Enables recording of call count, failure count and cumulative time of
+    each Enforce call site. Call sites are keyed by file, line and comparator.
+    Covers Enforce, compiled rules and Enforce.all. Instrumentation is also
+    enabled at import if the LUNCHBOX_ENFORCE_INSTRUMENT environment variable
+    is set to 1.
+    '''
+    global _INSTRUMENT
+    _INSTRUMENT = True
+
+
+def disable_instrumentation():
+    # type: () -> None
+    '''
+    Disables Enforce instrumentation. Recorded statistics are kept.
+    '''
+    global _INSTRUMENT
+    _INSTRUMENT = False
+
+
+def reset_instrumentation():
+    # type: () -> None
+    '''
+    Clears all recorded Enforce instrumentation statistics.
+    '''
+    with _STATS_LOCK:
+        _STATS.clear()
+
+
+def _record(site, comparator, failed, start):
+    # type: (Tuple, Any, bool, int) -> None
+    '''
+    Records a single instrumented Enforce call.
+
+    Args:
+        site (tuple): Code object and line number of call site.
+        comparator (Comparator): Comparator.
+        failed (bool): Whether check failed.
+        start (int): Start time in nanoseconds.
+    '''
+    delta = time.perf_counter_ns() - start
+    key = (site[0], site[1], comparator)
+    with _STATS_LOCK:
+        stat = _STATS.get(key)
+        if stat is None:
+            stat = _STATS[key] = [0, 0, 0]
+        stat[0] += 1
+        stat[1] += failed
+        stat[2] += delta
+
+
+def get_instrumentation():
+    # type: () -> List[Dict[str, Any]]
+    '''
+    Gets a snapshot of recorded Enforce instrumentation statistics, sorted by
+    cumulative time, descending.
+
+    Returns:
+        list[dict]: Statistics with keys: site, comparator, calls, failures,
+            total_ns and mean_ns.
+    '''
+    with _STATS_LOCK:
+        items = [(k, list(v)) for k, v in _STATS.items()]
+
+    output = []
+    for (code, line, comp), (calls, failures, total) in items:
+        output.append(dict(
+            site=f'{code.co_filename}:{line}',
+            comparator=comp.canonical,
+            calls=calls,
+            failures=failures,
+            total_ns=total,
+            mean_ns=total // calls,
+        ))
+    output.sort(key=lambda x: (-x['total_ns'], x['site']))
+    return output
+
+
+def dump_instrumentation(format_='table', max_width=200):
+    # type: (str, int) -> str
+    '''
+    Dumps recorded Enforce instrumentation statistics as JSON or as a table.
+
+    Args:
+        format_ (str, optional): Output format, json or table. Default: table.
+        max_width (int, optional): Maximum table width: Default: 200.
+
+    Raises:
+        EnforceError: If format is illegal.
+
+    Returns:
+        str: Statistics.
+    '''
+    if format_ not in ['json', 'table']:
+        msg = f"Format must be json or table. Given value: {format_}."
+        raise EnforceError(msg)
+
+    data = get_instrumentation()
+    if format_ == 'json':
+        return json.dumps(data, indent=4)
+
+    keys = ['site', 'comparator', 'calls', 'failures', 'total_ns', 'mean_ns']
+    rows = [{k: k.upper() for k in keys}]
+    rows.extend([{k: str(x[k]) for k in keys} for x in data])
+    widths = {k: max(len(x[k]) for x in rows) for k in keys}
+    pattern = '    '.join([f'{{{k}:<{widths[k]}}}' for k in keys])
+    lines = [pattern.format(**x).rstrip()[:max_width] for x in rows]
+    return '\n'.join(lines)
+
+
+if os.environ.get('LUNCHBOX_ENFORCE_INSTRUMENT', '0') == '1':
+    enable_instrumentation()  # pragma: no cover
+# GETTER-CACHE------------------------------------------------------------------
+_NOT_CACHED = object()
+_GETTER_CACHE = contextvars.ContextVar(
+    'lunchbox_enforce_getter_cache', default=None
+)  # type: contextvars.ContextVar[Optional[GetterCache]]
+
+
+class GetterCache:
+    '''
+    Scoped cache of get_* attribute getter results, so that expensive getters
+    run once per object per validation pass. Results are keyed by object
+    identity, Enforce class and attribute name. Active within a with block,
+    for the current thread or asyncio task. Covers Enforce, compiled rules,
+    Enforce.index and AsyncEnforce.
+
+    Entries of weak referenceable objects are evicted when the object is
+    garbage collected, so the cache does not keep them alive. Other objects,
+    such as dicts, are held until the block exits, so their identity cannot be
+    reused within it.
 
     Example:
 
-        >>> class Foo:
-                def __init__(self, value):
-                    self.value = value
-                def __repr__(self):
-                    return '<Foo>'
-        >>> class Bar:
-                def __init__(self, value):
-                    self.value = value
-                def __repr__(self):
-                    return '<Bar>'
+        >>> with GetterCache() as cache:
+                EnforceFoo(foo, '==', bar, 'size')
+                EnforceFoo(foo, '<', baz, 'size')
+        >>> cache.misses, cache.hits
+        (3, 1)
+    '''
+    def __init__(self):
+        # type: () -> None
+        '''
+        Constructs a GetterCache instance.
+        '''
+        self.hits = 0
+        self.misses = 0
+        self._values = {}  # type: Dict[Tuple[int, Any], Any]
+        self._keys = {}  # type: Dict[int, List[Any]]
+        self._pinned = {}  # type: Dict[int, Any]
+        self._finalizers = {}  # type: Dict[int, weakref.finalize]
+        self._token = None  # type: Any
+
+    def __enter__(self):
+        # type: () -> GetterCache
+        self._token = _GETTER_CACHE.set(self)
+        return self
+
+    def __exit__(self, *args):
+        # type: (Any) -> None
+        _GETTER_CACHE.reset(self._token)
+        self._token = None
+        self.clear()
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._values)
+
+    def clear(self):
+        # type: () -> None
+        '''
+        Removes all cached values.
+        '''
+        for finalizer in self._finalizers.values():
+            finalizer.detach()
+        self._values.clear()
+        self._keys.clear()
+        self._pinned.clear()
+        self._finalizers.clear()
+
+    def lookup(self, item, key):
+        # type: (Any, Any) -> Any
+        '''
+        Looks up cached getter result of given item.
 
-        >>> Enforce(Foo(1), '==', Foo(2), 'type_name')
-        >>> Enforce(Foo(1), '==', Bar(2), 'type_name')
-        EnforceError: type_name of <Foo> is not equal to type_name of <Bar>. \
-Foo != Bar.
+        Args:
+            item (object): Getter argument.
+            key (object): Getter key.
+
+        Returns:
+            object: Cached value or _NOT_CACHED.
+        '''
+        value = self._values.get((id(item), key), _NOT_CACHED)
+        if value is _NOT_CACHED:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def store(self, item, key, value):
+        # type: (Any, Any, Any) -> None
+        '''
+        Caches getter result of given item.
+
+        Args:
+            item (object): Getter argument.
+            key (object): Getter key.
+            value (object): Getter result.
+        '''
+        id_ = id(item)
+        keys = self._keys.get(id_)
+        if keys is None:
+            keys = self._keys[id_] = []
+            try:
+                self._finalizers[id_] = weakref.finalize(item, self._evict, id_)
+            except TypeError:
+                self._pinned[id_] = item
+        keys.append(key)
+        self._values[(id_, key)] = value
+
+    def _evict(self, id_):
+        # type: (int) -> None
+        '''
+        Removes cached values of a garbage collected object.
+
+        Args:
+            id_ (int): Object id.
+        '''
+        self._finalizers.pop(id_, None)
+        for key in self._keys.pop(id_, []):
+            self._values.pop((id_, key), None)
+
+
+def _cache_getter(getter, key):
+    # type: (Callable[[Any], Any], Any) -> Callable[[Any], Any]
+    '''
+    Wraps given attribute getter, so that it uses the active GetterCache, if
+    any.
+
+    Args:
+        getter (function): Attribute getter.
+        key (object): Getter key.
+
+    Returns:
+        function: Wrapped getter.
+    '''
+    def get(item):
+        cache = _GETTER_CACHE.get()
+        if cache is None:
+            return getter(item)
+        value = cache.lookup(item, key)
+        if value is _NOT_CACHED:
+            value = getter(item)
+            cache.store(item, key, value)
+        return value
+    return get
+# ------------------------------------------------------------------------------
+
+
+class EnforceResult:
+    '''
+    Result of a non-raising Enforce check. Truthy if the check passed. Its
+    error message is only built when asked for.
+    '''
+    __slots__ = ('error',)
+
+    def __init__(self, error=None):
+        # type: (Optional[EnforceError]) -> None
+        '''
+        Constructs an EnforceResult instance.
+
+        Args:
+            error (EnforceError, optional): Error of failed check.
+                Default: None.
+        '''
+        self.error = error
+
+    def __bool__(self):
+        # type: () -> bool
+        return self.error is None
+
+    def __repr__(self):
+        # type: () -> str
+        if self.error is None:
+            return 'EnforceResult(passed=True)'
+        return f'EnforceResult(passed=False, message={self.message!r})'
+
+    @property
+    def passed(self):
+        # type: () -> bool
+        '''
+        bool: Whether check passed.
+        '''
+        return self.error is None
+
+    @property
+    def message(self):
+        # type: () -> str
+        '''
+        str: Error message of failed check or empty string.
+        '''
+        if self.error is None:
+            return ''
+        return str(self.error)
+
+
+_PASSED = EnforceResult()
+
+# containers indexed by compiled in and not in rules, other containers, such as
+# strings, keep their own membership semantics
+_INDEXABLE = (list, tuple, set, frozenset)
+
+# builtin equivalents of Enforce comparator methods
+_BUILTINS = {
+    'eq': operator.eq,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'instance_of': isinstance,
+}  # type: Dict[str, Callable[..., Any]]
+
+
+class EnforceIndex:
+    '''
+    Precomputed membership index for in and not in comparisons, with O(1)
+    lookups. Hashable values are kept in a set, unhashable values fall back to
+    a list, which is scanned only for them. Use Enforce.index to create one.
+    '''
+    def __init__(self, items, getter=None):
+        # type: (Iterable, Optional[Callable[[Any], Any]]) -> None
+        '''
+        Constructs an EnforceIndex instance.
+
+        Args:
+            items (iterable): Container of items to be indexed.
+            getter (function, optional): Attribute getter applied to each item.
+                Default: None.
+        '''
+        values = []
+        hashable = set()
+        unhashable = []
+        for item in items:
+            if getter is not None:
+                item = getter(item)
+            values.append(item)
+            try:
+                hashable.add(item)
+            except TypeError:
+                unhashable.append(item)
+
+        self.values = values
+        self._hashable = hashable
+        self._unhashable = unhashable
+
+    def __contains__(self, item):
+        # type: (Any) -> bool
+        try:
+            if item in self._hashable:
+                return True
+        except TypeError:
+            pass
+        return item in self._unhashable
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.values)
+
+    def __repr__(self):
+        # type: () -> str
+        return repr(self.values)
+
+
+class EnforceRule:
+    '''
+    A precompiled Enforce predicate, which tests a given object against a fixed
+    comparator and b value. Use Enforce.compile to create one.
+    '''
+    def __init__(
+        self,
+        enforce,
+        comparator,
+        b,
+        attribute=None,
+        message=None,
+        epsilon=0.01,
+        index=False,
+    ):
+        # type: (Enforce, str, Any, Optional[str], Optional[str], float, bool) -> None
+        '''
+        Constructs an EnforceRule instance.
+
+        Args:
+            enforce (Enforce): Enforce instance supplying comparator functions
+                and attribute getters.
+            comparator (str): String representation of Comparator.
+            b (object): Second object. For in and not in, an EnforceIndex is
+                used as is.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float, optional): Error threshold for a/b difference.
+                Default: 0.01.
+            index (bool, optional): Index b for in and not in comparisons, if
+                b is a list, tuple, set or frozenset. Default: False.
+        '''
+        comp = Comparator.from_string(comparator)  # type: Comparator
+        membership = comp in [Comparator.IN, Comparator.NOT_IN]
+        b_val = b
+        getter = None  # type: Optional[Callable[[Any], Any]]
+        if attribute is not None:
+            getter = _cache_getter(
+                getattr(enforce, 'get_' + attribute),
+                (enforce.__class__, attribute),
+            )
+            if membership:
+                if not isinstance(b, EnforceIndex):
+                    b_val = [getter(x) for x in b]
+            else:
+                b_val = getter(b)
+
+        if membership and index and isinstance(b_val, _INDEXABLE):
+            b_val = EnforceIndex(b_val)
+
+        if comp.function == 'instance_of' and isinstance(b_val, list):
+            b_val = tuple(b_val)
+
+        if message is None:
+            message = enforce._get_message(attribute, comp)
+
+        self.comparator = comp
+        self.b = b
+        self.attribute = attribute
+        self.message = message
+        self.epsilon = epsilon
+        self._enforce = enforce
+        # registered comparators may supply a function instead of a method name
+        if isinstance(comp.function, str):
+            function = getattr(enforce, comp.function)  # type: Callable[..., Any]
+            # comparators which are not overridden are bound to builtins, as
+            # they are in RuleSet
+            name = comp.function
+            if name in _BUILTINS and getattr(type(enforce), name) is getattr(Enforce, name):
+                function = _BUILTINS[name]
+        else:
+            function = comp.function
+        if getattr(comp, 'uses_epsilon', False):
+            function = functools.partial(function, epsilon=epsilon)
+        self._function = function
+        self._getter = getter
+        self._b_val = b_val
+        self._similar = comp.function == 'similar'
+        self._negation = comp.negation
+        self._calls = 0
+
+        # rules without getter or epsilon, whose class does not override
+        # _validate, are tested inline by __call__
+        self._inline = getter is None and not self._similar \
+            and type(self)._validate is EnforceRule._validate
+
+    def __call__(self, a):
+        # type: (Any) -> None
+        '''
+        Validates rule predicate against given object. Honors enforcement
+        mode, sampling per rule.
+
+        Args:
+            a (object): Object to be tested.
+
+        Raises:
+            EnforceError: If predicate fails.
+        '''
+        if _MODE != 'full':
+            if _MODE == 'off':
+                return
+            self._calls += 1
+            if (self._calls - 1) % _SAMPLE_RATE != 0:
+                return
+
+        if _INSTRUMENT:
+            start = time.perf_counter_ns()
+            error = self._validate(a)
+            _record(_call_site(), self.comparator, error is not None, start)
+            if error is not None:
+                raise error
+            return
+
+        if self._inline:
+            result = self._function(a, self._b_val)
+            if self._negation:
+                if not result:
+                    return
+            elif result is not False:
+                return
+            raise self._get_error(a, a, None)
+
+        error = self._validate(a)
+        if error is not None:
+            raise error
+
+    def check(self, a):
+        # type: (Any) -> EnforceResult
+        '''
+        Tests rule predicate against given object without raising. Does not
+        honor enforcement mode.
+
+        Args:
+            a (object): Object to be tested.
+
+        Returns:
+            EnforceResult: Truthy result if predicate passes.
+        '''
+        error = self._validate(a)
+        if error is None:
+            return _PASSED
+        return EnforceResult(error)
+
+    def _validate(self, a):
+        # type: (Any) -> Optional[EnforceError]
+        '''
+        Tests rule predicate against given object without raising.
+
+        Args:
+            a (object): Object to be tested.
+
+        Returns:
+            EnforceError or None: Error if predicate fails, otherwise None.
+        '''
+        a_val = a
+        if self._getter is not None:
+            a_val = self._getter(a)
+
+        delta = None
+        if self._similar:
+            delta = self._enforce.difference(a_val, self._b_val)
+            result = self._function(delta, self.epsilon)
+        else:
+            result = self._function(a_val, self._b_val)
+
+        if self._negation:
+            result = not result
+        if result is False:
+            return self._get_error(a, a_val, delta)
+        return None
+
+    def _get_error(self, a, a_val, delta):
+        # type: (Any, Any, Any) -> EnforceError
+        '''
+        Creates an EnforceError with a deferred error message.
+
+        Args:
+            a (object): Tested object.
+            a_val (object): Tested value of a.
+            delta (object): Difference between a_val and b value.
+
+        Returns:
+            EnforceError: Enforce error.
+        '''
+        return EnforceError(
+            self.message,
+            comparator=self.comparator,
+            a=a,
+            b=self.b,
+            a_val=a_val,
+            b_val=self._b_val,
+            attribute=self.attribute,
+            delta=delta,
+            epsilon=self.epsilon,
+        )
+
+
+class Enforce:
+    '''
+    Faciltates inline testing. Super class for Enforcer subclasses.
+
+    Example:
+
+        >>> class Foo:
+                def __init__(self, value):
+                    self.value = value
+                def __repr__(self):
+                    return '<Foo>'
+        >>> class Bar:
+                def __init__(self, value):
+                    self.value = value
+                def __repr__(self):
+                    return '<Bar>'
+
+        >>> Enforce(Foo(1), '==', Foo(2), 'type_name')
+        >>> Enforce(Foo(1), '==', Bar(2), 'type_name')
+        EnforceError: type_name of <Foo> is not equal to type_name of <Bar>. \
+Foo != Bar.
+
+        >>> class EnforceFooBar(Enforce):
+            def get_value(self, item):
+                return item.value
+        >>> EnforceFooBar(Foo(1), '==', Bar(1), 'value')
+        >>> EnforceFooBar(Foo(1), '==', Bar(2), 'value')
+        EnforceError: value of <Foo> is not equal to value of <Bar>. 1 != 2.
+        >>> EnforceFooBar(Foo(1), '~', Bar(5), 'value', epsilon=2)
+        EnforceError: value of <Foo> is not similar to value of <Bar>. Delta 4 \
+is greater than epsilon 2.
+
+        >>> msg = '{a} is not like {b}. Please adjust your epsilon,: {epsilon}, '
+        >>> msg += 'to be higher than {delta}. '
+        >>> msg += 'A value: {a_val}. B value: {b_val}.'
+        >>> EnforceFooBar(Foo(1), '~', Bar(5), 'value', epsilon=2, message=msg)
+        <Foo> is not like <Bar>. Please adjust your epsilon: 2, to be higher \
+than 4. A value: 1. B value: 5.
+    '''
+    _rule_class = EnforceRule
+
+    def __init_subclass__(cls, **kwargs):
+        # type: (Any) -> None
+        super().__init_subclass__(**kwargs)
+        init = cls.__dict__.get('__init__')
+        if init is not None and hasattr(init, '__code__'):
+            _INIT_CODES.add(init.__code__)
+
+    def __init__(
+        self,
+        a,
+        comparator,
+        b,
+        attribute=None,
+        message=None,
+        epsilon=0.01
+    ):
+        # type: (Any, str, Any, Optional[str], Optional[str], float) -> None
+        '''
+        Validates predicate specified in constructor.
+
+        Args:
+            a (object): First object to be tested.
+            comparator (str): String representation of Comparator.
+            b (object): Second object.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float, optional): Error threshold for a/b difference.
+                Default: 0.01.
+
+        Raises:
+            EnforceError: If predicate fails.
+
+        Returns:
+            Enforce: Enforce instance.
+        '''
+        if _MODE != 'full':
+            if _MODE == 'off' or _skip(_call_site()):
+                return
+
+        start = time.perf_counter_ns() if _INSTRUMENT else 0
+        rule = self._rule_class(
+            self,
+            comparator,
+            b,
+            attribute=attribute,
+            message=message,
+            epsilon=epsilon,
+        )
+        error = rule._validate(a)
+
+        if start:
+            _record(_call_site(), rule.comparator, error is not None, start)
+
+        if error is not None:
+            raise error
+
+    @classmethod
+    def compile(cls, comparator, b, attribute=None, message=None, epsilon=0.01):
+        # type: (str, Any, Optional[str], Optional[str], float) -> EnforceRule
+        '''
+        Compiles a reusable rule, with its comparator, comparator function,
+        attribute getter and b value resolved once. For in and not in, list,
+        tuple, set and frozenset b values are indexed, so membership tests are
+        O(1). Other containers, such as strings, are used as is.
+
+        Example:
+
+            >>> rule = EnforceFooBar.compile('==', Bar(1), 'value')
+            >>> rule(Foo(1))
+            >>> rule(Foo(2))
+            EnforceError: value of <Foo> is not equal to value of <Bar>. 2 != 1.
+
+        Args:
+            comparator (str): String representation of Comparator.
+            b (object): Second object.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float, optional): Error threshold for a/b difference.
+                Default: 0.01.
+
+        Returns:
+            EnforceRule: Compiled rule.
+        '''
+        return cls._rule_class(
+            cls.__new__(cls),
+            comparator,
+            b,
+            attribute=attribute,
+            message=message,
+            epsilon=epsilon,
+            index=True,
+        )
+
+    @classmethod
+    def compile_rules(cls, spec):
+        # type: (Any) -> List[EnforceRule]
+        '''
+        Compiles given rule spec, as used by Schema, into a list of rules.
+
+        Rule specs:
+
+            * type or tuple of types - instance of rule
+            * (comparator, b) or (comparator, b, epsilon) - comparator rule
+            * list - list of the above
+
+        Args:
+            spec (object): Rule spec or list of rule specs.
+
+        Raises:
+            EnforceError: If a rule spec is not legal.
+
+        Returns:
+            list[EnforceRule]: Compiled rules.
+        '''
+        rules = []
+        specs = spec if isinstance(spec, list) else [spec]
+        for item in specs:
+            if isinstance(item, type):
+                rules.append(cls.compile('instance of', item))
+            elif isinstance(item, tuple) and len(item) > 0 \
+                    and all(isinstance(x, type) for x in item):
+                rules.append(cls.compile('instance of', item))
+            elif isinstance(item, tuple) and len(item) in [2, 3] \
+                    and isinstance(item[0], str):
+                kwargs = {}
+                if len(item) == 3:
+                    kwargs['epsilon'] = item[2]
+                rules.append(cls.compile(item[0], item[1], **kwargs))
+            else:
+                msg = 'Illegal rule: {rule!r}. Rules must be a type, tuple of '
+                msg += 'types, (comparator, b) tuple, (comparator, b, epsilon) '
+                msg += 'tuple or list of those.'
+                raise EnforceError(msg, rule=item)
+        return rules
+
+    @classmethod
+    def index(cls, b, attribute=None):
+        # type: (Iterable, Optional[str]) -> EnforceIndex
+        '''
+        Builds a reusable membership index of given container, so that in and
+        not in comparisons against it are O(1). If attribute is given, the
+        index holds the attribute values of the container's items. Pass the
+        same attribute when using the index.
+
+        Example:
+
+            >>> index = EnforceFooBar.index([Bar(1), Bar(2)], 'value')
+            >>> EnforceFooBar(Foo(1), 'in', index, 'value')
+            >>> EnforceFooBar(Foo(3), 'in', index, 'value')
+            EnforceError: value of <Foo> is not in value of [1, 2].
+
+        Args:
+            b (iterable): Container object.
+            attribute (str, optional): Attribute name of b items.
+                Default: None.
+
+        Returns:
+            EnforceIndex: Membership index.
+        '''
+        getter = None
+        if attribute is not None:
+            getter = _cache_getter(
+                getattr(cls.__new__(cls), 'get_' + attribute), (cls, attribute)
+            )
+        return EnforceIndex(b, getter=getter)
+
+    @classmethod
+    def check(
+        cls, a, comparator, b, attribute=None, message=None, epsilon=0.01
+    ):
+        # type: (Any, str, Any, Optional[str], Optional[str], float) -> EnforceResult
+        '''
+        Tests predicate without raising. Uses the same comparator functions,
+        attribute getters and error messages as the constructor. Does not
+        honor enforcement mode.
+
+        Example:
+
+            >>> result = EnforceFooBar.check(Foo(1), '==', Bar(2), 'value')
+            >>> bool(result)
+            False
+            >>> result.message
+            'value of <Foo> is not equal to value of <Bar>. 1 != 2.'
+
+            >>> [x for x in range(10) if Enforce.check(x, '>', 5)]
+            [6, 7, 8, 9]
+
+        Args:
+            a (object): First object to be tested.
+            comparator (str): String representation of Comparator.
+            b (object): Second object.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float, optional): Error threshold for a/b difference.
+                Default: 0.01.
+
+        Returns:
+            EnforceResult: Truthy result if predicate passes.
+        '''
+        # one-shot, so b is not indexed
+        return cls._rule_class(
+            cls.__new__(cls),
+            comparator,
+            b,
+            attribute=attribute,
+            message=message,
+            epsilon=epsilon,
+        ).check(a)
+
+    @classmethod
+    def all(
+        cls,
+        items,
+        comparator,
+        b,
+        attribute=None,
+        message=None,
+        epsilon=0.01,
+        max_failures=10,
+    ):
+        # type: (Iterable, str, Any, Optional[str], Optional[str], float, int) -> None
+        '''
+        Validates predicate against every item of given iterable. Items are
+        streamed through a compiled rule, and failures are collected rather
+        than raised one at a time. Only the first max_failures failures are
+        kept, so memory is constant regardless of the number of items.
+
+        Example:
+
+            >>> Enforce.all([1, 2, -3, 4, -5], '>', 0)
+            EnforceError: 2 of 5 items failed. Failure indices: [2, 4].
+                [2] -3 is not greater than 0. -3 <= 0.
+                [4] -5 is not greater than 0. -5 <= 0.
+
+        Args:
+            items (iterable): Objects to be tested.
+            comparator (str): String representation of Comparator.
+            b (object): Second object.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float, optional): Error threshold for a/b difference.
+                Default: 0.01.
+            max_failures (int, optional): Maximum number of failures reported.
+                Default: 10.
+
+        Raises:
+            EnforceError: If predicate fails for any item. Error fields
+                include count, total, indices and errors.
+        '''
+        if _MODE != 'full':
+            if _MODE == 'off' or _skip(_call_site()):
+                return
+
+        start = time.perf_counter_ns()
+        rule = cls.compile(
+            comparator, b, attribute=attribute, message=message, epsilon=epsilon
+        )
+        validate = rule._validate
+
+        count = 0
+        total = 0
+        failures = []  # type: List[Tuple[int, EnforceError]]
+        for i, item in enumerate(items):
+            total += 1
+            error = validate(item)
+            if error is not None:
+                count += 1
+                if len(failures) < max_failures:
+                    failures.append((i, error))
+
+        if _INSTRUMENT:
+            _record(_call_site(), rule.comparator, count > 0, start)
+
+        if count > 0:
+            raise cls._get_all_error(count, total, failures)
+
+    @staticmethod
+    def _get_all_error(count, total, failures):
+        # type: (int, int, List[Tuple[int, EnforceError]]) -> EnforceError
+        '''
+        Creates error of failed items, as raised by all.
+
+        Args:
+            count (int): Number of failed items.
+            total (int): Number of items.
+            failures (list[tuple]): Index and error of reported failures.
+
+        Returns:
+            EnforceError: Enforce error.
+        '''
+        indices = [x[0] for x in failures]
+        lines = ''.join([f'\n    [{i}] {e}' for i, e in failures])
+        msg = '{count} of {total} items failed. '
+        msg += 'Failure indices: {indices}.{lines}'
+        return EnforceError(
+            msg,
+            count=count,
+            total=total,
+            indices=indices,
+            errors=[x[1] for x in failures],
+            lines=lines,
+        )
+
+    def _get_message(self, attribute, comparator):
+        # type: (Optional[str], Comparator) -> str
+        '''
+        Creates an unformatted error message given an attribute name and
+        comparator.
+
+        Args:
+            attribute (str or None): Attribute name.
+            comparator (Comparator): Comparator instance.
+
+        Returns:
+            str: Error message.
+        '''
+        message = '{a} is {comparator.message} {b}.'
+        if attribute is not None:
+            message = '{attribute} of {a} is {comparator.message} {attribute} of {b}.'
+
+        skip = [
+            Comparator.IN,
+            Comparator.NOT_IN,
+            Comparator.INSTANCE_OF,
+            Comparator.NOT_INSTANCE_OF,
+        ]
+        if comparator in skip or isinstance(comparator, CustomComparator):
+            pass
+        elif comparator is Comparator.SIMILAR:
+            message += ' Delta {delta} is greater than epsilon {epsilon}.'
+        elif comparator is Comparator.NOT_SIMILAR:
+            message += ' Delta {delta} is not greater than epsilon {epsilon}.'
+        else:
+            message += ' {a_val} {comparator.negation_symbol} {b_val}.'
+
+        return message
+
+    # COMPARATORS---------------------------------------------------------------
+    def eq(self, a, b):
+        # type: (Any, Any) -> bool
+        '''
+        Determines if a and b are equal.
+
+        Args:
+            a (object): First object.
+            b (object): Second object.
+
+        Returns:
+            bool: True if a equals b.
+        '''
+        return a == b
+
+    def gt(self, a, b):
+        # type: (Any, Any) -> bool
+        '''
+        Determines if a is greater than b.
+
+        Args:
+            a (object): First object.
+            b (object): Second object.
+
+        Returns:
+            bool: True if a is greater than b.
+        '''
+        return a > b
+
+    def gte(self, a, b):
+        # type: (Any, Any) -> bool
+        '''
+        Determines if a is greater than or equal to b.
+
+        Args:
+            a (object): First object.
+            b (object): Second object.
+
+        Returns:
+            bool: True if a is greater than or equal to b.
+        '''
+        return a >= b
+
+    def lt(self, a, b):
+        # type: (Any, Any) -> bool
+        '''
+        Determines if a is lesser than b.
+
+        Args:
+            a (object): First object.
+            b (object): Second object.
+
+        Returns:
+            bool: True if a is lesser than b.
+        '''
+        return a < b
+
+    def lte(self, a, b):
+        # type: (Any, Any) -> bool
+        '''
+        Determines if a is lesser than or equal to b.
+
+        Args:
+            a (object): First object.
+            b (object): Second object.
+
+        Returns:
+            bool: True if a is lesser than or equal to b.
+        '''
+        return a <= b
+
+    def similar(self, difference, epsilon=0.01):
+        # type: (Union[int, float], float) -> bool
+        '''
+        Determines if a/b difference given error threshold episilon.
+
+        Args:
+            difference (int or float): Difference between a and b.
+            epsilon (float, optional): Error threshold. Default: 0.01.
+
+        Returns:
+            bool: True if difference is less than epsilon.
+        '''
+        return difference < epsilon
+
+    def in_(self, a, b):
+        # type: (Any, Union[List, Set, Tuple]) -> bool
+        '''
+        Determines if a is in b.
+
+        Args:
+            a (object): Member object.
+            b (list or set or tuple): Container object.
+
+        Returns:
+            bool: True if a is in b.
+        '''
+        return a in b
+
+    def instance_of(self, a, b):
+        # type: (Any, Any) -> bool
+        '''
+        Determines if a is instance of b.
+
+        Args:
+            a (type or list[type]): Instance object.
+            b (object): Class object.
+
+        Returns:
+            bool: True if a is instance of b.
+        '''
+        if not isinstance(b, (tuple, list)):
+            b = [b]
+        if isinstance(b, list):
+            b = tuple(b)
+        return isinstance(a, b)
+
+    def match(self, a, b):
+        # type: (str, str) -> bool
+        '''
+        Determines if regular expression b matches a.
+
+        Args:
+            a (str): String.
+            b (str): Regular expression.
+
+        Returns:
+            bool: True if b is found in a.
+        '''
+        return re.search(b, a) is not None
+
+    def starts_with(self, a, b):
+        # type: (str, str) -> bool
+        '''
+        Determines if a starts with b.
+
+        Args:
+            a (str): String.
+            b (str or tuple[str]): Prefix or prefixes.
+
+        Returns:
+            bool: True if a starts with b.
+        '''
+        return a.startswith(b)
+
+    def length_between(self, a, b):
+        # type: (Any, Tuple[int, int]) -> bool
+        '''
+        Determines if length of a is between, inclusively, given bounds.
+
+        Args:
+            a (object): Sized object.
+            b (tuple[int]): Minimum and maximum length.
+
+        Returns:
+            bool: True if b[0] <= len(a) <= b[1].
+        '''
+        return b[0] <= len(a) <= b[1]
+
+    def subset(self, a, b):
+        # type: (Any, Any) -> bool
+        '''
+        Determines if a is a subset of b.
+
+        Args:
+            a (iterable): First object.
+            b (iterable): Second object.
+
+        Returns:
+            bool: True if a is a subset of b.
+        '''
+        return set(a).issubset(b)
+
+    def superset(self, a, b):
+        # type: (Any, Any) -> bool
+        '''
+        Determines if a is a superset of b.
+
+        Args:
+            a (iterable): First object.
+            b (iterable): Second object.
+
+        Returns:
+            bool: True if a is a superset of b.
+        '''
+        return set(a).issuperset(b)
+
+    def relatively_similar(self, a, b, epsilon=0.01):
+        # type: (Union[int, float], Union[int, float], float) -> bool
+        '''
+        Determines if a and b are similar, relative to their magnitude.
+
+        Args:
+            a (int or float): First number.
+            b (int or float): Second number.
+            epsilon (float, optional): Relative error threshold. Default: 0.01.
+
+        Returns:
+            bool: True if abs(a - b) is less than or equal to epsilon times
+                the larger magnitude of a and b.
+        '''
+        return abs(a - b) <= epsilon * max(abs(a), abs(b))
+
+    def difference(self, a, b):
+        # type: (Any, Any) -> float
+        '''
+        Calculates difference between a and b.
+
+        Args:
+            a (object): First object.
+            b (object): Second object.
+
+        Returns:
+            float: Difference between a and b.
+        '''
+        return abs(a - b)
+
+    # ATTRIBUTE-GETTERS---------------------------------------------------------
+    def get_type_name(self, item):
+        # type: (Any) -> str
+        '''
+        Gets __class__.__name__ of given item.
+
+        Args:
+            item (object): Item.
+
+        Returns:
+            str: item.__class__.__name__
+        '''
+        return item.__class__.__name__
+
+
+# REGISTERED-COMPARATORS--------------------------------------------------------
+for _args in [
+    ('MATCH',                  'match',              'matches',                '~=',              False, '!~=',             'not matching'                 ),  # noqa: E241, E202, E501, E221
+    ('NOT_MATCH',              'match',              'not matches',            '!~=',             True,  '~=',              'matching'                     ),  # noqa: E241, E202, E501, E221
+    ('STARTS_WITH',            'starts_with',        'starts with',            'startswith',      False, 'not startswith',  'not starting with'            ),  # noqa: E241, E202, E501, E221
+    ('NOT_STARTS_WITH',        'starts_with',        'not starts with',        'not startswith',  True,  'startswith',      'starting with'                ),  # noqa: E241, E202, E501, E221
+    ('LENGTH_BETWEEN',         'length_between',     'length between',         'len between',     False, 'len not between', 'not of length between'        ),  # noqa: E241, E202, E501, E221
+    ('NOT_LENGTH_BETWEEN',     'length_between',     'not length between',     'len not between', True,  'len between',     'of length between'            ),  # noqa: E241, E202, E501, E221
+    ('SUBSET',                 'subset',             'subset of',              'issubset',        False, 'not issubset',    'not subset of'                ),  # noqa: E241, E202, E501, E221
+    ('NOT_SUBSET',             'subset',             'not subset of',          'not issubset',    True,  'issubset',        'subset of'                    ),  # noqa: E241, E202, E501, E221
+    ('SUPERSET',               'superset',           'superset of',            'issuperset',      False, 'not issuperset',  'not superset of'              ),  # noqa: E241, E202, E501, E221
+    ('NOT_SUPERSET',           'superset',           'not superset of',        'not issuperset',  True,  'issuperset',      'superset of'                  ),  # noqa: E241, E202, E501, E221
+]:
+    register_comparator(*_args)
+
+for _args in [
+    ('RELATIVELY_SIMILAR',     'relatively_similar', 'relatively similar',     '~%',              False, '!~%',             'not relatively similar to'    ),  # noqa: E241, E202, E501, E221
+    ('NOT_RELATIVELY_SIMILAR', 'relatively_similar', 'not relatively similar', '!~%',             True,  '~%',              'relatively similar to'        ),  # noqa: E241, E202, E501, E221
+]:
+    register_comparator(*_args, uses_epsilon=True)
+
+
+# ASYNC-------------------------------------------------------------------------
+async def _resolve(value):
+    # type: (Any) -> Any
+    '''
+    Awaits given value if it is awaitable.
+
+    Args:
+        value (object): Value or awaitable.
+
+    Returns:
+        object: Resolved value.
+    '''
+    if inspect.isawaitable(value):
+        return await value
+    return value
 
-        >>> class EnforceFooBar(Enforce):
-            def get_value(self, item):
-                return item.value
-        >>> EnforceFooBar(Foo(1), '==', Bar(1), 'value')
-        >>> EnforceFooBar(Foo(1), '==', Bar(2), 'value')
-        EnforceError: value of <Foo> is not equal to value of <Bar>. 1 != 2.
-        >>> EnforceFooBar(Foo(1), '~', Bar(5), 'value', epsilon=2)
-        EnforceError: value of <Foo> is not similar to value of <Bar>. Delta 4 \
-is greater than epsilon 2.
 
-        >>> msg = '{a} is not like {b}. Please adjust your epsilon,: {epsilon}, '
-        >>> msg += 'to be higher than {delta}. '
-        >>> msg += 'A value: {a_val}. B value: {b_val}.'
-        >>> EnforceFooBar(Foo(1), '~', Bar(5), 'value', epsilon=2, message=msg)
-        <Foo> is not like <Bar>. Please adjust your epsilon: 2, to be higher \
-than 4. A value: 1. B value: 5.
+class AsyncEnforce(Enforce):
+    '''
+    Awaitable version of Enforce, which supports async get_* attribute getters,
+    such as getters which fetch remote metadata. Sync getters are supported
+    too. The predicate is validated when the instance is awaited. A
+    RuntimeWarning is issued if an instance is garbage collected without
+    being awaited.
+
+    check, all and index are coroutine functions. compile does not support
+    attributes, as compiled rules call getters synchronously.
+
+    For in and not in comparisons, the getter is applied to the items of b
+    concurrently, with at most max_concurrency getters in flight at once.
+    Comparator semantics and error messages are the same as Enforce.
+
+    Example:
+
+        >>> class AsyncEnforceFoo(AsyncEnforce):
+                async def get_size(self, item):
+                    return await fetch_size(item)
+        >>> await AsyncEnforceFoo('a.txt', '==', 'b.txt', 'size')
+        EnforceError: size of a.txt is not equal to size of b.txt. 10 != 12.
+        >>> await AsyncEnforceFoo('a.txt', 'in', ['b.txt', 'c.txt'], 'size')
+        EnforceError: size of a.txt is not in size of ['b.txt', 'c.txt'].
     '''
+    max_concurrency = 10
+
     def __init__(
         self,
         a,
@@ -145,11 +1685,12 @@ def __init__(
         b,
         attribute=None,
         message=None,
-        epsilon=0.01
+        epsilon=0.01,
+        max_concurrency=None,
     ):
-        # type: (Any, str, Any, Optional[str], Optional[str], float) -> None
+        # type: (Any, str, Any, Optional[str], Optional[str], float, Optional[int]) -> None
         '''
-        Validates predicate specified in constructor.
+        Stores predicate to be validated when awaited.
 
         Args:
             a (object): First object to be tested.
@@ -159,232 +1700,796 @@ def __init__(
             message (str, optional): Custom error message. Default: None.
             epsilon (float, optional): Error threshold for a/b difference.
                 Default: 0.01.
+            max_concurrency (int, optional): Maximum number of concurrent
+                getter calls over b items. Default: None, which uses
+                max_concurrency class attribute.
+
+        Raises:
+            EnforceError: If max_concurrency is less than 1.
+
+        Returns:
+            AsyncEnforce: Awaitable AsyncEnforce instance.
+        '''
+        if max_concurrency is not None:
+            if max_concurrency < 1:
+                msg = f'Max concurrency must be greater than 0. {max_concurrency} < 1.'
+                raise EnforceError(msg)
+            self.max_concurrency = max_concurrency
+
+        self._site = None  # type: Any
+        self._skipped = False
+        if _MODE != 'full' or _INSTRUMENT:
+            self._site = _call_site()
+            if _MODE == 'off' or (_MODE == 'sampled' and _skip(self._site)):
+                self._skipped = True
+        self._args = (a, comparator, b, attribute, message, epsilon)
+        self._awaited = False
+
+    def __await__(self):
+        self._awaited = True
+        return self._run().__await__()
+
+    def __del__(self):
+        # instances created by classmethods have no _awaited attribute
+        if not getattr(self, '_awaited', True):
+            msg = f'{self.__class__.__name__} instance was never awaited, so '
+            msg += 'its predicate was not validated.'
+            warnings.warn(msg, RuntimeWarning, stacklevel=2)
+
+    async def _run(self):
+        # type: () -> None
+        '''
+        Validates stored predicate.
 
         Raises:
             EnforceError: If predicate fails.
+        '''
+        if self._skipped:
+            return
+
+        start = time.perf_counter_ns() if _INSTRUMENT else 0
+        rule, error = await self._evaluate(*self._args)
+        if start:
+            _record(self._site, rule.comparator, error is not None, start)
+
+        if error is not None:
+            raise error
+
+    async def _evaluate(self, a, comparator, b, attribute, message, epsilon):
+        # type: (Any, str, Any, Optional[str], Optional[str], float) -> Tuple[EnforceRule, Any]
+        '''
+        Resolves attribute values of a and b and tests predicate without
+        raising.
+
+        Args:
+            a (object): First object to be tested.
+            comparator (str): String representation of Comparator.
+            b (object): Second object.
+            attribute (str or None): Attribute name of a and b.
+            message (str or None): Custom error message.
+            epsilon (float): Error threshold for a/b difference.
 
         Returns:
-            Enforce: Enforce instance.
+            tuple: Rule and error if predicate fails, otherwise None.
         '''
-        # resolve everything
-        comp = Comparator.from_string(comparator)  # type: Comparator
-        func = getattr(self, comp.function)
+        comp = Comparator.from_string(comparator)
         a_val = a
         b_val = b
         if attribute is not None:
-            getter = getattr(self, 'get_' + attribute)
-            a_val = getter(a)
-            if comp in [comp.IN, comp.NOT_IN]:
-                b_val = [getter(x) for x in b]
+            getter = self._get_getter(attribute)
+            if comp in [Comparator.IN, Comparator.NOT_IN]:
+                if isinstance(b, EnforceIndex):
+                    a_val = await _resolve(getter(a))
+                else:
+                    a_val, b_val = await asyncio.gather(
+                        _resolve(getter(a)), self._get_many(getter, b)
+                    )
             else:
-                b_val = getter(b)
-
-        # get delta
-        flag = comp.function == 'similar'
-        delta = None
-        if flag:
-            delta = self.difference(a_val, b_val)
+                a_val, b_val = await asyncio.gather(
+                    _resolve(getter(a)), _resolve(getter(b))
+                )
 
-        # create error message
         if message is None:
             message = self._get_message(attribute, comp)
-        message = message.format(
-            comparator=comp,
-            a=a,
-            b=b,
-            a_val=a_val,
-            b_val=b_val,
-            attribute=attribute,
-            delta=delta,
-            epsilon=epsilon,
-        )
 
-        if flag:
-            a_val = delta
-            b_val = epsilon
+        rule = self._rule_class(
+            self, comparator, b_val, message=message, epsilon=epsilon
+        )
+        rule.b = b
+        rule.attribute = attribute
+        error = rule._validate(a_val)
+        if error is not None:
+            error.fields['a'] = a
+        return rule, error
+
+    def _get_getter(self, attribute):
+        # type: (str) -> Callable[[Any], Any]
+        '''
+        Gets async version of given attribute's getter, which uses the active
+        GetterCache, if any.
 
-        # test a and b with func
-        result = func(a_val, b_val)
-        if comp.negation:
-            result = not result
-        if result is False:
-            raise EnforceError(message)
+        Args:
+            attribute (str): Attribute name.
 
-    def _get_message(self, attribute, comparator):
-        # type: (Optional[str], Comparator) -> str
+        Returns:
+            function: Async attribute getter.
         '''
-        Creates an unformatted error message given an attribute name and
-        comparator.
+        getter = getattr(self, 'get_' + attribute)
+        key = (self.__class__, attribute)
+
+        async def get(item):
+            cache = _GETTER_CACHE.get()
+            if cache is None:
+                return await _resolve(getter(item))
+            value = cache.lookup(item, key)
+            if value is _NOT_CACHED:
+                value = await _resolve(getter(item))
+                cache.store(item, key, value)
+            return value
+        return get
+
+    async def _get_many(self, getter, items):
+        # type: (Callable[[Any], Any], Iterable) -> List[Any]
+        '''
+        Applies given getter to items concurrently, with at most
+        max_concurrency calls in flight. Order of items is preserved.
 
         Args:
-            attribute (str or None): Attribute name.
-            comparator (Comparator): Comparator instance.
+            getter (function): Sync or async attribute getter.
+            items (iterable): Items.
 
         Returns:
-            str: Error message.
+            list: Attribute values.
         '''
-        message = '{a} is {comparator.message} {b}.'
-        if attribute is not None:
-            message = '{attribute} of {a} is {comparator.message} {attribute} of {b}.'
+        semaphore = asyncio.Semaphore(self.max_concurrency)
 
-        skip = [
-            Comparator.IN,
-            Comparator.NOT_IN,
-            Comparator.INSTANCE_OF,
-            Comparator.NOT_INSTANCE_OF,
-        ]
-        if comparator in skip:
-            pass
-        elif comparator is Comparator.SIMILAR:
-            message += ' Delta {delta} is greater than epsilon {epsilon}.'
-        elif comparator is Comparator.NOT_SIMILAR:
-            message += ' Delta {delta} is not greater than epsilon {epsilon}.'
-        else:
-            message += ' {a_val} {comparator.negation_symbol} {b_val}.'
+        async def get(item):
+            async with semaphore:
+                return await _resolve(getter(item))
 
-        return message
+        return list(await asyncio.gather(*[get(x) for x in items]))
 
-    # COMPARATORS---------------------------------------------------------------
-    def eq(self, a, b):
-        # type: (Any, Any) -> bool
+    @classmethod
+    async def check(  # type: ignore
+        cls, a, comparator, b, attribute=None, message=None, epsilon=0.01
+    ):
+        # type: (Any, str, Any, Optional[str], Optional[str], float) -> EnforceResult
         '''
-        Determines if a and b are equal.
+        Tests predicate without raising. Does not honor enforcement mode.
+
+        Example:
+
+            >>> result = await AsyncEnforceFoo.check('a.txt', '==', 'b.txt', 'size')
+            >>> bool(result)
+            False
 
         Args:
-            a (object): First object.
+            a (object): First object to be tested.
+            comparator (str): String representation of Comparator.
             b (object): Second object.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float, optional): Error threshold for a/b difference.
+                Default: 0.01.
 
         Returns:
-            bool: True if a equals b.
+            EnforceResult: Truthy result if predicate passes.
         '''
-        return a == b
+        enforce = cls.__new__(cls)
+        _, error = await enforce._evaluate(
+            a, comparator, b, attribute, message, epsilon
+        )
+        if error is None:
+            return _PASSED
+        return EnforceResult(error)
 
-    def gt(self, a, b):
-        # type: (Any, Any) -> bool
+    @classmethod
+    def compile(cls, comparator, b, attribute=None, message=None, epsilon=0.01):
+        # type: (str, Any, Optional[str], Optional[str], float) -> EnforceRule
         '''
-        Determines if a is greater than b.
+        Compiles a reusable rule without attribute. See Enforce.compile.
+
+        Raises:
+            EnforceError: If attribute is given, as compiled rules call
+                getters synchronously.
+
+        Returns:
+            EnforceRule: Compiled rule.
+        '''
+        if attribute is not None:
+            msg = 'AsyncEnforce cannot compile rules with attributes, as '
+            msg += 'compiled rules call getters synchronously. Use check or '
+            msg += 'all instead.'
+            raise EnforceError(msg)
+        return super().compile(comparator, b, message=message, epsilon=epsilon)
+
+    @classmethod
+    async def index(cls, b, attribute=None):  # type: ignore
+        # type: (Iterable, Optional[str]) -> EnforceIndex
+        '''
+        Builds a reusable membership index of given container. If attribute
+        is given, its getter is applied to the container's items concurrently.
+        See Enforce.index.
+
+        Example:
+
+            >>> index = await AsyncEnforceFoo.index(['b.txt', 'c.txt'], 'size')
+            >>> await AsyncEnforceFoo('a.txt', 'in', index, 'size')
 
         Args:
-            a (object): First object.
-            b (object): Second object.
+            b (iterable): Container object.
+            attribute (str, optional): Attribute name of b items.
+                Default: None.
 
         Returns:
-            bool: True if a is greater than b.
+            EnforceIndex: Membership index.
         '''
-        return a > b
+        if attribute is None:
+            return EnforceIndex(b)
+        enforce = cls.__new__(cls)
+        return EnforceIndex(
+            await enforce._get_many(enforce._get_getter(attribute), b)
+        )
 
-    def gte(self, a, b):
-        # type: (Any, Any) -> bool
+    @classmethod
+    async def all(  # type: ignore
+        cls,
+        items,
+        comparator,
+        b,
+        attribute=None,
+        message=None,
+        epsilon=0.01,
+        max_failures=10,
+    ):
+        # type: (Iterable, str, Any, Optional[str], Optional[str], float, int) -> None
         '''
-        Determines if a is greater than or equal to b.
+        Validates predicate against every item of given iterable. Attribute
+        values of items are resolved concurrently, with at most
+        max_concurrency getters in flight, so items are held in memory.
+        See Enforce.all.
+
+        Example:
+
+            >>> await AsyncEnforceFoo.all(['a.txt', 'b.txt'], '<', 100, 'size')
 
         Args:
-            a (object): First object.
+            items (iterable): Objects to be tested.
+            comparator (str): String representation of Comparator.
             b (object): Second object.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float, optional): Error threshold for a/b difference.
+                Default: 0.01.
+            max_failures (int, optional): Maximum number of failures reported.
+                Default: 10.
 
-        Returns:
-            bool: True if a is greater than or equal to b.
+        Raises:
+            EnforceError: If predicate fails for any item. Error fields
+                include count, total, indices and errors.
         '''
-        return a >= b
+        if _MODE != 'full':
+            if _MODE == 'off' or _skip(_call_site()):
+                return
+
+        start = time.perf_counter_ns()
+        enforce = cls.__new__(cls)
+        comp = Comparator.from_string(comparator)
+        items = list(items)
+        a_vals = items
+        b_val = b
+        if attribute is not None:
+            getter = enforce._get_getter(attribute)
+            if comp in [Comparator.IN, Comparator.NOT_IN]:
+                if not isinstance(b, EnforceIndex):
+                    b_val = await enforce._get_many(getter, b)
+            else:
+                b_val = await getter(b)
+            a_vals = await enforce._get_many(getter, items)
 
-    def lt(self, a, b):
-        # type: (Any, Any) -> bool
+        if message is None:
+            message = enforce._get_message(attribute, comp)
+
+        rule = cls._rule_class(
+            enforce, comparator, b_val, message=message, epsilon=epsilon, index=True
+        )
+        rule.b = b
+        rule.attribute = attribute
+
+        count = 0
+        failures = []  # type: List[Tuple[int, EnforceError]]
+        for i, (item, a_val) in enumerate(zip(items, a_vals)):
+            error = rule._validate(a_val)
+            if error is not None:
+                error.fields['a'] = item
+                count += 1
+                if len(failures) < max_failures:
+                    failures.append((i, error))
+
+        if _INSTRUMENT:
+            _record(_call_site(), rule.comparator, count > 0, start)
+
+        if count > 0:
+            raise cls._get_all_error(count, len(items), failures)
+
+
+# SCHEMA------------------------------------------------------------------------
+class Each:
+    '''
+    Schema marker, which validates every item of a list against a given schema.
+
+    Example:
+
+        >>> Schema({'tags': Each(str)})
+    '''
+    def __init__(self, schema):
+        # type: (Any) -> None
         '''
-        Determines if a is lesser than b.
+        Constructs an Each instance.
 
         Args:
-            a (object): First object.
-            b (object): Second object.
+            schema (object): Schema for each list item.
+        '''
+        self.schema = schema
 
-        Returns:
-            bool: True if a is lesser than b.
+    def __repr__(self):
+        # type: () -> str
+        return f'Each({self.schema!r})'
+
+
+_RULES = 0
+_DICT = 1
+_EACH = 2
+_MISSING = 3
+_MISSING_NODE = (_MISSING, None)
+
+
+class Schema:
+    '''
+    Declarative validator for nested dict/list blobs, such as JSON payloads.
+    A schema is compiled once into a validator tree, which is then walked
+    iteratively for each blob, so there is no recursion limit. Every violation
+    is reported along with its JSON path.
+
+    Schema grammar:
+
+        * type or tuple of types - value must be an instance of it
+        * (comparator, b) or (comparator, b, epsilon) - Enforce predicate
+        * list - every rule in list must pass, in order
+        * dict - value must be a dict with all given keys
+        * Each(schema) - value must be a list whose items match schema
+
+    Example:
+
+        >>> schema = Schema({
+                'id': [int, ('>', 0)],
+                'name': str,
+                'score': [(int, float), ('>=', 0), ('<=', 1)],
+                'user': {'email': str, 'tags': Each(str)},
+            })
+        >>> schema.errors({
+                'id': 0,
+                'name': 'foo',
+                'score': 0.5,
+                'user': {'tags': ['a', 1]},
+            })
+        [('$.id', EnforceError('0 is not greater than 0. 0 <= 0.')),
+         ('$.user.email', EnforceError('email is missing.')),
+         ('$.user.tags[1]', EnforceError("1 is not instance of <class 'str'>."))]
+    '''
+    def __init__(self, schema, enforce=None):
+        # type: (Any, Optional[Any]) -> None
         '''
-        return a < b
+        Compiles given schema.
 
-    def lte(self, a, b):
-        # type: (Any, Any) -> bool
+        Args:
+            schema (object): Schema.
+            enforce (Enforce, optional): Enforce class used to compile rules.
+                Default: Enforce.
+
+        Raises:
+            EnforceError: If schema is not legal.
         '''
-        Determines if a is lesser than or equal to b.
+        self.schema = schema
+        self._enforce = enforce or Enforce
+        self._dict_rule = self._enforce.compile('instance of', dict)
+        self._list_rule = self._enforce.compile('instance of', list)
+        self._tree = self._compile(schema)
+        self._calls = 0
+
+    def _compile(self, schema):
+        # type: (Any) -> List
+        '''
+        Compiles given schema into a validator tree, iteratively.
 
         Args:
-            a (object): First object.
-            b (object): Second object.
+            schema (object): Schema.
+
+        Raises:
+            EnforceError: If schema is not legal.
 
         Returns:
-            bool: True if a is lesser than or equal to b.
+            list: Validator tree.
         '''
-        return a <= b
+        root = [None, None]  # type: List[Any]
+        stack = [(schema, root)]
+        while stack:
+            spec, node = stack.pop()
+            if isinstance(spec, dict):
+                items = []
+                for key, val in spec.items():
+                    child = [None, None]  # type: List[Any]
+                    items.append((key, child))
+                    stack.append((val, child))
+                node[0] = _DICT
+                node[1] = items
+
+            elif isinstance(spec, Each):
+                child = [None, None]
+                stack.append((spec.schema, child))
+                node[0] = _EACH
+                node[1] = child
 
-    def similar(self, difference, epsilon=0.01):
-        # type: (Union[int, float], float) -> bool
+            else:
+                node[0] = _RULES
+                try:
+                    node[1] = self._enforce.compile_rules(spec)
+                except EnforceError as error:
+                    if 'rule' not in error.fields:
+                        raise
+                    msg = 'Illegal schema rule: {rule!r}. Rules must be a type, '
+                    msg += 'tuple of types, (comparator, b) tuple, '
+                    msg += '(comparator, b, epsilon) tuple, list of rules, dict '
+                    msg += 'or Each.'
+                    raise EnforceError(msg, rule=error.fields['rule']) from None
+        return root
+
+    @staticmethod
+    def _to_path(path):
+        # type: (Optional[Tuple]) -> str
         '''
-        Determines if a/b difference given error threshold episilon.
+        Converts a linked (parent, key) path into a JSON path string.
 
         Args:
-            difference (int or float): Difference between a and b.
-            epsilon (float, optional): Error threshold. Default: 0.01.
+            path (tuple or None): Linked path.
 
         Returns:
-            bool: True if difference is less than epsilon.
+            str: JSON path.
         '''
-        return difference < epsilon
+        keys = []
+        while path is not None:
+            path, key = path
+            keys.append(key)
+
+        output = '$'
+        for key in reversed(keys):
+            if isinstance(key, int):
+                output += f'[{key}]'
+            elif isinstance(key, str) and key.isidentifier():
+                output += '.' + key
+            else:
+                output += f'[{key!r}]'
+        return output
 
-    def in_(self, a, b):
-        # type: (Any, Union[List, Set, Tuple]) -> bool
+    def errors(self, blob):
+        # type: (Any) -> List[Tuple[str, EnforceError]]
         '''
-        Determines if a is in b.
+        Validates given blob against schema in one pass and collects every
+        violation. Does not honor enforcement mode.
 
         Args:
-            a (object): Member object.
-            b (list or set or tuple): Container object.
+            blob (object): Blob to be validated.
 
         Returns:
-            bool: True if a is in b.
+            list[tuple[str, EnforceError]]: JSON path and error of each
+                violation.
         '''
-        return a in b
+        errors = []  # type: List[Tuple[Any, EnforceError]]
+        stack = [(self._tree, blob, None)]  # type: List[Tuple[Any, Any, Any]]
+        while stack:
+            node, value, path = stack.pop()
+            kind = node[0]
+
+            if kind == _RULES:
+                for rule in node[1]:
+                    try:
+                        error = rule._validate(value)
+                    except TypeError as e:
+                        error = EnforceError(
+                            '{a} cannot be compared with {b}. {error}',
+                            a=value, b=rule.b, error=e,
+                        )
+                    if error is not None:
+                        errors.append((path, error))
+                        break
+
+            elif kind == _DICT:
+                if not isinstance(value, dict):
+                    # value is known to fail the instance of rule
+                    errors.append((path, self._dict_rule._get_error(value, value, None)))
+                    continue
+                for key, child in reversed(node[1]):
+                    if key in value:
+                        stack.append((child, value[key], (path, key)))
+                    else:
+                        stack.append((_MISSING_NODE, key, (path, key)))
+
+            elif kind == _MISSING:
+                errors.append((path, EnforceError('{key} is missing.', key=value)))
 
-    def instance_of(self, a, b):
-        # type: (Any, Any) -> bool
+            else:
+                if not isinstance(value, list):
+                    errors.append((path, self._list_rule._get_error(value, value, None)))
+                    continue
+                child = node[1]
+                for i in range(len(value) - 1, -1, -1):
+                    stack.append((child, value[i], (path, i)))
+
+        return [(self._to_path(p), e) for p, e in errors]
+
+    def validate(self, blob, max_failures=None):
+        # type: (Any, Optional[int]) -> None
         '''
-        Determines if a is instance of b.
+        Validates given blob against schema. Honors enforcement mode, sampling
+        per schema.
 
         Args:
-            a (type or list[type]): Instance object.
-            b (object): Class object.
+            blob (object): Blob to be validated.
+            max_failures (int, optional): Maximum number of violations
+                reported. Default: None, which reports all of them.
 
-        Returns:
-            bool: True if a is instance of b.
+        Raises:
+            EnforceError: If blob has any violations. Error fields include
+                count, paths and errors.
         '''
-        if not isinstance(b, (tuple, list)):
-            b = [b]
-        if isinstance(b, list):
-            b = tuple(b)
-        return isinstance(a, b)
+        if _MODE != 'full':
+            if _MODE == 'off':
+                return
+            self._calls += 1
+            if (self._calls - 1) % _SAMPLE_RATE != 0:
+                return
+
+        errors = self.errors(blob)
+        if len(errors) == 0:
+            return
+
+        count = len(errors)
+        errors = errors[:max_failures]
+        lines = ''.join([f'\n    {p}: {e}' for p, e in errors])
+        raise EnforceError(
+            '{count} schema violations found.{lines}',
+            count=count,
+            paths=[x[0] for x in errors],
+            errors=[x[1] for x in errors],
+            lines=lines,
+        )
 
-    def difference(self, a, b):
-        # type: (Any, Any) -> float
+
+# RULESET-----------------------------------------------------------------------
+_INLINE = {
+    'eq': '{a} == {b}',
+    'gt': '{a} > {b}',
+    'gte': '{a} >= {b}',
+    'lt': '{a} < {b}',
+    'lte': '{a} <= {b}',
+    'in_': '{a} in {b}',
+    'instance_of': 'isinstance({a}, {b})',
+}
+
+
+class RuleSet:
+    '''
+    Code generated validator for flat dict records, such as request payloads.
+    All rules of a rule set are compiled into a single Python function of
+    straight-line code, with comparisons inlined, so there is no per rule
+    dispatch. Errors are identical to those of an equivalent Schema.
+
+    Comparators are only inlined if the Enforce class does not override their
+    functions. Otherwise, and for registered comparators, the generated code
+    calls the comparator function directly.
+
+    Example:
+
+        >>> rules = RuleSet({
+                'id': [int, ('>', 0)],
+                'name': [str, ('length between', (1, 64))],
+                'score': [(int, float), ('~', 0.5, 0.5)],
+            })
+        >>> rules.errors({'id': 0, 'score': 2})
+        [('$.id', EnforceError('0 is not greater than 0. 0 <= 0.')),
+         ('$.name', EnforceError('name is missing.')),
+         ('$.score', EnforceError('2 is not similar to 0.5. Delta 1.5 is \
+greater than epsilon 0.5.'))]
+        >>> print(rules.source)
+    '''
+    def __init__(self, rules, enforce=None):
+        # type: (Dict[str, Any], Optional[Any]) -> None
         '''
-        Calculates difference between a and b.
+        Generates and compiles validation function for given rules.
 
         Args:
-            a (object): First object.
-            b (object): Second object.
+            rules (dict): Record keys to rule specs. Rule specs follow the
+                leaf grammar of Schema.
+            enforce (Enforce, optional): Enforce class used to compile rules.
+                Default: Enforce.
+
+        Raises:
+            EnforceError: If rules is not a dict.
+            EnforceError: If a rule spec is not legal.
+        '''
+        if not isinstance(rules, dict):
+            msg = f'Rules must be a dict of rule specs. {rules!r} is not a dict.'
+            raise EnforceError(msg)
+
+        self.rules = rules
+        self._enforce = enforce or Enforce
+        self._dict_rule = self._enforce.compile('instance of', dict)
+        self._rules = {k: self._enforce.compile_rules(v) for k, v in rules.items()}
+        self._calls = 0
+        self.source, self._errors = self._generate()
+
+    def _generate(self):
+        # type: () -> Tuple[str, Callable[[Any], List[Tuple[str, EnforceError]]]]
+        '''
+        Generates source code of validation function and compiles it.
 
         Returns:
-            float: Difference between a and b.
+            tuple: Source code and compiled function.
         '''
-        return abs(a - b)
+        namespace = dict(
+            _dict_rule=self._dict_rule,
+            _fallback=self._fallback,
+            EnforceError=EnforceError,
+        )  # type: Dict[str, Any]
+        lines = [
+            'def errors(record):',
+            '    if not isinstance(record, dict):',
+            "        return [('$', _dict_rule._validate(record))]",
+            '    errors = []',
+        ]
+        base = Enforce
+        enforce = self._enforce
+        for i, (key, rules) in enumerate(self._rules.items()):
+            namespace[f'k{i}'] = key
+            namespace[f'p{i}'] = Schema._to_path((None, key))
+            namespace[f'rules{i}'] = rules
+            if len(rules) == 0:
+                lines.extend([
+                    f'    if k{i} not in record:',
+                    f"        errors.append((p{i}, EnforceError('{{key}} is missing.', key=k{i})))",
+                ])
+                continue
+
+            lines.extend([
+                f'    if k{i} in record:',
+                f'        a = record[k{i}]',
+                '        try:',
+            ])
+            for j, rule in enumerate(rules):
+                name = f'{i}_{j}'
+                namespace[f'r{name}'] = rule
+                namespace[f'b{name}'] = rule._b_val
+                namespace[f'e{name}'] = rule.epsilon
+                namespace[f'f{name}'] = rule._function
+
+                func = rule.comparator.function
+                delta = 'None'
+                if rule._similar:
+                    delta = f'd{name}'
+                    if getattr(enforce, 'difference') is base.difference:
+                        diff = f'abs(a - b{name})'
+                    else:
+                        namespace[f'diff{name}'] = rule._enforce.difference
+                        diff = f'diff{name}(a, b{name})'
+                    if getattr(enforce, 'similar') is base.similar:
+                        expr = f'({delta} := {diff}) < e{name}'
+                    else:
+                        expr = f'f{name}({delta} := {diff}, e{name})'
+                elif func in _INLINE and getattr(enforce, func) is getattr(base, func):
+                    expr = _INLINE[func].format(a='a', b=f'b{name}')
+                else:
+                    expr = f'f{name}(a, b{name})'
+
+                # mirror EnforceRule._validate: a negated result fails if the
+                # result is truthy, otherwise it fails if it is False
+                cond = f'({expr})'
+                if not rule.comparator.negation:
+                    cond += ' is False'
+
+                keyword = 'if' if j == 0 else 'elif'
+                lines.extend([
+                    f'            {keyword} {cond}:',
+                    f'                errors.append((p{i}, r{name}._get_error(a, a, {delta})))',
+                ])
+
+            lines.extend([
+                '        except TypeError:',
+                f'            errors.append((p{i}, _fallback(rules{i}, a)))',
+                '    else:',
+                f"        errors.append((p{i}, EnforceError('{{key}} is missing.', key=k{i})))",
+            ])
+        lines.append('    return errors')
+
+        source = '\n'.join(lines) + '\n'
+        code = compile(source, f'<RuleSet {id(self):#x}>', 'exec')
+        exec(code, namespace)
+        return source, namespace['errors']
 
-    # ATTRIBUTE-GETTERS---------------------------------------------------------
-    def get_type_name(self, item):
-        # type: (Any) -> str
+    @staticmethod
+    def _fallback(rules, value):
+        # type: (List[EnforceRule], Any) -> EnforceError
         '''
-        Gets __class__.__name__ of given item.
+        Re-evaluates rules of a value which raised a TypeError, in order to
+        find the first failing rule.
 
         Args:
-            item (object): Item.
+            rules (list[EnforceRule]): Rules.
+            value (object): Value.
 
         Returns:
-            str: item.__class__.__name__
+            EnforceError: Error of first failing rule.
         '''
-        return item.__class__.__name__
+        for rule in rules:
+            try:
+                error = rule._validate(value)
+            except TypeError as e:
+                return EnforceError(
+                    '{a} cannot be compared with {b}. {error}',
+                    a=value, b=rule.b, error=e,
+                )
+            if error is not None:
+                return error
+        raise RuntimeError('TypeError raised by no rule.')  # pragma: no cover
+
+    def errors(self, record):
+        # type: (Any) -> List[Tuple[str, EnforceError]]
+        '''
+        Validates given record against all rules and collects every violation.
+        Only the first violation of each key is reported. Does not honor
+        enforcement mode.
+
+        Args:
+            record (dict): Record to be validated.
+
+        Returns:
+            list[tuple[str, EnforceError]]: JSON path and error of each
+                violation.
+        '''
+        return self._errors(record)
+
+    def validate(self, record, max_failures=None):
+        # type: (Any, Optional[int]) -> None
+        '''
+        Validates given record against all rules. Honors enforcement mode,
+        sampling per rule set.
+
+        Args:
+            record (dict): Record to be validated.
+            max_failures (int, optional): Maximum number of violations
+                reported. Default: None, which reports all of them.
+
+        Raises:
+            EnforceError: If record has any violations. Error fields include
+                count, paths and errors.
+        '''
+        if _MODE != 'full':
+            if _MODE == 'off':
+                return
+            self._calls += 1
+            if (self._calls - 1) % _SAMPLE_RATE != 0:
+                return
+
+        errors = self._errors(record)
+        if len(errors) == 0:
+            return
+
+        count = len(errors)
+        errors = errors[:max_failures]
+        lines = ''.join([f'\n    {p}: {e}' for p, e in errors])
+        raise EnforceError(
+            '{count} schema violations found.{lines}',
+            count=count,
+            paths=[x[0] for x in errors],
+            errors=[x[1] for x in errors],
+            lines=lines,
+        )
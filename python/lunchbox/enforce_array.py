@@ -0,0 +1,741 @@
+from typing import Any, Dict, List, Optional, Tuple, Type, Union  # noqa: F401
+
+import numpy as np
+
+from lunchbox.enforce import (
+    _INDEXABLE, Comparator, Enforce, EnforceError, EnforceIndex, EnforceRule
+)
+# ------------------------------------------------------------------------------
+
+
+'''
+The enforce_array module contains the EnforceArray class, which is used for
+validating NumPy arrays elementwise. Requires numpy.
+'''
+
+
+class EnforceArrayRule(EnforceRule):
+    '''
+    A precompiled EnforceArray predicate, which tests all elements of a given
+    array in a single vectorized call.
+    '''
+    def __init__(
+        self,
+        enforce,
+        comparator,
+        b,
+        attribute=None,
+        message=None,
+        epsilon=0.01,
+        index=False,
+    ):
+        # type: (EnforceArray, str, Any, Optional[str], Optional[str], Any, bool) -> None
+        '''
+        Constructs an EnforceArrayRule instance.
+
+        Args:
+            enforce (EnforceArray): EnforceArray instance supplying comparator
+                functions and attribute getters.
+            comparator (str): String representation of Comparator.
+            b (object): Second object.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float or numpy.ndarray, optional): Error threshold for a/b
+                difference. May be a scalar or a per-element array.
+                Default: 0.01.
+            index (bool, optional): Ignored, membership is tested with
+                numpy.isin, or per element if b is not a list, tuple, set or
+                array. Default: False.
+        '''
+        super().__init__(
+            enforce,
+            comparator,
+            b,
+            attribute=attribute,
+            message=message,
+            epsilon=epsilon,
+        )
+        comp = self.comparator
+        self._elementwise = isinstance(comp, Comparator) \
+            and comp not in [comp.INSTANCE_OF, comp.NOT_INSTANCE_OF]
+        if self._elementwise:
+            b_val = self._b_val
+            if comp in [comp.IN, comp.NOT_IN] \
+                    and not isinstance(b_val, _INDEXABLE + (np.ndarray, EnforceIndex)):
+                # strings, dicts and other containers define their own
+                # membership, which numpy.isin does not honor
+                self._function = self._contains
+            else:
+                if isinstance(b_val, (set, frozenset, EnforceIndex)):
+                    b_val = list(b_val)
+                self._b_val = np.asarray(b_val)  # type: Any
+        self._epsilon = np.asarray(epsilon)
+
+    @staticmethod
+    def _contains(a, b):
+        # type: (np.ndarray, Any) -> np.ndarray
+        '''
+        Determines if elements of a are in container b, one element at a time.
+
+        Args:
+            a (numpy.ndarray): Member array.
+            b (object): Container object, such as a str or dict.
+
+        Returns:
+            numpy.ndarray: True where element of a is in b.
+        '''
+        output = np.fromiter((x in b for x in a.flat), dtype=bool, count=a.size)
+        return output.reshape(a.shape)
+
+    def _validate(self, a):
+        # type: (Any) -> Optional[EnforceError]
+        '''
+        Tests rule predicate against every element of given array without
+        raising.
+
+        Args:
+            a (numpy.ndarray): Array to be tested.
+
+        Returns:
+            EnforceError or None: Error if predicate fails for any element,
+                or if elements cannot be compared with b, otherwise None.
+        '''
+        if not self._elementwise:
+            return super()._validate(a)
+
+        try:
+            result, a_val, delta = self._evaluate(a)
+        except TypeError as e:
+            return EnforceError(
+                '{a} cannot be compared with {b}. {error}',
+                a=a, b=self.b, error=e,
+            )
+        if result.all():
+            return None
+        return self._get_array_error(a, a_val, ~result, delta)
+
+    def _evaluate(self, a):
+        # type: (Any) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]
+        '''
+        Evaluates elementwise rule predicate against given array.
+
+        Args:
+            a (numpy.ndarray): Array to be tested.
+
+        Returns:
+            tuple: Boolean array, True where predicate passes, tested values of
+                a and difference between a and b values, if any.
+        '''
+        a_val = a
+        if self._getter is not None:
+            a_val = self._getter(a)
+        a_val = np.asarray(a_val)
+        delta = None
+        if self._similar:
+            delta = self._enforce.difference(a_val, self._b_val)
+            result = self._function(delta, self._epsilon)
+        else:
+            result = self._function(a_val, self._b_val)
+
+        if self.comparator.negation:
+            result = np.logical_not(result)
+        return np.asarray(result, dtype=bool), a_val, delta
+
+    def _get_array_error(self, a, a_val, mask, delta):
+        # type: (Any, np.ndarray, np.ndarray, Optional[np.ndarray]) -> EnforceError
+        '''
+        Creates an EnforceError which reports the count, first failing indices
+        and first failing values of given failure mask.
+
+        Args:
+            a (object): Tested object.
+            a_val (numpy.ndarray): Tested values of a.
+            mask (numpy.ndarray): Boolean array, True where predicate failed.
+            delta (numpy.ndarray or None): Difference between a and b values.
+
+        Returns:
+            EnforceError: Enforce error.
+        '''
+        mask = np.asarray(mask)
+        flat = np.flatnonzero(mask)
+        count = len(flat)
+        first = flat[:self._enforce.max_failures]
+        index = np.unravel_index(first, mask.shape)
+
+        def values(item):
+            return np.broadcast_to(item, mask.shape)[index].tolist()
+
+        indices = first.tolist()
+        if mask.ndim > 1:
+            indices = list(zip(*[x.tolist() for x in index]))
+
+        b_values = None
+        if self.comparator not in [Comparator.IN, Comparator.NOT_IN]:
+            b_values = values(self._b_val)
+
+        deltas = None
+        epsilons = None
+        if delta is not None:
+            deltas = values(delta)
+            epsilons = values(self._epsilon)
+
+        return EnforceError(
+            self.message,
+            comparator=self.comparator,
+            a=a,
+            b=self.b,
+            attribute=self.attribute,
+            count=count,
+            size=mask.size,
+            indices=indices,
+            a_values=values(a_val),
+            b_values=b_values,
+            deltas=deltas,
+            epsilons=epsilons,
+        )
+# ------------------------------------------------------------------------------
+
+
+class EnforceArray(Enforce):
+    '''
+    Faciltates inline testing of NumPy arrays. Comparators are evaluated
+    elementwise in a single vectorized call. On failure, the failure count and
+    the first failing indices and values are reported, rather than the whole
+    array.
+
+    Example:
+
+        >>> EnforceArray(np.array([1, 2, 3]), '>', 0)
+        >>> EnforceArray(np.array([1, 2, 3, 4]), '<', [2, 2, 2, 5])
+        EnforceError: 2 of 4 elements of a are not less than b. Indices: \
+[1, 2]. A values: [2, 3]. B values: [2, 2].
+
+        >>> EnforceArray(np.array([1.0, 2.0]), '~', [1.1, 2.5], epsilon=[0.2, 0.1])
+        EnforceError: 1 of 2 elements of a are not similar to b. Indices: [1]. \
+Deltas: [0.5]. Epsilons: [0.1].
+    '''
+    _rule_class = EnforceArrayRule
+    max_failures = 10
+
+    def __init__(
+        self,
+        a,
+        comparator,
+        b,
+        attribute=None,
+        message=None,
+        epsilon=0.01,
+        max_failures=10,
+    ):
+        # type: (Any, str, Any, Optional[str], Optional[str], Any, int) -> None
+        '''
+        Validates predicate specified in constructor for every element of a.
+
+        Args:
+            a (numpy.ndarray): Array to be tested.
+            comparator (str): String representation of Comparator.
+            b (object): Second object, a scalar, array or container.
+            attribute (str, optional): Attribute name of a and b. Default: None.
+            message (str, optional): Custom error message. Default: None.
+            epsilon (float or numpy.ndarray, optional): Error threshold for a/b
+                difference. May be a scalar or a per-element array.
+                Default: 0.01.
+            max_failures (int, optional): Maximum number of failing indices and
+                values reported. Default: 10.
+
+        Raises:
+            EnforceError: If predicate fails for any element.
+
+        Returns:
+            EnforceArray: EnforceArray instance.
+        '''
+        self.max_failures = max_failures
+        super().__init__(
+            a, comparator, b, attribute=attribute, message=message, epsilon=epsilon
+        )
+
+    def _get_message(self, attribute, comparator):
+        # type: (Optional[str], Comparator) -> str
+        '''
+        Creates an unformatted error message given an attribute name and
+        comparator.
+
+        Args:
+            attribute (str or None): Attribute name.
+            comparator (Comparator): Comparator instance.
+
+        Returns:
+            str: Error message.
+        '''
+        if not isinstance(comparator, Comparator) or comparator in [
+            Comparator.INSTANCE_OF, Comparator.NOT_INSTANCE_OF
+        ]:
+            return super()._get_message(attribute, comparator)
+
+        message = '{count} of {size} elements of a are {comparator.message} b.'
+        if attribute is not None:
+            message = '{count} of {size} elements of {attribute} of a are '
+            message += '{comparator.message} {attribute} of b.'
+
+        message += ' Indices: {indices}.'
+        if comparator in [Comparator.IN, Comparator.NOT_IN]:
+            message += ' A values: {a_values}.'
+        elif comparator in [Comparator.SIMILAR, Comparator.NOT_SIMILAR]:
+            message += ' Deltas: {deltas}. Epsilons: {epsilons}.'
+        else:
+            message += ' A values: {a_values}. B values: {b_values}.'
+        return message
+
+    # COMPARATORS---------------------------------------------------------------
+    def eq(self, a, b):
+        # type: (Any, Any) -> np.ndarray
+        '''
+        Determines if a and b are equal, elementwise.
+
+        Args:
+            a (numpy.ndarray): First array.
+            b (numpy.ndarray): Second array.
+
+        Returns:
+            numpy.ndarray: True where a equals b.
+        '''
+        return np.equal(a, b)
+
+    def gt(self, a, b):
+        # type: (Any, Any) -> np.ndarray
+        '''
+        Determines if a is greater than b, elementwise.
+
+        Args:
+            a (numpy.ndarray): First array.
+            b (numpy.ndarray): Second array.
+
+        Returns:
+            numpy.ndarray: True where a is greater than b.
+        '''
+        return np.greater(a, b)
+
+    def gte(self, a, b):
+        # type: (Any, Any) -> np.ndarray
+        '''
+        Determines if a is greater than or equal to b, elementwise.
+
+        Args:
+            a (numpy.ndarray): First array.
+            b (numpy.ndarray): Second array.
+
+        Returns:
+            numpy.ndarray: True where a is greater than or equal to b.
+        '''
+        return np.greater_equal(a, b)
+
+    def lt(self, a, b):
+        # type: (Any, Any) -> np.ndarray
+        '''
+        Determines if a is lesser than b, elementwise.
+
+        Args:
+            a (numpy.ndarray): First array.
+            b (numpy.ndarray): Second array.
+
+        Returns:
+            numpy.ndarray: True where a is lesser than b.
+        '''
+        return np.less(a, b)
+
+    def lte(self, a, b):
+        # type: (Any, Any) -> np.ndarray
+        '''
+        Determines if a is lesser than or equal to b, elementwise.
+
+        Args:
+            a (numpy.ndarray): First array.
+            b (numpy.ndarray): Second array.
+
+        Returns:
+            numpy.ndarray: True where a is lesser than or equal to b.
+        '''
+        return np.less_equal(a, b)
+
+    def similar(self, difference, epsilon=0.01):
+        # type: (Any, Any) -> np.ndarray
+        '''
+        Determines if a/b difference given error threshold episilon,
+        elementwise.
+
+        Args:
+            difference (numpy.ndarray): Difference between a and b.
+            epsilon (float or numpy.ndarray, optional): Error threshold.
+                Default: 0.01.
+
+        Returns:
+            numpy.ndarray: True where difference is less than epsilon.
+        '''
+        return np.less(difference, epsilon)
+
+    def in_(self, a, b):
+        # type: (Any, Any) -> np.ndarray
+        '''
+        Determines if elements of a are in b.
+
+        Args:
+            a (numpy.ndarray): Member array.
+            b (list or set or tuple or numpy.ndarray): Container object.
+
+        Returns:
+            numpy.ndarray: True where element of a is in b.
+        '''
+        return np.isin(a, b)
+
+    def difference(self, a, b):
+        # type: (Any, Any) -> np.ndarray
+        '''
+        Calculates absolute difference between a and b, elementwise.
+
+        Args:
+            a (numpy.ndarray): First array.
+            b (numpy.ndarray): Second array.
+
+        Returns:
+            numpy.ndarray: Difference between a and b.
+        '''
+        return np.abs(np.subtract(a, b))
+# ------------------------------------------------------------------------------
+
+
+class ColumnReport:
+    '''
+    Result of a columnar validation. Holds a boolean failure mask per column,
+    which is True where a row fails any rule of that column.
+    '''
+    def __init__(self, masks, rows, max_failures=10):
+        # type: (Dict[str, np.ndarray], int, int) -> None
+        '''
+        Constructs a ColumnReport instance.
+
+        Args:
+            masks (dict): Column names to boolean failure masks.
+            rows (int): Number of rows validated.
+            max_failures (int, optional): Maximum number of failing indices
+                reported per column. Default: 10.
+        '''
+        self.masks = masks
+        self.rows = rows
+        self.max_failures = max_failures
+
+    def __bool__(self):
+        # type: () -> bool
+        return self.passed
+
+    def __repr__(self):
+        # type: () -> str
+        failures = int(self.mask.sum())
+        return f'ColumnReport(rows={self.rows}, failures={failures})'
+
+    @property
+    def passed(self):
+        # type: () -> bool
+        '''
+        bool: Whether every row of every column passed.
+        '''
+        return not any(x.any() for x in self.masks.values())
+
+    @property
+    def mask(self):
+        # type: () -> np.ndarray
+        '''
+        numpy.ndarray: Boolean row mask, True where any column fails.
+        '''
+        mask = np.zeros(self.rows, dtype=bool)
+        for item in self.masks.values():
+            mask |= item
+        return mask
+
+    @property
+    def summary(self):
+        # type: () -> Dict[str, Dict[str, Any]]
+        '''
+        dict: Column names to dicts of rows, failures and first failing
+            indices.
+        '''
+        output = {}
+        for name, mask in self.masks.items():
+            flat = np.flatnonzero(mask)
+            output[name] = dict(
+                rows=self.rows,
+                failures=len(flat),
+                indices=flat[:self.max_failures].tolist(),
+            )
+        return output
+
+    def raise_for_failures(self):
+        # type: () -> None
+        '''
+        Raises an aggregated EnforceError if any row failed.
+
+        Raises:
+            EnforceError: If any row of any column failed.
+        '''
+        if self.passed:
+            return
+
+        summary = self.summary
+        columns = [k for k, v in summary.items() if v['failures'] > 0]
+        lines = ''
+        for name in columns:
+            item = summary[name]
+            lines += f'\n    {name}: {item["failures"]} failures. '
+            lines += f'Indices: {item["indices"]}.'
+        raise EnforceError(
+            '{count} of {rows} rows failed column validation.{lines}',
+            count=int(self.mask.sum()),
+            rows=self.rows,
+            columns=columns,
+            lines=lines,
+        )
+
+
+class ColumnValidator:
+    '''
+    Validates tabular batches column by column. Rules are compiled once per
+    column and evaluated in a single vectorized call per column, where the
+    column's values and the rule's b support it. Otherwise rules fall back to
+    a per-element loop over the column.
+
+    Rules use the same grammar as the leaves of a Schema: a type, a tuple of
+    types, a (comparator, b) or (comparator, b, epsilon) tuple, or a list of
+    those.
+
+    Supported batches:
+
+        * dict of columns - {'id': [1, 2], 'name': ['a', 'b']}
+        * list of records - [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}]
+        * NumPy structured array
+
+    Example:
+
+        >>> validator = ColumnValidator({
+            'id': [int, ('>=', 0)],
+            'name': ('in', ['a', 'b']),
+        })
+        >>> report = validator.validate([
+            dict(id=1, name='a'),
+            dict(id=-2, name='c'),
+        ])
+        >>> report.summary
+        {'id': {'rows': 2, 'failures': 1, 'indices': [1]},
+         'name': {'rows': 2, 'failures': 1, 'indices': [1]}}
+        >>> report.raise_for_failures()
+        EnforceError: 1 of 2 rows failed column validation.
+            id: 1 failures. Indices: [1].
+            name: 1 failures. Indices: [1].
+    '''
+    def __init__(self, rules, enforce=EnforceArray):
+        # type: (Dict[str, Any], Type[EnforceArray]) -> None
+        '''
+        Constructs a ColumnValidator instance.
+
+        Args:
+            rules (dict): Column names to rule specs.
+            enforce (type, optional): EnforceArray class or subclass used to
+                compile vectorized rules. Default: EnforceArray.
+
+        Raises:
+            EnforceError: If rules is not a dict.
+            EnforceError: If a rule spec is not legal.
+        '''
+        if not isinstance(rules, dict):
+            msg = f'Rules must be a dict of column rules. {rules!r} is not a dict.'
+            raise EnforceError(msg)
+
+        self.rules = rules
+        self._rules = {}  # type: Dict[str, List[Tuple[Optional[EnforceArrayRule], EnforceRule]]]
+        for name, spec in rules.items():
+            vector = enforce.compile_rules(spec)
+            scalar = Enforce.compile_rules(spec)
+            self._rules[name] = [
+                (x if self._is_vectorizable(x) else None, y)
+                for x, y in zip(vector, scalar)
+            ]
+
+    def validate(self, data, max_failures=10):
+        # type: (Any, int) -> ColumnReport
+        '''
+        Validates given batch, column by column.
+
+        Args:
+            data (dict, list or numpy.ndarray): Dict of columns, list of
+                records or structured array.
+            max_failures (int, optional): Maximum number of failing indices
+                reported per column. Default: 10.
+
+        Raises:
+            EnforceError: If data is not a supported batch type.
+            EnforceError: If columns are not of equal length.
+
+        Returns:
+            ColumnReport: Per column failure masks and summary.
+        '''
+        columns, rows = self._get_columns(data)
+        masks = {}
+        for name, rules in self._rules.items():
+            values, missing = columns[name]
+            mask = missing.copy()
+            for vector, scalar in rules:
+                mask |= ~self._evaluate(vector, scalar, values)
+            masks[name] = mask
+        return ColumnReport(masks, rows, max_failures=max_failures)
+
+    def _get_columns(self, data):
+        # type: (Any) -> Tuple[Dict[str, Tuple[np.ndarray, np.ndarray]], int]
+        '''
+        Extracts ruled columns from given batch.
+
+        Args:
+            data (dict, list or numpy.ndarray): Batch.
+
+        Raises:
+            EnforceError: If data is not a supported batch type.
+            EnforceError: If columns are not of equal length.
+
+        Returns:
+            tuple: Dict of column names to (values, missing mask) tuples, and
+                number of rows.
+        '''
+        names = list(self._rules.keys())
+        if isinstance(data, np.ndarray) and data.dtype.names is not None:
+            rows = len(data)
+            cols = {k: data[k] for k in names if k in data.dtype.names}
+
+        elif isinstance(data, dict):
+            lengths = {len(v) for v in data.values()}
+            if len(lengths) > 1:
+                msg = f'Columns must be of equal length. Lengths: {sorted(lengths)}.'
+                raise EnforceError(msg)
+            rows = lengths.pop() if len(lengths) > 0 else 0
+            cols = {k: data[k] for k in names if k in data}
+
+        elif isinstance(data, (list, tuple)):
+            rows = len(data)
+            columns = {}
+            for name in names:
+                missing = np.zeros(rows, dtype=bool)
+                values = []
+                for i, row in enumerate(data):
+                    if name in row:
+                        values.append(row[name])
+                    else:
+                        values.append(None)
+                        missing[i] = True
+                columns[name] = (self._to_array(values), missing)
+            return columns, rows
+
+        else:
+            msg = 'Data must be a dict of columns, list of records or '
+            msg += f'structured array. {type(data).__name__} is not supported.'
+            raise EnforceError(msg)
+
+        columns = {}
+        for name in names:
+            if name in cols:
+                columns[name] = (self._to_array(cols[name]), np.zeros(rows, dtype=bool))
+            else:
+                empty = np.full(rows, None, dtype=object)
+                columns[name] = (empty, np.ones(rows, dtype=bool))
+        return columns, rows
+
+    @staticmethod
+    def _to_array(values):
+        # type: (Any) -> np.ndarray
+        '''
+        Converts given column values to a one dimensional array. Only Python
+        values of a single builtin numeric type, which numpy converts without
+        changing their type, become typed arrays. Mixed types, such as ints
+        and floats or bools and ints, as well as strings and nested values,
+        are stored in an object array, so that they are compared as Python
+        objects.
+
+        Args:
+            values (list or numpy.ndarray): Column values.
+
+        Returns:
+            numpy.ndarray: Column array.
+        '''
+        if isinstance(values, np.ndarray) and values.ndim == 1 \
+                and values.dtype.kind not in 'USV':
+            return values
+
+        if not isinstance(values, np.ndarray) and len(values) > 0:
+            types = set(map(type, values))
+            if len(types) == 1 and types.pop() in (bool, int, float, complex):
+                try:
+                    array = np.asarray(values)
+                except (ValueError, OverflowError):
+                    array = None
+                if array is not None and array.ndim == 1 \
+                        and array.dtype != object:
+                    return array
+
+        output = np.empty(len(values), dtype=object)
+        for i, item in enumerate(values):
+            output[i] = item
+        return output
+
+    @staticmethod
+    def _is_vectorizable(rule):
+        # type: (EnforceArrayRule) -> bool
+        '''
+        Determines if given rule can be evaluated against a whole column in a
+        single vectorized call, with the same result as a per element loop.
+        Comparisons with a container b are not, as they would pair each row
+        with one element of b.
+
+        Args:
+            rule (EnforceArrayRule): Vectorized rule.
+
+        Returns:
+            bool: True if rule is vectorizable.
+        '''
+        if not rule._elementwise:
+            return False
+        if rule.comparator in [Comparator.IN, Comparator.NOT_IN]:
+            return isinstance(rule._b_val, np.ndarray)
+        return np.ndim(rule._b_val) == 0 and np.ndim(rule._epsilon) == 0
+
+    @staticmethod
+    def _evaluate(vector, scalar, values):
+        # type: (Optional[EnforceArrayRule], EnforceRule, np.ndarray) -> np.ndarray
+        '''
+        Evaluates a rule against a column.
+
+        Args:
+            vector (EnforceArrayRule or None): Vectorized rule, if rule is
+                vectorizable.
+            scalar (EnforceRule): Per element rule.
+            values (numpy.ndarray): Column values.
+
+        Returns:
+            numpy.ndarray: Boolean array, True where rule passes.
+        '''
+        if vector is not None:
+            try:
+                result = vector._evaluate(values)[0]
+                return np.broadcast_to(result, values.shape)
+            except (TypeError, ValueError):
+                pass
+
+        # non-object arrays convert to a single python type, and are only built
+        # from python values of that type, so type checks only need testing
+        # once
+        if scalar.comparator in [Comparator.INSTANCE_OF, Comparator.NOT_INSTANCE_OF] \
+                and values.dtype != object and len(values) > 0:
+            passed = scalar._validate(values[:1].tolist()[0]) is None
+            return np.full(len(values), passed, dtype=bool)
+
+        output = np.empty(len(values), dtype=bool)
+        for i, item in enumerate(values.tolist()):
+            try:
+                output[i] = scalar._validate(item) is None
+            except (TypeError, ValueError):
+                output[i] = False
+        return output
@@ -0,0 +1,284 @@
+import unittest
+
+import pytest
+
+from lunchbox.enforce import EnforceError
+np = pytest.importorskip('numpy')
+from lunchbox.enforce_array import (  # noqa: E402
+    ColumnReport, ColumnValidator, EnforceArray, EnforceArrayRule
+)
+# ------------------------------------------------------------------------------
+
+
+class EnforceArrayTests(unittest.TestCase):
+    def test_init_eq(self):
+        EnforceArray(np.array([1, 1, 1]), '==', 1)
+        EnforceArray(np.array([1, 2, 3]), '==', [1, 2, 3])
+
+        expected = r'1 of 3 elements of a are not equal to b\. Indices: \[2\]\. '
+        expected += r'A values: \[3\]\. B values: \[1\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(np.array([1, 1, 3]), '==', 1)
+
+    def test_init_not_eq(self):
+        EnforceArray(np.array([1, 2, 3]), '!=', 0)
+
+        expected = r'1 of 3 elements of a are equal to b\. Indices: \[1\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(np.array([1, 2, 3]), '!=', 2)
+
+    def test_init_gt_gte_lt_lte(self):
+        a = np.arange(10)
+        EnforceArray(a, '>', -1)
+        EnforceArray(a, '>=', 0)
+        EnforceArray(a, '<', 10)
+        EnforceArray(a, '<=', 9)
+
+        expected = r'9 of 10 elements of a are not greater than b\. '
+        expected += r'Indices: \[0, 1, 2\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(a, '>', 8, max_failures=3)
+
+        expected = r'1 of 10 elements of a are greater than b\. Indices: \[9\]'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(a, '<=', 8)
+
+    def test_init_max_failures(self):
+        with pytest.raises(EnforceError) as e:
+            EnforceArray(np.zeros(1000000), '>', 0, max_failures=2)
+        result = str(e.value)
+        self.assertIn('1000000 of 1000000', result)
+        self.assertIn('Indices: [0, 1].', result)
+        self.assertLess(len(result), 200)
+
+    def test_init_nd(self):
+        a = np.arange(6).reshape(2, 3)
+        expected = r'Indices: \[\(1, 1\), \(1, 2\)\]\. A values: \[4, 5\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(a, '<', 4)
+
+    def test_init_similar(self):
+        a = np.array([1.0, 2.0, 3.0])
+        EnforceArray(a, '~', [1.05, 2.05, 2.95], epsilon=0.1)
+
+        expected = r'1 of 3 elements of a are not similar to b\. Indices: \[1\]\. '
+        expected += r'Deltas: \[0\.5\]\. Epsilons: \[0\.1\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(a, '~', [1.05, 2.5, 2.95], epsilon=0.1)
+
+        # per element epsilon
+        epsilon = np.array([0.1, 1.0, 0.1])
+        EnforceArray(a, '~', [1.05, 2.5, 2.95], epsilon=epsilon)
+
+        expected = r'Deltas: \[0\.5\]\. Epsilons: \[0\.2\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(a, '~', [1.05, 2.5, 2.95], epsilon=[0.1, 0.2, 0.1])
+
+    def test_init_not_similar(self):
+        a = np.array([1.0, 2.0])
+        EnforceArray(a, '!~', [2.0, 3.0], epsilon=0.5)
+        with self.assertRaises(EnforceError):
+            EnforceArray(a, '!~', [2.0, 2.0], epsilon=0.5)
+
+    def test_init_in(self):
+        a = np.array([1, 2, 3])
+        EnforceArray(a, 'in', [1, 2, 3, 4])
+        EnforceArray(a, 'in', {1, 2, 3})
+        EnforceArray(a, 'not in', np.array([5, 6]))
+
+        expected = r'1 of 3 elements of a are not in b\. Indices: \[2\]\. '
+        expected += r'A values: \[3\]\.$'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(a, 'in', {1, 2})
+
+        expected = r'2 of 3 elements of a are in b\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(a, 'not in', [1, 2])
+
+    def test_init_in_container(self):
+        EnforceArray(np.array([1, 2]), 'in', {1: 'x', 2: 'y'})
+        EnforceArray(np.array(['ab', 'c']), 'in', 'abcd')
+        EnforceArray(np.array(['ab', 'c']), 'not in', 'xyz')
+
+        expected = r'1 of 3 elements of a are not in b\. Indices: \[1\]\. '
+        expected += r"A values: \['zz'\]\.$"
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(np.array(['ab', 'zz', 'c']), 'in', 'abcd')
+
+        expected = r'1 of 2 elements of a are in b\. Indices: \[0\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(np.array([1, 3]), 'not in', {1: 'x'})
+
+    def test_init_type_error(self):
+        expected = r'\[1 2\] cannot be compared with a\. ufunc .equal.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceArray(np.array([1, 2]), '==', 'a')
+
+        with self.assertRaisesRegex(EnforceError, 'cannot be compared with a'):
+            EnforceArray(np.array([1, 2]), '<', 'a')
+
+        result = EnforceArray.check(np.array([1, 2]), '==', 'a')
+        self.assertFalse(result)
+
+    def test_init_instance_of(self):
+        EnforceArray(np.array([1]), 'instance of', np.ndarray)
+        with self.assertRaisesRegex(EnforceError, 'is not instance of'):
+            EnforceArray([1], 'instance of', np.ndarray)
+
+    def test_init_attribute(self):
+        class EnforceRaw(EnforceArray):
+            def get_raw(self, item):
+                return item['raw']
+
+        EnforceRaw(dict(raw=np.arange(3)), '<', dict(raw=3), 'raw')
+
+        expected = r'1 of 3 elements of raw of a are not less than raw of b\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceRaw(dict(raw=np.arange(3)), '<', dict(raw=2), 'raw')
+
+    def test_compile(self):
+        rule = EnforceArray.compile('>=', 0)
+        self.assertIsInstance(rule, EnforceArrayRule)
+        rule(np.arange(10))
+        with self.assertRaises(EnforceError):
+            rule(np.arange(-1, 10))
+
+
+class ColumnValidatorTests(unittest.TestCase):
+    def get_validator(self):
+        return ColumnValidator({
+            'id': [int, ('>=', 0)],
+            'name': ('in', ['a', 'b']),
+            'x': ('~', 1.0, 0.5),
+        })
+
+    def test_init(self):
+        with self.assertRaisesRegex(EnforceError, 'Rules must be a dict'):
+            ColumnValidator([int])
+
+        with self.assertRaisesRegex(EnforceError, 'Illegal rule: 1.'):
+            ColumnValidator(dict(id=1))
+
+    def test_validate_records(self):
+        data = [
+            dict(id=1, name='a', x=1.1),
+            dict(id=-2, name='c', x=1.0),
+            dict(name='b', x=None),
+        ]
+        result = self.get_validator().validate(data)
+        self.assertIsInstance(result, ColumnReport)
+        self.assertFalse(result)
+        self.assertEqual(result.masks['id'].tolist(), [False, True, True])
+        self.assertEqual(result.masks['name'].tolist(), [False, True, False])
+        self.assertEqual(result.masks['x'].tolist(), [False, False, True])
+        self.assertEqual(result.mask.tolist(), [False, True, True])
+
+    def test_validate_columns(self):
+        data = dict(id=np.array([1, 2, -1]), name=['a', 'b', 'a'], x=[1.0, 1.2, 9.0])
+        result = self.get_validator().validate(data)
+        expected = dict(
+            id=dict(rows=3, failures=1, indices=[2]),
+            name=dict(rows=3, failures=0, indices=[]),
+            x=dict(rows=3, failures=1, indices=[2]),
+        )
+        self.assertEqual(result.summary, expected)
+
+        data['x'] = data['x'][:2]
+        with self.assertRaisesRegex(EnforceError, 'Columns must be of equal length'):
+            self.get_validator().validate(data)
+
+    def test_validate_missing_column(self):
+        result = self.get_validator().validate(dict(id=[1, 2], name=['a', 'b']))
+        self.assertEqual(result.masks['x'].tolist(), [True, True])
+
+    def test_validate_structured_array(self):
+        data = np.array(
+            [(1, 'a', 1.0), (-1, 'z', 1.0)],
+            dtype=[('id', int), ('name', 'U1'), ('x', float)],
+        )
+        result = self.get_validator().validate(data)
+        self.assertEqual(result.mask.tolist(), [False, True])
+        self.assertEqual(result.summary['name']['indices'], [1])
+
+    def test_validate_passing(self):
+        data = [dict(id=i, name='a', x=1.0) for i in range(100)]
+        result = self.get_validator().validate(data)
+        self.assertTrue(result)
+        self.assertTrue(result.passed)
+        result.raise_for_failures()
+
+    def test_validate_nested_values(self):
+        validator = ColumnValidator(dict(tags=[list, ('length between', (1, 2))]))
+        result = validator.validate(dict(tags=[[1], [1, 2], [], 'a']))
+        self.assertEqual(result.masks['tags'].tolist(), [False, False, True, True])
+
+    def test_validate_instance_of_typed_array(self):
+        validator = ColumnValidator(dict(id=int))
+        result = validator.validate(dict(id=np.array([1.0, 2.0])))
+        self.assertEqual(result.masks['id'].tolist(), [True, True])
+
+        result = validator.validate(dict(id=np.array([1, 2])))
+        self.assertTrue(result)
+
+    def test_validate_instance_of_mixed_types(self):
+        validator = ColumnValidator({'x': int, 'b': bool, 'f': float})
+        data = [
+            dict(x=1, b=True, f=1.0),
+            dict(x=2.5, b=1, f=1),
+        ]
+        result = validator.validate(data)
+        self.assertEqual(result.masks['x'].tolist(), [False, True])
+        self.assertEqual(result.masks['b'].tolist(), [False, True])
+        self.assertEqual(result.masks['f'].tolist(), [False, True])
+
+        data = dict(x=[1, 2.5], b=[True, 1], f=[1.0, 1])
+        result = validator.validate(data)
+        self.assertEqual(result.masks['x'].tolist(), [False, True])
+        self.assertEqual(result.masks['b'].tolist(), [False, True])
+        self.assertEqual(result.masks['f'].tolist(), [False, True])
+
+        result = validator._to_array([1, 2])
+        self.assertEqual(result.dtype.kind, 'i')
+        result = validator._to_array([1, 2.5])
+        self.assertEqual(result.dtype, object)
+
+    def test_validate_list_operand(self):
+        validator = ColumnValidator({'x': ('==', [1, 2])})
+        result = validator.validate({'x': [1, 2, 3]})
+        self.assertEqual(result.masks['x'].tolist(), [True, True, True])
+
+        result = validator.validate({'x': [1, 2]})
+        self.assertEqual(result.masks['x'].tolist(), [True, True])
+
+        result = validator.validate({'x': [[1, 2], [2, 1]]})
+        self.assertEqual(result.masks['x'].tolist(), [False, True])
+
+        validator = ColumnValidator({'x': ('<', [1, 2])})
+        result = validator.validate({'x': [1, 2, 3]})
+        self.assertEqual(result.masks['x'].tolist(), [True, True, True])
+
+    def test_validate_in_container(self):
+        validator = ColumnValidator({'x': ('in', 'abcd')})
+        result = validator.validate({'x': ['ab', 'zz', 'c']})
+        self.assertEqual(result.masks['x'].tolist(), [False, True, False])
+
+        validator = ColumnValidator({'x': ('not in', {1: 'x'})})
+        result = validator.validate([dict(x=1), dict(x=2), dict(x=[1])])
+        self.assertEqual(result.masks['x'].tolist(), [True, False, True])
+
+    def test_validate_error(self):
+        with self.assertRaisesRegex(EnforceError, 'Data must be a dict of columns'):
+            self.get_validator().validate('foo')
+
+    def test_raise_for_failures(self):
+        data = [dict(id=i, name='a', x=1.0) for i in range(20)]
+        data[3]['id'] = -1
+        data[5]['name'] = 'z'
+        result = self.get_validator().validate(data, max_failures=1)
+
+        expected = r'2 of 20 rows failed column validation\.\n'
+        expected += r'    id: 1 failures\. Indices: \[3\]\.\n'
+        expected += r'    name: 1 failures\. Indices: \[5\]\.$'
+        with self.assertRaisesRegex(EnforceError, expected) as e:
+            result.raise_for_failures()
+        self.assertEqual(e.exception.fields['columns'], ['id', 'name'])
@@ -0,0 +1,580 @@
+from typing import (  # noqa: F401
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+)
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+import json
+import os
+import re
+import sys
+
+from lunchbox.enforce import Comparator, Each, Enforce, EnforceError, Schema
+
+Failure = Tuple[int, List[Tuple[str, str]]]
+# ------------------------------------------------------------------------------
+
+
+'''
+The enforce_parallel module contains validate_jsonl, which validates large
+JSONL datasets against a Schema, sharded across a pool of processes, and
+read_rules, which reads schemas from JSON or YAML rule files.
+'''
+
+
+_SCHEMA = None  # type: Optional[Schema]
+
+
+def _init_worker(schema, enforce):
+    # type: (Any, type) -> None
+    '''
+    Compiles schema once per worker process.
+
+    Args:
+        schema (object): Schema spec.
+        enforce (type): Enforce class used to compile rules.
+    '''
+    global _SCHEMA
+    _SCHEMA = Schema(schema, enforce=enforce)
+
+
+def _validate_lines(lines, max_failures):
+    # type: (Iterable[bytes], int) -> Tuple[int, int, List[Failure]]
+    '''
+    Validates JSONL lines against worker schema. Blank lines are counted but
+    not validated. Invalid JSON and rules which raise are reported as failures
+    of the line.
+
+    Args:
+        lines (iterable): JSONL lines.
+        max_failures (int): Maximum number of failing lines kept.
+
+    Returns:
+        tuple: Number of lines, number of failing lines and list of (line
+            index, [(path, message), ...]) failures.
+    '''
+    errors = _SCHEMA.errors  # type: ignore
+    total = 0
+    count = 0
+    failures = []  # type: List[Failure]
+    for i, line in enumerate(lines):
+        total += 1
+        if not line.strip():
+            continue
+
+        try:
+            blob = json.loads(line)
+        except ValueError as e:
+            items = [('$', f'Invalid JSON. {e}')]
+        else:
+            try:
+                items = [(k, str(v)) for k, v in errors(blob)]
+            except Exception as e:
+                items = [('$', f'Rule raised {type(e).__name__}. {e}')]
+
+        if len(items) > 0:
+            count += 1
+            if len(failures) < max_failures:
+                failures.append((i, items))
+    return total, count, failures
+
+
+def _validate_range(source, start, stop, max_failures):
+    # type: (str, int, int, int) -> Tuple[int, int, List[Failure]]
+    '''
+    Validates the lines of given file which begin within given byte range.
+
+    Args:
+        source (str): JSONL filepath.
+        start (int): Start byte.
+        stop (int): Stop byte.
+        max_failures (int): Maximum number of failing lines kept.
+
+    Returns:
+        tuple: Number of lines, number of failing lines and failures.
+    '''
+    def lines(handle):
+        position = start
+        if start > 0:
+            # skip line begun in previous range
+            handle.seek(start - 1)
+            position += len(handle.readline()) - 1
+
+        while position < stop:
+            line = handle.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+    with open(source, 'rb') as handle:
+        return _validate_lines(lines(handle), max_failures)
+
+
+def _validate_chunk(chunk, max_failures):
+    # type: (List[bytes], int) -> Tuple[int, int, List[Failure]]
+    '''
+    Validates given chunk of JSONL lines.
+
+    Args:
+        chunk (list): JSONL lines.
+        max_failures (int): Maximum number of failing lines kept.
+
+    Returns:
+        tuple: Number of lines, number of failing lines and failures.
+    '''
+    return _validate_lines(chunk, max_failures)
+# ------------------------------------------------------------------------------
+
+
+class ValidationReport:
+    '''
+    Merged result of validate_jsonl. Failures are ordered by line number,
+    regardless of the number of workers.
+    '''
+    def __init__(self, lines=0, count=0, failures=None, max_failures=100):
+        # type: (int, int, Optional[List[Dict[str, Any]]], int) -> None
+        '''
+        Constructs a ValidationReport instance.
+
+        Args:
+            lines (int, optional): Number of lines validated. Default: 0.
+            count (int, optional): Number of failing lines. Default: 0.
+            failures (list[dict], optional): Failing lines, as dicts of line
+                number and list of path and message dicts. Default: None.
+            max_failures (int, optional): Maximum number of failing lines
+                kept. Default: 100.
+        '''
+        self.lines = lines
+        self.count = count
+        self.failures = failures or []
+        self.max_failures = max_failures
+
+    def __bool__(self):
+        # type: () -> bool
+        return self.passed
+
+    def __repr__(self):
+        # type: () -> str
+        return f'ValidationReport(lines={self.lines}, count={self.count})'
+
+    @property
+    def passed(self):
+        # type: () -> bool
+        '''
+        bool: Whether every line passed.
+        '''
+        return self.count == 0
+
+    def _merge(self, offset, result, callback=None):
+        # type: (int, Tuple[int, int, List[Failure]], Optional[Callable]) -> int
+        '''
+        Merges a shard result into report.
+
+        Args:
+            offset (int): Line number of first line of shard.
+            result (tuple): Shard result.
+            callback (function, optional): Function called with each failure.
+                Default: None.
+
+        Returns:
+            int: Line number of first line of next shard.
+        '''
+        lines, count, failures = result
+        self.lines += lines
+        self.count += count
+        for i, items in failures:
+            keep = len(self.failures) < self.max_failures
+            if not keep and callback is None:
+                break
+            errors = [dict(path=k, message=v) for k, v in items]
+            failure = dict(line=offset + i + 1, errors=errors)
+            if callback is not None:
+                callback(failure)
+            if keep:
+                self.failures.append(failure)
+        return offset + lines
+
+    def raise_for_failures(self):
+        # type: () -> None
+        '''
+        Raises an aggregated EnforceError if any line failed.
+
+        Raises:
+            EnforceError: If any line failed.
+        '''
+        if self.passed:
+            return
+
+        lines = ''
+        for item in self.failures:
+            for error in item['errors']:
+                lines += f'\n    line {item["line"]}: {error["path"]} '
+                lines += error['message']
+        raise EnforceError(
+            '{count} of {total} lines failed validation.{lines}',
+            count=self.count,
+            total=self.lines,
+            failures=self.failures,
+            lines=lines,
+        )
+
+
+def _get_ranges(source, chunk_size):
+    # type: (str, int) -> List[Tuple[int, int]]
+    '''
+    Splits given file into byte ranges.
+
+    Args:
+        source (str): Filepath.
+        chunk_size (int): Bytes per range.
+
+    Returns:
+        list[tuple]: (start, stop) byte ranges.
+    '''
+    size = os.path.getsize(source)
+    return [(x, min(x + chunk_size, size)) for x in range(0, size, chunk_size)]
+
+
+def _get_chunks(source, chunk_size):
+    # type: (Iterable, int) -> Iterator[List[bytes]]
+    '''
+    Splits given iterable of lines into chunks.
+
+    Args:
+        source (iterable): Lines.
+        chunk_size (int): Lines per chunk.
+
+    Yields:
+        list: Chunk of lines.
+    '''
+    source = iter(source)
+    while True:
+        chunk = list(islice(source, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def validate_jsonl(
+    source,
+    schema,
+    enforce=Enforce,
+    workers=None,
+    chunk_size=None,
+    max_failures=100,
+    callback=None,
+):
+    # type: (Any, Any, type, Optional[int], Optional[int], int, Any) -> ValidationReport
+    '''
+    Validates every line of given JSONL dataset against given schema. The
+    dataset is sharded into chunks, which are validated in a pool of worker
+    processes. Each worker compiles the schema once. Shard results are merged
+    in input order, so reports are identical for any number of workers.
+
+    If source is a filepath, workers read their own byte range of the file,
+    so the parent process does no parsing. Otherwise source is treated as an
+    iterable of lines, such as sys.stdin.buffer, and is sent to workers in
+    chunks of chunk_size lines.
+
+    Example:
+
+        >>> report = validate_jsonl(
+            '/tmp/users.jsonl',
+            {'id': [int, ('>', 0)], 'email': str},
+            workers=16,
+        )
+        >>> report.raise_for_failures()
+        EnforceError: 2 of 1000000 lines failed validation.
+            line 12: $.id 0 is not greater than 0. 0 <= 0.
+            line 507: $.email email is missing.
+
+    Args:
+        source (str, Path or iterable): JSONL filepath or iterable of lines.
+        schema (object): Schema spec. Schema instances are compiled from
+            their spec and Enforce class.
+        enforce (type, optional): Enforce class used to compile rules.
+            Must be importable by worker processes. Default: Enforce.
+        workers (int, optional): Number of worker processes. If 1, lines are
+            validated in the current process. Default: None, which uses
+            os.cpu_count().
+        chunk_size (int, optional): Bytes per shard for files, or lines per
+            shard for iterables. Default: None, which uses 8 MiB or 10000
+            lines.
+        max_failures (int, optional): Maximum number of failing lines kept.
+            Default: 100.
+        callback (function, optional): Function called with every failure,
+            in line order, such as a JSONL writer. Not limited by
+            max_failures. Default: None.
+
+    Raises:
+        EnforceError: If workers is less than 1.
+        EnforceError: If chunk_size is less than 1.
+        EnforceError: If schema is not legal.
+
+    Returns:
+        ValidationReport: Merged report.
+    '''
+    if isinstance(schema, Schema):
+        enforce = schema._enforce
+        schema = schema.schema
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        msg = f'Workers must be greater than 0. {workers} < 1.'
+        raise EnforceError(msg)
+
+    is_file = isinstance(source, (str, Path))
+    if chunk_size is None:
+        chunk_size = 2**23 if is_file else 10000
+    if chunk_size < 1:
+        msg = f'Chunk size must be greater than 0. {chunk_size} < 1.'
+        raise EnforceError(msg)
+
+    # compile in parent to raise schema errors early
+    _init_worker(schema, enforce)
+
+    shard_failures = max_failures if callback is None else sys.maxsize
+
+    if is_file:
+        source = Path(source).as_posix()
+        shards = _get_ranges(source, chunk_size)  # type: Iterable
+        args = [
+            (source, start, stop, shard_failures) for start, stop in shards
+        ]  # type: Iterable
+        function = _validate_range  # type: Any
+    else:
+        args = ((x, shard_failures) for x in _get_chunks(source, chunk_size))
+        function = _validate_chunk
+
+    report = ValidationReport(max_failures=max_failures)
+    offset = 0
+    if workers == 1:
+        for item in args:
+            offset = report._merge(offset, function(*item), callback)
+        return report
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(schema, enforce),
+    ) as executor:
+        # bound number of chunks in flight, so memory use is constant
+        pending = []  # type: List[Any]
+        for item in args:
+            pending.append(executor.submit(function, *item))
+            if len(pending) >= workers * 2:
+                result = pending.pop(0).result()
+                offset = report._merge(offset, result, callback)
+        for future in pending:
+            offset = report._merge(offset, future.result(), callback)
+    return report
+# ------------------------------------------------------------------------------
+
+
+RULE_TYPES = {
+    'bool': bool,
+    'dict': dict,
+    'float': float,
+    'int': int,
+    'list': list,
+    'null': type(None),
+    'number': (int, float),
+    'str': str,
+}  # type: Dict[str, Any]
+
+
+def _parse_type(name):
+    # type: (Any) -> Any
+    '''
+    Converts given rule type name or list of type names into a type or tuple
+    of types.
+
+    Args:
+        name (str or list[str]): Type name or names.
+
+    Raises:
+        EnforceError: If type name is not in RULE_TYPES.
+
+    Returns:
+        type or tuple: Type or tuple of types.
+    '''
+    if isinstance(name, list):
+        output = []  # type: List[Any]
+        for item in name:
+            item = _parse_type(item)
+            output.extend(item if isinstance(item, tuple) else [item])
+        return tuple(output)
+
+    if name not in RULE_TYPES:
+        msg = f'Illegal rule type: {name!r}. Legal types: {sorted(RULE_TYPES)}.'
+        raise EnforceError(msg)
+    return RULE_TYPES[name]
+
+
+def _parse_rule(rule):
+    # type: (Any) -> Any
+    '''
+    Converts a rule of a rule file into a Schema rule spec.
+
+    Args:
+        rule (str or list): Type name, [comparator, b] list,
+            [comparator, b, epsilon] list or list of those.
+
+    Raises:
+        EnforceError: If rule is not legal.
+        EnforceError: If regular expression of a match rule is not legal.
+
+    Returns:
+        object: Schema rule spec.
+    '''
+    if isinstance(rule, str):
+        return _parse_type(rule)
+
+    if isinstance(rule, list) and len(rule) in [2, 3] \
+            and isinstance(rule[0], str) and rule[0] not in RULE_TYPES:
+        comparator, b = rule[:2]
+        try:
+            comp = Comparator.from_string(comparator)
+        except KeyError:
+            raise EnforceError(f'Illegal comparator: {comparator!r}.')
+        if comp in [Comparator.INSTANCE_OF, Comparator.NOT_INSTANCE_OF]:
+            b = _parse_type(b)
+        elif comp.function == 'match':
+            try:
+                re.compile(b)
+            except (re.error, TypeError) as e:
+                raise EnforceError(f'Illegal regular expression: {b!r}. {e}.')
+        return (comparator, b, *rule[2:])
+
+    if isinstance(rule, list):
+        return [_parse_rule(x) for x in rule]
+
+    msg = f'Illegal rule: {rule!r}. Rules must be a type name, '
+    msg += '[comparator, b] list, [comparator, b, epsilon] list or list of rules.'
+    raise EnforceError(msg)
+
+
+def _split_path(path):
+    # type: (str) -> List[Tuple[str, bool]]
+    '''
+    Splits given field path into keys.
+
+    Args:
+        path (str): Field path, such as $.user.tags[].name.
+
+    Returns:
+        list[tuple[str, bool]]: List of key and whether key is a list, whose
+            items are validated.
+    '''
+    if path.startswith('$.'):
+        path = path[2:]
+    output = []
+    for key in path.split('.'):
+        each = key.endswith('[]')
+        if each:
+            key = key[:-2]
+        output.append((key, each))
+    return output
+
+
+def to_schema(rules):
+    # type: (Dict[str, Any]) -> Dict[str, Any]
+    '''
+    Converts a dict of field paths and rules, as found in rule files, into a
+    Schema spec.
+
+    Field paths are dot separated keys, optionally prefixed with $. Keys
+    suffixed with [] are lists, whose items are validated. Rules are type
+    names, [comparator, b] lists, [comparator, b, epsilon] lists or lists of
+    those. Type names are: bool, dict, float, int, list, null, number and str.
+
+    Example:
+
+        >>> to_schema({
+            'id': ['int', ['>', 0]],
+            'score': ['~', 0.5, 0.5],
+            'user.email': ['matches', '.+@.+'],
+            'user.tags[]': 'str',
+            'kind': ['instance of', ['str', 'null']],
+        })
+        {'id': [<class 'int'>, ('>', 0)],
+         'score': ('~', 0.5, 0.5),
+         'user': {'email': ('matches', '.+@.+'), 'tags': Each(<class 'str'>)},
+         'kind': ('instance of', (<class 'str'>, <class 'NoneType'>))}
+
+    Args:
+        rules (dict): Field paths to rules.
+
+    Raises:
+        EnforceError: If rules is not a dict.
+        EnforceError: If a rule is not legal.
+        EnforceError: If field paths conflict.
+
+    Returns:
+        dict: Schema spec.
+    '''
+    if not isinstance(rules, dict):
+        msg = f'Rules must be a dict of field paths and rules. {rules!r} is not a dict.'
+        raise EnforceError(msg)
+
+    schema = {}  # type: Dict[str, Any]
+    for path, rule in rules.items():
+        keys = _split_path(path)
+        node = schema
+        for key, each in keys[:-1]:
+            child = node.get(key)
+            if child is None:
+                child = {}
+                node[key] = Each(child) if each else child
+            elif each and isinstance(child, Each) and isinstance(child.schema, dict):
+                child = child.schema
+            elif each or not isinstance(child, dict):
+                raise EnforceError(f'Conflicting rule path: {path}.')
+            node = child
+
+        key, each = keys[-1]
+        if key in node:
+            raise EnforceError(f'Conflicting rule path: {path}.')
+        spec = _parse_rule(rule)
+        node[key] = Each(spec) if each else spec
+    return schema
+
+
+def read_rules(filepath):
+    # type: (Union[str, Path]) -> Dict[str, Any]
+    '''
+    Reads given JSON or YAML rule file into a Schema spec. Rule files are
+    mappings of field paths to rules, see to_schema. Reading YAML files
+    requires pyyaml.
+
+    Args:
+        filepath (str or Path): .json, .yaml or .yml filepath.
+
+    Raises:
+        EnforceError: If file extension is not json, yaml or yml.
+        EnforceError: If pyyaml is not installed, for YAML files.
+        EnforceError: If rules are not legal.
+
+    Returns:
+        dict: Schema spec.
+    '''
+    filepath = Path(filepath)
+    ext = filepath.suffix.lower()
+    if ext not in ['.json', '.yaml', '.yml']:
+        msg = f'Rule file extension must be json, yaml or yml. Given file: {filepath}.'
+        raise EnforceError(msg)
+
+    with open(filepath) as f:
+        if ext == '.json':
+            return to_schema(json.load(f))
+
+        try:
+            import yaml
+        except ImportError:
+            msg = 'Reading YAML rule files requires pyyaml. '
+            msg += 'Please install it with: pip install pyyaml'
+            raise EnforceError(msg)
+        return to_schema(yaml.safe_load(f))
@@ -0,0 +1,206 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import json
+import unittest
+
+import pytest
+
+from lunchbox.enforce import Each, EnforceError, Schema
+from lunchbox.enforce_parallel import (
+    ValidationReport, read_rules, to_schema, validate_jsonl
+)
+# ------------------------------------------------------------------------------
+
+
+SCHEMA = {'id': [int, ('>=', 0)], 'name': str}
+
+
+class EnforceParallelTests(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.source = Path(self.tempdir.name, 'data.jsonl')
+        lines = []
+        for i in range(200):
+            item = dict(id=i, name='foo')
+            if i % 50 == 7:
+                item['id'] = -i
+            lines.append(json.dumps(item))
+        lines.append('')
+        lines.append('{bad')
+        with open(self.source, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_validate_jsonl(self):
+        result = validate_jsonl(self.source, SCHEMA, workers=1)
+        self.assertIsInstance(result, ValidationReport)
+        self.assertFalse(result)
+        self.assertEqual(result.lines, 202)
+        self.assertEqual(result.count, 5)
+        self.assertEqual(
+            [x['line'] for x in result.failures], [8, 58, 108, 158, 202]
+        )
+        self.assertEqual(
+            result.failures[0]['errors'],
+            [dict(path='$.id', message='-7 is less than 0. -7 < 0.')]
+        )
+        self.assertEqual(result.failures[-1]['errors'][0]['path'], '$')
+        self.assertRegex(
+            result.failures[-1]['errors'][0]['message'], 'Invalid JSON'
+        )
+
+    def test_validate_jsonl_deterministic(self):
+        expected = validate_jsonl(self.source, SCHEMA, workers=1).failures
+        for workers in [1, 2]:
+            for chunk_size in [1, 13, 100, 10**6]:
+                result = validate_jsonl(
+                    self.source, SCHEMA, workers=workers, chunk_size=chunk_size
+                )
+                self.assertEqual(result.lines, 202)
+                self.assertEqual(result.failures, expected)
+
+    def test_validate_jsonl_iterable(self):
+        expected = validate_jsonl(self.source, SCHEMA, workers=1).failures
+        with open(self.source, 'rb') as f:
+            result = validate_jsonl(f, SCHEMA, workers=2, chunk_size=30)
+        self.assertEqual(result.lines, 202)
+        self.assertEqual(result.failures, expected)
+
+        result = validate_jsonl(['{"id": 1, "name": "a"}'], SCHEMA, workers=1)
+        self.assertTrue(result)
+
+    def test_validate_jsonl_schema(self):
+        result = validate_jsonl(self.source, Schema({'id': int}), workers=1)
+        self.assertEqual(result.count, 1)
+
+    def test_validate_jsonl_max_failures(self):
+        result = validate_jsonl(
+            self.source, SCHEMA, workers=2, chunk_size=100, max_failures=2
+        )
+        self.assertEqual(result.count, 5)
+        self.assertEqual([x['line'] for x in result.failures], [8, 58])
+
+    def test_validate_jsonl_errors(self):
+        expected = r'Workers must be greater than 0\. 0 < 1\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            validate_jsonl(self.source, SCHEMA, workers=0)
+
+        expected = r'Chunk size must be greater than 0\. 0 < 1\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            validate_jsonl(self.source, SCHEMA, chunk_size=0)
+
+        with self.assertRaisesRegex(EnforceError, 'Illegal schema rule'):
+            validate_jsonl(self.source, {'id': 1})
+
+    def test_validate_jsonl_rule_error(self):
+        lines = ['{"name": "a"}', '{bad', '{"name": "b"}']
+        result = validate_jsonl(lines, {'name': ('matches', '[')}, workers=1)
+        self.assertEqual(result.lines, 3)
+        self.assertEqual(result.count, 3)
+        messages = [x['errors'][0]['message'] for x in result.failures]
+        self.assertRegex(messages[0], '^Rule raised error. unterminated')
+        self.assertRegex(messages[1], '^Invalid JSON')
+        self.assertRegex(messages[2], '^Rule raised error')
+
+    def test_validate_jsonl_callback(self):
+        result = []
+        report = validate_jsonl(
+            self.source, SCHEMA, workers=2, chunk_size=100, max_failures=0,
+            callback=result.append,
+        )
+        self.assertEqual(report.failures, [])
+        self.assertEqual(report.count, 5)
+        self.assertEqual([x['line'] for x in result], [8, 58, 108, 158, 202])
+
+    def test_raise_for_failures(self):
+        ValidationReport(lines=10).raise_for_failures()
+
+        result = validate_jsonl(self.source, SCHEMA, workers=1, max_failures=1)
+        expected = r'5 of 202 lines failed validation\.\n'
+        expected += r'    line 8: \$\.id -7 is less than 0\. -7 < 0\.$'
+        with self.assertRaisesRegex(EnforceError, expected):
+            result.raise_for_failures()
+
+
+class RuleFileTests(unittest.TestCase):
+    def test_to_schema(self):
+        result = to_schema({
+            'id': ['int', ['>', 0]],
+            '$.score': ['~', 0.5, 0.5],
+            'user.email': ['matches', '.+@.+'],
+            'user.tags[]': 'str',
+            'items[].name': 'str',
+            'items[].size': [['instance of', ['number', 'null']], ['!=', 0]],
+        })
+        self.assertEqual(result['id'], [int, ('>', 0)])
+        self.assertEqual(result['score'], ('~', 0.5, 0.5))
+        self.assertEqual(result['user']['email'], ('matches', '.+@.+'))
+        self.assertIsInstance(result['user']['tags'], Each)
+        self.assertEqual(result['user']['tags'].schema, str)
+        self.assertEqual(
+            result['items'].schema['size'],
+            [('instance of', (int, float, type(None))), ('!=', 0)]
+        )
+
+        schema = Schema(result)
+        blob = dict(
+            id=1,
+            score=0.5,
+            user=dict(email='a@b', tags=['x']),
+            items=[dict(name='a', size=None)],
+        )
+        self.assertEqual(schema.errors(blob), [])
+
+    def test_to_schema_errors(self):
+        with self.assertRaisesRegex(EnforceError, 'Rules must be a dict'):
+            to_schema([])
+
+        with self.assertRaisesRegex(EnforceError, "Illegal rule type: 'foo'"):
+            to_schema({'id': 'foo'})
+
+        with self.assertRaisesRegex(EnforceError, 'Illegal rule: 1'):
+            to_schema({'id': 1})
+
+        with self.assertRaisesRegex(EnforceError, "Illegal comparator: 'foo'"):
+            to_schema({'id': ['foo', 1]})
+
+        expected = r"Illegal regular expression: '\['\. unterminated character set"
+        with self.assertRaisesRegex(EnforceError, expected):
+            to_schema({'id': ['matches', '[']})
+
+        with self.assertRaisesRegex(EnforceError, 'Illegal regular expression: 1'):
+            to_schema({'id': ['not matches', 1]})
+
+        expected = r'Conflicting rule path: user\.email\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            to_schema({'user': 'dict', 'user.email': 'str'})
+
+        expected = r'Conflicting rule path: user\[\]\.email\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            to_schema({'user.name': 'str', 'user[].email': 'str'})
+
+        with self.assertRaisesRegex(EnforceError, r'Conflicting rule path: \$\.id\.'):
+            to_schema({'id': 'int', '$.id': 'int'})
+
+    def test_read_rules(self):
+        with TemporaryDirectory() as root:
+            filepath = Path(root, 'rules.json')
+            with open(filepath, 'w') as f:
+                json.dump({'id': ['int', ['>', 0]]}, f)
+            self.assertEqual(read_rules(filepath), {'id': [int, ('>', 0)]})
+
+            filepath = Path(root, 'rules.txt')
+            filepath.touch()
+            with self.assertRaisesRegex(EnforceError, 'must be json, yaml or yml'):
+                read_rules(filepath)
+
+    def test_read_rules_yaml(self):
+        pytest.importorskip('yaml')
+        with TemporaryDirectory() as root:
+            filepath = Path(root, 'rules.yaml')
+            with open(filepath, 'w') as f:
+                f.write("id:\n  - int\n  - ['>', 0]\nuser.email: str\n")
+            expected = {'id': [int, ('>', 0)], 'user': {'email': str}}
+            self.assertEqual(read_rules(filepath), expected)
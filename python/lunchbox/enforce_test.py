@@ -1,8 +1,19 @@
+from unittest import mock
+import asyncio
+import gc
+import json
+import operator
+import pickle
+import warnings
 import unittest
 
 import pytest
 
-from lunchbox.enforce import Comparator, Enforce, EnforceError
+from lunchbox.enforce import (
+    AsyncEnforce, Comparator, CustomComparator, Each, Enforce, EnforceError,
+    EnforceIndex, EnforceResult, EnforceRule, GetterCache, RuleSet, Schema
+)
+import lunchbox.enforce as lbe
 # ------------------------------------------------------------------------------
 
 
@@ -50,6 +61,311 @@ def test_from_string(self):
         self.assertEqual(Comparator.from_string('not isinstance'), Comparator.NOT_INSTANCE_OF)
 
 
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        lbe.reset_instrumentation()
+        lbe.enable_instrumentation()
+
+    def tearDown(self):
+        lbe.disable_instrumentation()
+        lbe.reset_instrumentation()
+
+    def test_get_instrumentation_subclass(self):
+        class EnforceFoo(Enforce):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+
+        EnforceFoo(1, '==', 1)
+        EnforceFoo(1, '==', 1)
+        result = lbe.get_instrumentation()
+        self.assertEqual(len(result), 2)
+        for item in result:
+            self.assertRegex(item['site'], r'enforce_test\.py:\d+$')
+        self.assertNotEqual(result[0]['site'], result[1]['site'])
+
+    def test_get_instrumentation(self):
+        rule = Enforce.compile('in', [1, 2])
+        for i in range(10):
+            Enforce(i, 'instance of', int)
+            try:
+                rule(i)
+            except EnforceError:
+                pass
+        with self.assertRaises(EnforceError):
+            Enforce.all(range(3), '<', 1)
+        lbe.disable_instrumentation()
+        Enforce(1, '==', 1)
+
+        result = lbe.get_instrumentation()
+        self.assertEqual(len(result), 3)
+        result = {x['comparator']: x for x in result}
+
+        item = result['instance_of']
+        self.assertEqual(item['calls'], 10)
+        self.assertEqual(item['failures'], 0)
+        self.assertRegex(item['site'], r'enforce_test\.py:\d+$')
+        self.assertGreater(item['total_ns'], 0)
+        self.assertEqual(item['mean_ns'], item['total_ns'] // 10)
+
+        item = result['in']
+        self.assertEqual(item['calls'], 10)
+        self.assertEqual(item['failures'], 8)
+
+        item = result['lt']
+        self.assertEqual(item['calls'], 1)
+        self.assertEqual(item['failures'], 1)
+
+    def test_reset_instrumentation(self):
+        Enforce(1, '==', 1)
+        self.assertEqual(len(lbe.get_instrumentation()), 1)
+        lbe.reset_instrumentation()
+        self.assertEqual(lbe.get_instrumentation(), [])
+
+    def test_dump_instrumentation(self):
+        Enforce(1, '==', 1)
+        Enforce(1, '==', 1)
+
+        result = json.loads(lbe.dump_instrumentation('json'))
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0]['calls'], 1)
+
+        result = lbe.dump_instrumentation('table').split('\n')
+        self.assertEqual(len(result), 3)
+        expected = '^SITE +COMPARATOR +CALLS +FAILURES +TOTAL_NS +MEAN_NS$'
+        self.assertRegex(result[0], expected)
+        self.assertRegex(result[1], r'enforce_test\.py:\d+ +eq +1 +0 +\d+ +\d+$')
+
+        result = lbe.dump_instrumentation('table', max_width=10).split('\n')
+        for line in result:
+            self.assertLessEqual(len(line), 10)
+
+        with self.assertRaisesRegex(EnforceError, 'Format must be json or table.'):
+            lbe.dump_instrumentation('csv')
+
+
+class RegisterComparatorTests(unittest.TestCase):
+    def tearDown(self):
+        for key in ['ends with', 'endswith', 'odd', 'is odd']:
+            lbe._COMPARATOR_LUT.pop(key, None)
+
+    def test_register_comparator(self):
+        result = lbe.register_comparator(
+            'ENDS_WITH', lambda a, b: a.endswith(b), 'ends with', 'endswith',
+            False, 'not endswith', 'not ending with'
+        )
+        self.assertIsInstance(result, CustomComparator)
+        self.assertEqual(result.canonical, 'ends_with')
+        self.assertIs(Comparator.from_string('ends with'), result)
+        self.assertIs(Comparator.from_string('ENDSWITH'), result)
+
+        Enforce('foobar', 'ends with', 'bar')
+        with self.assertRaisesRegex(EnforceError, '^foobar is not ending with foo.$'):
+            Enforce('foobar', 'endswith', 'foo')
+
+        self.assertFalse(Enforce.check('foobar', 'ends with', 'foo'))
+        with self.assertRaises(EnforceError):
+            Enforce.all(['bar', 'foo'], 'ends with', 'bar')
+
+    def test_register_comparator_method(self):
+        class EnforceOdd(Enforce):
+            def odd(self, a, b):
+                return a % 2 == 1
+
+        lbe.register_comparator(
+            'ODD', 'odd', 'odd', 'is odd', False, 'is even', 'not odd'
+        )
+        EnforceOdd(3, 'odd', None)
+        with self.assertRaisesRegex(EnforceError, '2 is not odd None.'):
+            EnforceOdd(2, 'is odd', None)
+
+    def test_register_comparator_error(self):
+        expected = 'Comparator == is already registered.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            lbe.register_comparator(
+                'FOO', 'eq', 'foo', '==', False, '!=', 'not foo'
+            )
+
+    def test_match(self):
+        Enforce('foobar', 'matches', '^foo')
+        Enforce('foobar', '!~=', '^bar')
+        with self.assertRaisesRegex(EnforceError, r'foobar is not matching \^bar\.'):
+            Enforce('foobar', '~=', '^bar')
+        with self.assertRaisesRegex(EnforceError, r'foobar is matching \^foo\.'):
+            Enforce('foobar', 'not matches', '^foo')
+
+    def test_starts_with(self):
+        Enforce('foobar', 'starts with', 'foo')
+        Enforce('foobar', 'not startswith', 'bar')
+        with self.assertRaisesRegex(EnforceError, 'foobar is not starting with bar.'):
+            Enforce('foobar', 'startswith', 'bar')
+
+    def test_length_between(self):
+        Enforce([1, 2], 'length between', (1, 2))
+        Enforce([1, 2, 3], 'not length between', (1, 2))
+        expected = r'\[1, 2, 3\] is not of length between \(1, 2\)\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            Enforce([1, 2, 3], 'len between', (1, 2))
+
+    def test_subset_superset(self):
+        Enforce([1, 2], 'subset of', {1, 2, 3})
+        Enforce([1, 4], 'not subset of', {1, 2, 3})
+        Enforce({1, 2, 3}, 'superset of', [1, 2])
+        Enforce({1, 2, 3}, 'not issuperset', [1, 4])
+        with self.assertRaisesRegex(EnforceError, 'is not subset of'):
+            Enforce([1, 4], 'issubset', {1, 2, 3})
+        with self.assertRaisesRegex(EnforceError, 'is not superset of'):
+            Enforce([1], 'issuperset', {1, 2, 3})
+
+    def test_relatively_similar(self):
+        Enforce(100, 'relatively similar', 101, epsilon=0.01)
+        Enforce(100, '!~%', 110, epsilon=0.01)
+        with self.assertRaisesRegex(EnforceError, '100 is not relatively similar to 110.'):
+            Enforce(100, '~%', 110, epsilon=0.01)
+        Enforce(100, '~%', 110, epsilon=0.1)
+
+        rule = Enforce.compile('~%', 1000, epsilon=0.1)
+        rule(950)
+        with self.assertRaises(EnforceError):
+            rule(800)
+
+
+class EnforceErrorTests(unittest.TestCase):
+    def test_init(self):
+        result = EnforceError('foo {bar}')
+        self.assertEqual(str(result), 'foo {bar}')
+
+    def test_deferred_message(self):
+        class Spy:
+            def __init__(self):
+                self.count = 0
+
+            def __repr__(self):
+                self.count += 1
+                return '<Spy>'
+
+        spy = Spy()
+        error = EnforceError('{a} is bad.', a=spy)
+        self.assertEqual(spy.count, 0)
+        self.assertEqual(str(error), '<Spy> is bad.')
+        self.assertEqual(str(error), '<Spy> is bad.')
+        self.assertEqual(spy.count, 1)
+
+    def test_bad_template(self):
+        error = EnforceError('bad {nope}', a=1)
+        self.assertEqual(str(error), "bad {nope} {'a': 1}")
+
+        with self.assertRaisesRegex(EnforceError, r'^bad \{nope\} '):
+            Enforce(1, '==', 2, message='bad {nope}')
+
+        for template in ['bad {0}', 'bad {a.nope}', 'bad {a:d}']:
+            error = EnforceError(template, a='x')
+            self.assertEqual(str(error), template + " {'a': 'x'}")
+
+    def test_pickle(self):
+        error = EnforceError('{a} is bad.', a=1)
+        result = pickle.loads(pickle.dumps(error))
+        self.assertEqual(str(result), '1 is bad.')
+
+
+class ModeTests(unittest.TestCase):
+    def tearDown(self):
+        lbe.set_mode('full', sample_rate=100)
+
+    def test_set_mode(self):
+        self.assertEqual(lbe.get_mode(), 'full')
+        lbe.set_mode('sampled', sample_rate=10)
+        self.assertEqual(lbe.get_mode(), 'sampled')
+        self.assertEqual(lbe.get_sample_rate(), 10)
+
+        lbe.set_mode('off')
+        self.assertEqual(lbe.get_mode(), 'off')
+        self.assertEqual(lbe.get_sample_rate(), 10)
+
+    def test_set_mode_errors(self):
+        expected = r"Mode must be one of \['full', 'sampled', 'off'\]\. "
+        expected += 'Given value: foo.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            lbe.set_mode('foo')
+
+        expected = 'Sample rate must be an integer greater than 0. '
+        expected += 'Given value: 0.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            lbe.set_mode('sampled', sample_rate=0)
+
+    def test_set_mode_from_env(self):
+        env = dict(LUNCHBOX_ENFORCE_MODE='Sampled', LUNCHBOX_ENFORCE_SAMPLE_RATE='7')
+        with mock.patch.dict('os.environ', env):
+            lbe._set_mode_from_env()
+        self.assertEqual(lbe.get_mode(), 'sampled')
+        self.assertEqual(lbe.get_sample_rate(), 7)
+
+    def test_set_mode_from_env_illegal(self):
+        env = dict(LUNCHBOX_ENFORCE_MODE='bogus', LUNCHBOX_ENFORCE_SAMPLE_RATE='x')
+        with mock.patch.dict('os.environ', env):
+            with warnings.catch_warnings(record=True) as items:
+                warnings.simplefilter('always')
+                lbe._set_mode_from_env()
+        self.assertEqual(lbe.get_mode(), 'full')
+        self.assertEqual(lbe.get_sample_rate(), 100)
+
+        messages = [str(x.message) for x in items]
+        self.assertEqual(len(messages), 2)
+        self.assertRegex(messages[0], 'Given value: bogus. Using full.')
+        self.assertRegex(messages[1], 'Given value: x. Using 100.')
+
+    def test_off(self):
+        lbe.set_mode('off')
+        Enforce(1, '==', 2)
+        Enforce.compile('==', 2)(1)
+        Enforce.all([1, 1], '==', 2)
+
+    def test_sampled(self):
+        lbe.set_mode('sampled', sample_rate=3)
+        failures = 0
+        for _ in range(9):
+            try:
+                Enforce(1, '==', 2)
+            except EnforceError:
+                failures += 1
+        self.assertEqual(failures, 3)
+
+        rule = Enforce.compile('==', 2)
+        failures = 0
+        for _ in range(9):
+            try:
+                rule(1)
+            except EnforceError:
+                failures += 1
+        self.assertEqual(failures, 3)
+
+    def test_sampled_call_sites(self):
+        lbe.set_mode('sampled', sample_rate=100)
+        with self.assertRaises(EnforceError):
+            Enforce(1, '==', 2)
+        with self.assertRaises(EnforceError):
+            Enforce(1, '==', 2)
+
+    def test_sampled_call_sites_subclass(self):
+        class EnforceFoo(Enforce):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+
+        class EnforceBar(EnforceFoo):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+
+        # each call site is sampled on its first call
+        lbe.set_mode('sampled', sample_rate=100)
+        with self.assertRaises(EnforceError):
+            EnforceFoo(1, '==', 2)
+        with self.assertRaises(EnforceError):
+            EnforceFoo(1, '==', 2)
+        with self.assertRaises(EnforceError):
+            EnforceBar(1, '==', 2)
+        with self.assertRaises(EnforceError):
+            EnforceBar(1, '==', 2)
+
+
 class EnforceTests(unittest.TestCase):
     def setUp(self):
         class Foo:
@@ -237,6 +553,289 @@ def test_init_not_instance_of(self):
         with self.assertRaisesRegex(EnforceError, expected):
             Enforce(Taco(), 'not instance of', [Food, float])
 
+    # COMPILE-------------------------------------------------------------------
+    def test_compile(self):
+        Foo = self.Foo
+        Bar = self.Bar
+        EnforceFooBar = self.EnforceFooBar
+
+        rule = EnforceFooBar.compile('==', Bar(1), 'value')
+        self.assertIsInstance(rule, EnforceRule)
+        self.assertIs(rule.comparator, Comparator.EQ)
+        rule(Foo(1))
+        rule(Bar(1))
+
+        expected = 'value of <Foo> is not equal to value of <Bar>. 2 != 1.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            rule(Foo(2))
+
+    def test_compile_no_attribute(self):
+        rule = Enforce.compile('>', 1)
+        for i in range(2, 10):
+            rule(i)
+
+        expected = '0 is not greater than 1. 0 <= 1.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            rule(0)
+
+        rule = Enforce.compile('not instance of', [int, float])
+        rule('foo')
+
+        expected = r'1 is instance of \[.*int.*, .*float.*\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            rule(1)
+
+    def test_compile_builtins(self):
+        rule = Enforce.compile('>=', 1)
+        self.assertIs(rule._function, operator.ge)
+        self.assertTrue(rule._inline)
+
+        rule = Enforce.compile('instance of', int)
+        self.assertIs(rule._function, isinstance)
+        rule(1)
+        with self.assertRaisesRegex(EnforceError, 'is not instance of'):
+            rule('1')
+
+        rule = Enforce.compile('!=', 1)
+        rule(2)
+        with self.assertRaisesRegex(EnforceError, '1 is equal to 1.'):
+            rule(1)
+
+        class EnforceLoose(Enforce):
+            def eq(self, a, b):
+                return str(a) == str(b)
+
+        rule = EnforceLoose.compile('==', 1)
+        self.assertIsNot(rule._function, operator.eq)
+        rule('1')
+        with self.assertRaisesRegex(EnforceError, '2 is not equal to 1.'):
+            rule(2)
+
+    def test_compile_similar(self):
+        Foo = self.Foo
+        Bar = self.Bar
+        EnforceFooBar = self.EnforceFooBar
+
+        rule = EnforceFooBar.compile('~', Bar(2), 'value', epsilon=2)
+        rule(Foo(1))
+
+        expected = 'value of <Foo> is not similar to value of <Bar>. Delta 3 is'
+        expected += ' greater than epsilon 2.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            rule(Foo(5))
+
+    def test_compile_in(self):
+        Foo = self.Foo
+        Bar = self.Bar
+        EnforceFooBar = self.EnforceFooBar
+
+        rule = EnforceFooBar.compile('in', [Bar(1), Bar(2)], 'value')
+        rule(Foo(1))
+        rule(Foo(2))
+
+        expected = r"value of <Foo> is not in value of \[<Bar>, <Bar>\]\."
+        with self.assertRaisesRegex(EnforceError, expected):
+            rule(Foo(3))
+
+        rule = EnforceFooBar.compile('not in', [Bar(1), Bar(2)], 'value')
+        rule(Foo(3))
+        with self.assertRaises(EnforceError):
+            rule(Foo(1))
+
+    def test_compile_message(self):
+        msg = '{a} is bad. Expected {b}.'
+        rule = Enforce.compile('==', 1, message=msg)
+        rule(1)
+        with self.assertRaisesRegex(EnforceError, '2 is bad. Expected 1.'):
+            rule(2)
+
+    # INDEX---------------------------------------------------------------------
+    def test_index(self):
+        Foo = self.Foo
+        Bar = self.Bar
+        EnforceFooBar = self.EnforceFooBar
+
+        index = EnforceFooBar.index([Bar(1), Bar(2), Foo(3)], 'value')
+        self.assertIsInstance(index, EnforceIndex)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(list(index), [1, 2, 3])
+
+        EnforceFooBar(Foo(1), 'in', index, 'value')
+        EnforceFooBar(Foo(4), 'not in', index, 'value')
+
+        expected = r'value of <Foo> is not in value of \[1, 2, 3\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceFooBar(Foo(4), 'in', index, 'value')
+
+        rule = EnforceFooBar.compile('in', index, 'value')
+        rule(Foo(2))
+        with self.assertRaises(EnforceError):
+            rule(Foo(5))
+
+    def test_index_no_attribute(self):
+        index = Enforce.index(range(1000))
+        Enforce(999, 'in', index)
+        Enforce(-1, 'not in', index)
+        with self.assertRaises(EnforceError):
+            Enforce(1000, 'in', index)
+
+    def test_index_unhashable(self):
+        index = EnforceIndex([1, [2], {'a': 3}, 'b'])
+        self.assertIn(1, index)
+        self.assertIn('b', index)
+        self.assertIn([2], index)
+        self.assertIn({'a': 3}, index)
+        self.assertNotIn([3], index)
+        self.assertNotIn({}, index)
+        self.assertNotIn(2, index)
+
+        Enforce([2], 'in', index)
+        with self.assertRaises(EnforceError):
+            Enforce([3], 'in', index)
+
+    def test_index_getter(self):
+        index = EnforceIndex([1, 2], getter=lambda x: x * 10)
+        self.assertIn(10, index)
+        self.assertNotIn(1, index)
+        self.assertEqual(repr(index), '[10, 20]')
+
+    def test_compile_index(self):
+        Foo = self.Foo
+        Bar = self.Bar
+        EnforceFooBar = self.EnforceFooBar
+
+        rule = EnforceFooBar.compile('in', [Bar(1), Bar([2])], 'value')
+        self.assertIsInstance(rule._b_val, EnforceIndex)
+        rule(Foo(1))
+        rule(Foo([2]))
+
+        expected = r'value of <Foo> is not in value of \[<Bar>, <Bar>\]\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            rule(Foo(3))
+
+    def test_compile_index_string(self):
+        Enforce('ab', 'in', 'abcd')
+        self.assertTrue(Enforce.check('ab', 'in', 'abcd'))
+        self.assertFalse(Enforce.check('ac', 'in', 'abcd'))
+
+        rule = Enforce.compile('in', 'abcd')
+        self.assertEqual(rule._b_val, 'abcd')
+        rule('ab')
+        with self.assertRaises(EnforceError):
+            rule('ac')
+
+        Enforce.all(['ab', 'bc'], 'in', 'abcd')
+        Enforce.all([b'ab'], 'in', b'abcd')
+        Enforce.all(['x'], 'not in', 'abcd')
+        with self.assertRaises(EnforceError):
+            Enforce.all(['ab', 'ac'], 'in', 'abcd')
+
+        rule = Enforce.compile('in', {'a': 1})
+        self.assertEqual(rule._b_val, {'a': 1})
+        rule('a')
+
+    def test_check_no_index(self):
+        rule = Enforce.compile('in', [1, 2])
+        self.assertIsInstance(rule._b_val, EnforceIndex)
+        with mock.patch('lunchbox.enforce.EnforceIndex') as index:
+            self.assertTrue(Enforce.check(1, 'in', [1, 2]))
+            index.assert_not_called()
+
+    # CHECK---------------------------------------------------------------------
+    def test_check(self):
+        result = Enforce.check(2, '>', 1)
+        self.assertIsInstance(result, EnforceResult)
+        self.assertTrue(result)
+        self.assertTrue(result.passed)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.message, '')
+
+        result = Enforce.check(1, '>', 1)
+        self.assertFalse(result)
+        self.assertFalse(result.passed)
+        self.assertIsInstance(result.error, EnforceError)
+        self.assertEqual(result.message, '1 is not greater than 1. 1 <= 1.')
+
+        result = [x for x in range(10) if Enforce.check(x, '>', 5)]
+        self.assertEqual(result, [6, 7, 8, 9])
+
+    def test_check_subclass(self):
+        Foo = self.Foo
+        Bar = self.Bar
+        EnforceFooBar = self.EnforceFooBar
+
+        self.assertTrue(EnforceFooBar.check(Foo(1), '==', Bar(1), 'value'))
+        result = EnforceFooBar.check(Foo(1), '==', Bar(2), 'value')
+        self.assertFalse(result)
+        expected = 'value of <Foo> is not equal to value of <Bar>. 1 != 2.'
+        self.assertEqual(result.message, expected)
+
+        result = EnforceFooBar.check(Foo(1), '~', Bar(5), 'value', epsilon=2)
+        self.assertFalse(result)
+
+    def test_check_lazy(self):
+        class Spy:
+            count = 0
+
+            def __repr__(self):
+                Spy.count += 1
+                return '<Spy>'
+
+        result = Enforce.check(Spy(), '==', Spy())
+        self.assertFalse(result)
+        self.assertEqual(Spy.count, 0)
+        self.assertIn('<Spy>', repr(result))
+
+    def test_check_mode(self):
+        try:
+            lbe.set_mode('off')
+            self.assertFalse(Enforce.check(1, '==', 2))
+        finally:
+            lbe.set_mode('full')
+
+    def test_compile_check(self):
+        rule = Enforce.compile('in', [1, 2])
+        self.assertTrue(rule.check(1))
+        self.assertFalse(rule.check(3))
+        self.assertEqual(rule.check(3).message, '3 is not in [1, 2].')
+
+    # ALL-----------------------------------------------------------------------
+    def test_all(self):
+        Enforce.all([1, 2, 3], '>', 0)
+        Enforce.all(iter([]), '>', 0)
+        Enforce.all((x for x in range(1000)), '<', 1000)
+
+        with pytest.raises(EnforceError) as e:
+            Enforce.all([1, 2, -3, 4, -5], '>', 0)
+        expected = '2 of 5 items failed. Failure indices: [2, 4].'
+        expected += '\n    [2] -3 is not greater than 0. -3 <= 0.'
+        expected += '\n    [4] -5 is not greater than 0. -5 <= 0.'
+        self.assertEqual(str(e.value), expected)
+
+    def test_all_fields(self):
+        with pytest.raises(EnforceError) as e:
+            Enforce.all(range(100), '<', 10, max_failures=3)
+        fields = e.value.fields
+        self.assertEqual(fields['count'], 90)
+        self.assertEqual(fields['total'], 100)
+        self.assertEqual(fields['indices'], [10, 11, 12])
+        self.assertEqual(len(fields['errors']), 3)
+        for error in fields['errors']:
+            self.assertIsInstance(error, EnforceError)
+
+    def test_all_attribute(self):
+        Foo = self.Foo
+        Bar = self.Bar
+        EnforceFooBar = self.EnforceFooBar
+
+        items = [Foo(1), Foo(2), Foo(3)]
+        EnforceFooBar.all(items, 'in', [Bar(1), Bar(2), Bar(3)], 'value')
+
+        expected = r'1 of 3 items failed\. Failure indices: \[2\]\.\n    \[2\] '
+        expected += 'value of <Foo> is greater than value of <Bar>. 3 > 2.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            EnforceFooBar.all(items, '<=', Bar(2), 'value')
+
     # MESSAGE-------------------------------------------------------------------
     def test_init_message(self):
         Foo = self.Foo
@@ -258,6 +857,27 @@ def test_init_message(self):
         )
         self.assertEqual(str(e.value), expected)
 
+    def test_init_message_lazy(self):
+        class Spy:
+            def __init__(self):
+                self.count = 0
+
+            def __repr__(self):
+                self.count += 1
+                return '<Spy>'
+
+        a = Spy()
+        b = Spy()
+        Enforce(a, '==', a)
+        Enforce(a, 'in', [b, a])
+        self.assertEqual(a.count, 0)
+        self.assertEqual(b.count, 0)
+
+        with pytest.raises(EnforceError) as e:
+            Enforce(a, '==', b)
+        self.assertEqual(a.count, 0)
+        self.assertEqual(str(e.value), '<Spy> is not equal to <Spy>. <Spy> != <Spy>.')
+
     def test_get_message_no_attribute(self):
         e = Enforce(1, '==', 1)
         result = e._get_message(None, Comparator.EQ)
@@ -367,3 +987,508 @@ def test_get_type_name(self):
         expected = Taco().__class__.__name__
         result = e.get_type_name(Taco())
         self.assertEqual(result, expected)
+
+
+class GetterCacheTests(unittest.TestCase):
+    def setUp(self):
+        class Foo:
+            def __init__(self, value):
+                self.value = value
+
+            def __repr__(self):
+                return '<Foo>'
+
+        class EnforceFoo(Enforce):
+            calls = 0
+
+            def get_value(self, item):
+                EnforceFoo.calls += 1
+                return item.value
+
+        class EnforceBar(EnforceFoo):
+            def get_value(self, item):
+                return item.value * 10
+
+        self.Foo = Foo
+        self.EnforceFoo = EnforceFoo
+        self.EnforceBar = EnforceBar
+
+    def test_enforce(self):
+        Foo = self.Foo
+        Enf = self.EnforceFoo
+        a, b, c = Foo(1), Foo(1), Foo(2)
+        with GetterCache() as cache:
+            Enf(a, '==', b, 'value')
+            Enf(a, '<', c, 'value')
+            Enf(a, 'in', [b, c], 'value')
+            with self.assertRaisesRegex(EnforceError, '1 != 2'):
+                Enf(a, '==', c, 'value')
+        self.assertEqual(Enf.calls, 3)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.hits, 6)
+        self.assertEqual(len(cache), 0)
+
+        # no cache outside of block
+        Enf(a, '==', b, 'value')
+        self.assertEqual(Enf.calls, 5)
+
+    def test_compiled_rule(self):
+        Foo = self.Foo
+        Enf = self.EnforceFoo
+        rule = Enf.compile('==', Foo(1), 'value')
+        index = Enf.index([Foo(1), Foo(2)], 'value')
+        items = [Foo(1) for _ in range(3)]
+        Enf.calls = 0
+        with GetterCache():
+            for _ in range(2):
+                for item in items:
+                    rule(item)
+                    Enf(item, 'in', index, 'value')
+        self.assertEqual(Enf.calls, 3)
+
+    def test_key(self):
+        foo = self.Foo(1)
+        with GetterCache():
+            self.EnforceFoo(foo, '==', self.Foo(1), 'value')
+            self.EnforceBar(foo, '==', self.Foo(1), 'value')
+            self.EnforceFoo(foo, 'instance of', self.Foo)
+
+    def test_eviction(self):
+        Enf = self.EnforceFoo
+        with GetterCache() as cache:
+            foo = self.Foo(1)
+            Enf(foo, '==', self.Foo(1), 'value')
+            self.assertEqual(len(cache), 1)
+            del foo
+            gc.collect()
+            self.assertEqual(len(cache), 0)
+
+            # non weak referenceable objects are pinned
+            Enf(dict(x=1), '==', dict(x=1), 'type_name')
+            self.assertEqual(len(cache._pinned), 2)
+        self.assertEqual(len(cache._pinned), 0)
+
+    def test_nested(self):
+        with GetterCache() as outer:
+            with GetterCache() as inner:
+                self.EnforceFoo(self.Foo(1), '==', self.Foo(1), 'value')
+            self.assertEqual(inner.misses, 2)
+            self.assertEqual(outer.misses, 0)
+            self.EnforceFoo(self.Foo(1), '==', self.Foo(1), 'value')
+        self.assertEqual(outer.misses, 2)
+
+    def test_async_enforce(self):
+        Foo = self.Foo
+
+        class AsyncEnforceFoo(AsyncEnforce):
+            calls = 0
+
+            async def get_value(self, item):
+                AsyncEnforceFoo.calls += 1
+                return item.value
+
+        a, b = Foo(1), Foo(1)
+
+        async def main():
+            with GetterCache():
+                await AsyncEnforceFoo(a, '==', b, 'value')
+                await AsyncEnforceFoo(a, 'in', [b, a], 'value')
+
+        asyncio.run(main())
+        self.assertEqual(AsyncEnforceFoo.calls, 2)
+
+
+class AsyncEnforceTests(unittest.TestCase):
+    def setUp(self):
+        class Foo:
+            def __init__(self, value):
+                self.value = value
+
+            def __repr__(self):
+                return '<Foo>'
+
+        class AsyncEnforceFoo(AsyncEnforce):
+            active = 0
+            peak = 0
+
+            async def get_value(self, item):
+                cls = self.__class__
+                cls.active += 1
+                cls.peak = max(cls.peak, cls.active)
+                await asyncio.sleep(0.001)
+                cls.active -= 1
+                return item.value
+
+            def get_sync_value(self, item):
+                return item.value
+
+        self.Foo = Foo
+        self.AsyncEnforceFoo = AsyncEnforceFoo
+
+    def tearDown(self):
+        lbe.set_mode('full', sample_rate=100)
+
+    def run_(self, item):
+        async def main():
+            return await item
+        return asyncio.run(main())
+
+    def test_await(self):
+        Foo = self.Foo
+        Enf = self.AsyncEnforceFoo
+        self.run_(Enf(Foo(1), '==', Foo(1), 'value'))
+        self.run_(Enf(1, '<', 2))
+        self.run_(Enf(Foo(1), '~', Foo(1.5), 'value', epsilon=1))
+        self.run_(Enf(Foo(1), '==', Foo(1), 'sync_value'))
+
+        expected = r'value of <Foo> is not equal to value of <Foo>\. 1 != 2\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            self.run_(Enf(Foo(1), '==', Foo(2), 'value'))
+
+    def test_await_messages_match_enforce(self):
+        class EnforceFoo(Enforce):
+            def get_value(self, item):
+                return item.value
+
+        Foo = self.Foo
+        for args in [
+            (Foo(1), '==', Foo(2), 'value'),
+            (Foo(1), '~', Foo(5), 'value'),
+            (Foo(1), 'in', [Foo(2), Foo(3)], 'value'),
+            (Foo(1), 'not in', [Foo(1)], 'value'),
+            (Foo(1), 'instance of', int, None),
+            (Foo(1), '==', 1, 'type_name'),
+        ]:
+            with pytest.raises(EnforceError) as expected:
+                EnforceFoo(*args)
+            with pytest.raises(EnforceError) as result:
+                self.run_(self.AsyncEnforceFoo(*args))
+            self.assertEqual(str(result.value), str(expected.value))
+
+    def test_await_in_concurrent(self):
+        Foo = self.Foo
+        Enf = self.AsyncEnforceFoo
+        b = [Foo(i) for i in range(20)]
+        self.run_(Enf(Foo(19), 'in', b, 'value', max_concurrency=4))
+        # getters over b plus getter over a
+        self.assertEqual(Enf.peak, 4 + 1)
+
+        Enf.peak = 0
+        self.run_(Enf(Foo(30), 'not in', b, 'value'))
+        self.assertEqual(Enf.peak, 10 + 1)
+
+        with self.assertRaisesRegex(EnforceError, 'is not in value of'):
+            self.run_(Enf(Foo(30), 'in', b, 'value'))
+
+        index = Enforce.index([1, 2])
+        self.run_(Enf(Foo(1), 'in', index, 'value'))
+
+    def test_max_concurrency(self):
+        expected = r'Max concurrency must be greater than 0\. 0 < 1\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            self.AsyncEnforceFoo(1, '==', 1, max_concurrency=0)
+
+    def test_check(self):
+        Foo = self.Foo
+        Enf = self.AsyncEnforceFoo
+        result = self.run_(Enf.check(Foo(1), '==', Foo(1), 'value'))
+        self.assertTrue(result)
+
+        result = self.run_(Enf.check(Foo(1), '==', Foo(2), 'value'))
+        self.assertFalse(result)
+        self.assertEqual(
+            result.message,
+            'value of <Foo> is not equal to value of <Foo>. 1 != 2.'
+        )
+
+    def test_mode(self):
+        lbe.set_mode('off')
+        self.run_(self.AsyncEnforceFoo(1, '==', 2))
+
+        lbe.set_mode('sampled', sample_rate=2)
+        failures = 0
+        for _ in range(4):
+            try:
+                self.run_(self.AsyncEnforceFoo(1, '==', 2))
+            except EnforceError:
+                failures += 1
+        self.assertEqual(failures, 2)
+
+    def test_not_awaited(self):
+        expected = 'AsyncEnforceFoo instance was never awaited'
+        with self.assertWarnsRegex(RuntimeWarning, expected):
+            self.AsyncEnforceFoo(1, '==', 2)
+            gc.collect()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.run_(self.AsyncEnforceFoo(1, '==', 1))
+            self.run_(self.AsyncEnforceFoo.check(1, '==', 2))
+            gc.collect()
+
+    def test_compile(self):
+        Enf = self.AsyncEnforceFoo
+        rule = Enf.compile('>', 1)
+        rule(2)
+
+        expected = 'AsyncEnforce cannot compile rules with attributes'
+        with self.assertRaisesRegex(EnforceError, expected):
+            Enf.compile('==', self.Foo(1), 'value')
+
+    def test_index(self):
+        Foo = self.Foo
+        Enf = self.AsyncEnforceFoo
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            result = self.run_(Enf.index([Foo('aa'), Foo('bbb')], 'value'))
+        self.assertIsInstance(result, EnforceIndex)
+        self.assertEqual(result.values, ['aa', 'bbb'])
+        self.run_(Enf(Foo('aa'), 'in', result, 'value'))
+
+        result = self.run_(Enf.index([1, 2]))
+        self.assertEqual(result.values, [1, 2])
+
+    def test_all(self):
+        Foo = self.Foo
+        Enf = self.AsyncEnforceFoo
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.run_(Enf.all([Foo(1), Foo(2)], '<', Foo(3), 'value'))
+            self.run_(Enf.all([Foo(1), Foo(2)], 'in', [Foo(1), Foo(2)], 'value'))
+            self.run_(Enf.all(['ab'], 'in', 'abcd'))
+            self.run_(Enf.all([1, 2], '>', 0))
+
+            with pytest.raises(EnforceError) as result:
+                self.run_(Enf.all(
+                    [Foo(1), Foo(5), Foo(2), Foo(6)], '<', Foo(3), 'value',
+                    max_failures=1,
+                ))
+        result = result.value
+        self.assertEqual(result.fields['count'], 2)
+        self.assertEqual(result.fields['total'], 4)
+        self.assertEqual(result.fields['indices'], [1])
+        expected = '2 of 4 items failed. Failure indices: [1].\n'
+        expected += '    [1] value of <Foo> is not less than value of <Foo>. 5 >= 3.'
+        self.assertEqual(str(result), expected)
+
+        lbe.set_mode('off')
+        self.run_(Enf.all([Foo(5)], '<', Foo(3), 'value'))
+
+
+class SchemaTests(unittest.TestCase):
+    def setUp(self):
+        self.schema = Schema({
+            'id': [int, ('>', 0)],
+            'name': str,
+            'score': [(int, float), ('>=', 0), ('<=', 1)],
+            'user': {'email': str, 'tags': Each(str)},
+        })
+        self.blob = {
+            'id': 1,
+            'name': 'foo',
+            'score': 0.5,
+            'user': {'email': 'foo@bar.com', 'tags': ['a', 'b']},
+            'extra': None,
+        }
+
+    def test_errors(self):
+        self.assertEqual(self.schema.errors(self.blob), [])
+
+        blob = self.blob
+        blob['id'] = 0
+        blob['score'] = 'high'
+        blob['user']['tags'] = ['a', 1, 'b', 2]
+        del blob['user']['email']
+
+        result = self.schema.errors(blob)
+        result = [(p, str(e)) for p, e in result]
+        expected = [
+            ('$.id', '0 is not greater than 0. 0 <= 0.'),
+            ('$.score', r"high is not instance of (<class 'int'>, <class 'float'>)."),
+            ('$.user.email', 'email is missing.'),
+            ('$.user.tags[1]', "1 is not instance of <class 'str'>."),
+            ('$.user.tags[3]', "2 is not instance of <class 'str'>."),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_errors_type(self):
+        result = self.schema.errors([])
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0][0], '$')
+
+        blob = self.blob
+        blob['user']['tags'] = 'a'
+        result = self.schema.errors(blob)
+        self.assertEqual(result[0][0], '$.user.tags')
+        self.assertRegex(str(result[0][1]), 'a is not instance of .*list')
+
+    def test_errors_uncomparable(self):
+        schema = Schema({'a b': ('>', 1)})
+        result = schema.errors({'a b': None})
+        self.assertEqual(result[0][0], "$['a b']")
+        self.assertRegex(str(result[0][1]), '^None cannot be compared with 1.')
+
+    def test_errors_similar(self):
+        schema = Schema(Each(('~', 1, 0.5)))
+        self.assertEqual(schema.errors([1, 1.2, 0.8]), [])
+        result = schema.errors([1, 2])
+        self.assertEqual(result[0][0], '$[1]')
+
+    def test_errors_deep(self):
+        blob = 'leaf'  # type: Any
+        spec = str  # type: Any
+        for _ in range(5000):
+            blob = [blob]
+            spec = Each(spec)
+        schema = Schema(spec)
+        self.assertEqual(schema.errors(blob), [])
+
+        result = schema.errors([[[1]]])
+        self.assertEqual(result[0][0], '$[0][0][0]')
+
+    def test_validate(self):
+        self.schema.validate(self.blob)
+
+        blob = self.blob
+        blob['id'] = 0
+        del blob['name']
+        with pytest.raises(EnforceError) as e:
+            self.schema.validate(blob)
+        expected = '2 schema violations found.'
+        expected += '\n    $.id: 0 is not greater than 0. 0 <= 0.'
+        expected += '\n    $.name: name is missing.'
+        self.assertEqual(str(e.value), expected)
+        self.assertEqual(e.value.fields['paths'], ['$.id', '$.name'])
+
+        with pytest.raises(EnforceError) as e:
+            self.schema.validate(blob, max_failures=1)
+        self.assertEqual(e.value.fields['count'], 2)
+        self.assertEqual(e.value.fields['paths'], ['$.id'])
+
+    def test_validate_mode(self):
+        try:
+            lbe.set_mode('off')
+            self.schema.validate(None)
+        finally:
+            lbe.set_mode('full')
+
+    def test_illegal(self):
+        expected = r'^Illegal schema rule: 0\. .*list of rules, dict or Each\.$'
+        with self.assertRaisesRegex(EnforceError, expected):
+            Schema({'foo': 0})
+
+        expected = r'^Illegal rule: 0\. .*\(comparator, b, epsilon\) tuple or '
+        expected += r'list of those\.$'
+        with self.assertRaisesRegex(EnforceError, expected):
+            Enforce.compile_rules([int, 0])
+
+        with self.assertRaisesRegex(EnforceError, r"^Illegal rule: \{'a': 1\}\."):
+            Enforce.compile_rules({'a': 1})
+
+
+class RuleSetTests(unittest.TestCase):
+    def setUp(self):
+        self.rules = {
+            'id': [int, ('>', 0)],
+            'name': [str, ('length between', (1, 8)), ('!=', 'admin')],
+            'score': [(int, float), ('~', 0.5, 0.5)],
+            'kind': ('in', ['a', 'b']),
+            'code': ('not in', {1, 2}),
+            'tag': ('matches', '^t'),
+            'size': [('>=', 0), ('<=', 10), ('!~', 5, 0.1)],
+            'any': [],
+        }
+
+    def assert_same_errors(self, rules, record):
+        expected = Schema(rules).errors(record)
+        result = RuleSet(rules).errors(record)
+        self.assertEqual(
+            [(p, str(e)) for p, e in result],
+            [(p, str(e)) for p, e in expected],
+        )
+        for (_, a), (_, b) in zip(result, expected):
+            self.assertEqual(
+                {k: repr(v) for k, v in a.fields.items()},
+                {k: repr(v) for k, v in b.fields.items()},
+            )
+
+    def test_init(self):
+        result = RuleSet(self.rules)
+        self.assertIn('def errors(record):', result.source)
+        self.assertIn('isinstance(a, b0_0)', result.source)
+        self.assertIn('a > b0_1', result.source)
+
+        with self.assertRaisesRegex(EnforceError, 'Rules must be a dict'):
+            RuleSet([int])
+
+        with self.assertRaisesRegex(EnforceError, 'Illegal rule: 0.'):
+            RuleSet({'foo': 0})
+
+    def test_init_overridden_comparator(self):
+        class EnforceLoose(Enforce):
+            def eq(self, a, b):
+                return str(a) == str(b)
+
+        rules = RuleSet({'id': ('==', 1)}, enforce=EnforceLoose)
+        self.assertNotIn('a == b0_0', rules.source)
+        self.assertEqual(rules.errors({'id': '1'}), [])
+        self.assertEqual(len(rules.errors({'id': 2})), 1)
+
+    def test_errors(self):
+        record = dict(
+            id=1, name='foo', score=0.6, kind='a', code=3, tag='tx', size=1,
+            any=None,
+        )
+        self.assertEqual(RuleSet(self.rules).errors(record), [])
+        self.assert_same_errors(self.rules, record)
+
+        for key, value in [
+            ('id', 0),
+            ('id', '1'),
+            ('name', ''),
+            ('name', 'admin'),
+            ('name', 1),
+            ('score', 2),
+            ('score', 'foo'),
+            ('kind', 'c'),
+            ('code', 1),
+            ('tag', 'x'),
+            ('size', 11),
+            ('size', 5),
+            ('size', 'foo'),
+            ('size', None),
+        ]:
+            item = dict(record)
+            item[key] = value
+            self.assert_same_errors(self.rules, item)
+
+    def test_errors_missing(self):
+        self.assert_same_errors(self.rules, {})
+        self.assert_same_errors(self.rules, {'id': 1})
+
+    def test_errors_not_dict(self):
+        self.assert_same_errors(self.rules, None)
+        self.assert_same_errors(self.rules, [1])
+
+    def test_errors_type_error(self):
+        result = RuleSet(self.rules).errors(dict(size='foo'))
+        self.assertEqual(result[6][0], '$.size')
+        self.assertRegex(str(result[6][1]), 'foo cannot be compared with 0')
+
+    def test_validate(self):
+        rules = RuleSet(self.rules)
+        with pytest.raises(EnforceError) as e:
+            rules.validate({'id': 0}, max_failures=2)
+        expected = '8 schema violations found.'
+        expected += '\n    $.id: 0 is not greater than 0. 0 <= 0.'
+        expected += '\n    $.name: name is missing.'
+        self.assertEqual(str(e.value), expected)
+        self.assertEqual(e.value.fields['count'], 8)
+        self.assertEqual(e.value.fields['paths'], ['$.id', '$.name'])
+
+    def test_validate_mode(self):
+        try:
+            lbe.set_mode('off')
+            RuleSet(self.rules).validate(None)
+        finally:
+            lbe.set_mode('full')
@@ -1,35 +1,148 @@
-from typing import Optional  # noqa: F401
+from typing import Callable, Dict, Optional  # noqa: F401
 
+from array import array
 import datetime
+import math
+import time
+
 import humanfriendly
+
+from lunchbox.enforce import Enforce, EnforceError
+import lunchbox.timers as lbtm
 # ------------------------------------------------------------------------------
 
 
+# wall - monotonic, high resolution elapsed time
+# system - system time, which jumps with clock adjustments
+# process - CPU time of current process, excluding sleep
+# thread - CPU time of current thread, excluding sleep
+CLOCKS = {
+    'wall': time.perf_counter_ns,
+    'system': time.time_ns,
+    'process': time.process_time_ns,
+    'thread': time.thread_time_ns,
+}  # type: Dict[str, Callable[[], int]]
+
+
 class StopWatch():
     '''
-    StopWatch is used for timing blocks of code.
+    StopWatch is used for timing blocks of code. Times are stored as integer
+    nanoseconds. Timedeltas and human readable strings are only created when
+    requested.
+
+    Laps and splits are stored in arrays of 64 bit integers, so a million
+    laps take about 8MB.
+
+    Named StopWatches are recorded as scopes of the active CallTree, if any,
+    from start to stop.
+
+    Example:
+
+        >>> stopwatch = StopWatch()
+        >>> stopwatch.start()
+        >>> for item in items:
+                process(item)
+                stopwatch.lap()
+        >>> stopwatch.stop()
+        >>> stopwatch.lap_stats
+        {'count': 1000, 'min': 1021, 'max': 20511, 'mean': 1450.2, 'p50': 1203,
+         'p95': 2914, 'p99': 10022}
     '''
-    def __init__(self):
-        # type: () -> None
-        self._delta = None  # type: Optional[datetime.timedelta]
-        self._start_time = None  # type: Optional[datetime.datetime]
-        self._stop_time = None  # type: Optional[datetime.datetime]
+    def __init__(self, clock='wall', name=None):
+        # type: (str, Optional[str]) -> None
+        '''
+        Constructs a StopWatch instance.
+
+        Args:
+            clock (str, optional): Clock to time with. Options: wall, system,
+                process, thread. Default: wall.
+            name (str, optional): Scope name in active CallTree.
+                Default: None.
+
+        Raises:
+            EnforceError: If clock is not legal.
+        '''
+        Enforce(clock, 'in', list(CLOCKS))
+        self.clock = clock
+        self.name = name
+        self._scope = None  # type: Optional[lbtm.CallNode]
+        self._clock = CLOCKS[clock]
+        self._start_ns = None  # type: Optional[int]
+        self._stop_ns = None  # type: Optional[int]
+        self._lap_ns = None  # type: Optional[int]
+        self.laps = array('q')
+        self.splits = array('q')
 
     def start(self):
         # type: () -> None
         '''
-        Call this method directly before the code you wish to time.
+        Call this method directly before the code you wish to time. Clears
+        laps and splits.
+        '''
+        self._stop_ns = None
+        self.laps = array('q')
+        self.splits = array('q')
+        if self.name is not None:
+            # a restart abandons the previous, unstopped scope
+            lbtm.exit_scope(self._scope, None)
+            self._scope = lbtm.enter_scope(self.name)
+        self._start_ns = self._lap_ns = self._clock()
+
+    def lap(self):
+        # type: () -> int
+        '''
+        Records time since previous lap, or start, without stopping.
+
+        Raises:
+            EnforceError: If StopWatch has not been started.
+
+        Returns:
+            int: Lap time in nanoseconds.
+        '''
+        now = self._clock()
+        if self._lap_ns is None:
+            raise EnforceError('StopWatch has not been started.')
+        delta = now - self._lap_ns
+        self._lap_ns = now
+        self.laps.append(delta)
+        return delta
+
+    def split(self):
+        # type: () -> int
+        '''
+        Records time since start, without stopping.
+
+        Raises:
+            EnforceError: If StopWatch has not been started.
+
+        Returns:
+            int: Split time in nanoseconds.
         '''
-        self._stop_time = None
-        self._start_time = datetime.datetime.now()
+        now = self._clock()
+        if self._start_ns is None:
+            raise EnforceError('StopWatch has not been started.')
+        delta = now - self._start_ns
+        self.splits.append(delta)
+        return delta
 
     def stop(self):
         # type: () -> None
         '''
         Call this method directly after the code you wish to time.
         '''
-        if self._start_time is not None:
-            self._stop_time = datetime.datetime.now()
+        if self._start_ns is not None:
+            self._stop_ns = self._clock()
+            if self._scope is not None:
+                lbtm.exit_scope(self._scope, self._stop_ns - self._start_ns)
+                self._scope = None
+
+    @property
+    def delta_ns(self):
+        # type: () -> int
+        '''
+        Time delta of stop - start in nanoseconds.
+        '''
+        return self._stop_ns - self._start_ns  # type: ignore
 
     @property
     def delta(self):
@@ -37,7 +150,7 @@ def delta(self):
         '''
         Time delta of stop - start.
         '''
-        return self._stop_time - self._start_time  # type: ignore
+        return datetime.timedelta(microseconds=self.delta_ns / 1000)
 
     @property
     def human_readable_delta(self):
@@ -45,4 +158,56 @@ def human_readable_delta(self):
         '''
         Time delta in human readable format.
         '''
-        return humanfriendly.format_timespan(self.delta.total_seconds())
+        return humanfriendly.format_timespan(self.delta_ns / 1e9)
+
+    @property
+    def lap_stats(self):
+        # type: () -> Dict[str, float]
+        '''
+        Summary statistics of laps in nanoseconds: count, min, max, mean, p50,
+        p95 and p99. Percentiles use the nearest rank method.
+        '''
+        return get_stats(self.laps)
+
+    @property
+    def split_stats(self):
+        # type: () -> Dict[str, float]
+        '''
+        Summary statistics of splits in nanoseconds: count, min, max, mean,
+        p50, p95 and p99. Percentiles use the nearest rank method.
+        '''
+        return get_stats(self.splits)
+
+
+def get_stats(values):
+    # type: (array) -> Dict[str, float]
+    '''
+    Computes summary statistics of given array of nanoseconds.
+
+    Args:
+        values (array): Array of integers.
+
+    Raises:
+        EnforceError: If values is empty.
+
+    Returns:
+        dict: Count, min, max, mean, p50, p95 and p99.
+    '''
+    count = len(values)
+    if count == 0:
+        raise EnforceError('No values to compute statistics of.')
+
+    items = array('q', sorted(values))
+
+    def percentile(p):
+        return items[max(math.ceil(p / 100 * count) - 1, 0)]
+
+    return dict(
+        count=count,
+        min=items[0],
+        max=items[-1],
+        mean=sum(items) / count,
+        p50=percentile(50),
+        p95=percentile(95),
+        p99=percentile(99),
+    )
@@ -1,7 +1,11 @@
+from array import array
+import datetime
 import time
 import unittest
 
+from lunchbox.enforce import EnforceError
 from lunchbox.stopwatch import StopWatch
+from lunchbox.timers import CallTree
 # ------------------------------------------------------------------------------
 
 
@@ -21,3 +25,131 @@ def test_stopwatch(self):
 
         self.assertAlmostEqual(stopwatch.delta.microseconds, 20000, delta=10000)
         self.assertEqual(stopwatch.human_readable_delta, '0.02 seconds')
+
+    def test_init(self):
+        self.assertEqual(StopWatch().clock, 'wall')
+        self.assertEqual(StopWatch(clock='system').clock, 'system')
+
+        expected = r"foo is not in \['wall', 'system', 'process', 'thread'\]\."
+        with self.assertRaisesRegex(EnforceError, expected):
+            StopWatch(clock='foo')
+
+    def test_name(self):
+        with CallTree() as tree:
+            stopwatch = StopWatch(name='foo')
+            stopwatch.start()
+            stopwatch.start()
+            inner = StopWatch(name='bar')
+            inner.start()
+            inner.stop()
+            stopwatch.stop()
+
+        root = tree.root
+        self.assertEqual(list(root.children), ['foo'])
+        foo = root.children['foo']
+        self.assertEqual(foo.count, 1)
+        self.assertEqual(foo.total_ns, stopwatch.delta_ns)
+        self.assertEqual(list(foo.children), ['bar'])
+        self.assertEqual(foo.children['bar'].total_ns, inner.delta_ns)
+
+    def test_delta_ns(self):
+        stopwatch = StopWatch()
+        stopwatch.start()
+        stopwatch.stop()
+        result = stopwatch.delta_ns
+        self.assertIsInstance(result, int)
+        self.assertGreaterEqual(result, 0)
+        self.assertLess(result, 10**6)
+
+        stopwatch.start()
+        time.sleep(0.01)
+        stopwatch.stop()
+        self.assertAlmostEqual(stopwatch.delta_ns, 10**7, delta=10**7)
+        self.assertEqual(
+            stopwatch.delta,
+            datetime.timedelta(microseconds=stopwatch.delta_ns / 1000)
+        )
+
+    def test_clock_system(self):
+        stopwatch = StopWatch(clock='system')
+        stopwatch.start()
+        time.sleep(0.01)
+        stopwatch.stop()
+        self.assertAlmostEqual(stopwatch.delta.microseconds, 10000, delta=10000)
+        self.assertEqual(stopwatch.human_readable_delta, '0.01 seconds')
+
+    def test_stop_before_start(self):
+        stopwatch = StopWatch()
+        stopwatch.stop()
+        with self.assertRaises(TypeError):
+            stopwatch.delta_ns
+
+    def test_lap(self):
+        stopwatch = StopWatch()
+        with self.assertRaisesRegex(EnforceError, 'StopWatch has not been started'):
+            stopwatch.lap()
+
+        stopwatch.start()
+        for _ in range(3):
+            time.sleep(0.001)
+            result = stopwatch.lap()
+            self.assertIsInstance(result, int)
+            self.assertGreaterEqual(result, 10**6)
+        stopwatch.stop()
+
+        self.assertIsInstance(stopwatch.laps, array)
+        self.assertEqual(stopwatch.laps.typecode, 'q')
+        self.assertEqual(len(stopwatch.laps), 3)
+        self.assertLessEqual(sum(stopwatch.laps), stopwatch.delta_ns)
+
+        # start clears laps
+        stopwatch.start()
+        self.assertEqual(len(stopwatch.laps), 0)
+
+    def test_split(self):
+        stopwatch = StopWatch()
+        with self.assertRaisesRegex(EnforceError, 'StopWatch has not been started'):
+            stopwatch.split()
+
+        stopwatch.start()
+        for _ in range(3):
+            time.sleep(0.001)
+            stopwatch.split()
+        stopwatch.stop()
+
+        splits = stopwatch.splits.tolist()
+        self.assertEqual(splits, sorted(splits))
+        self.assertLessEqual(splits[-1], stopwatch.delta_ns)
+
+    def test_lap_stats(self):
+        stopwatch = StopWatch()
+        stopwatch.laps.extend(range(100, 0, -1))
+        result = stopwatch.lap_stats
+        expected = dict(
+            count=100, min=1, max=100, mean=50.5, p50=50, p95=95, p99=99
+        )
+        self.assertEqual(result, expected)
+
+        stopwatch.splits.append(7)
+        result = stopwatch.split_stats
+        expected = dict(count=1, min=7, max=7, mean=7, p50=7, p95=7, p99=7)
+        self.assertEqual(result, expected)
+
+        stopwatch.start()
+        with self.assertRaisesRegex(EnforceError, 'No values'):
+            stopwatch.lap_stats
+
+    def test_clock_cpu(self):
+        for clock in ['process', 'thread']:
+            stopwatch = StopWatch(clock=clock)
+            stopwatch.start()
+            time.sleep(0.02)
+            stopwatch.stop()
+            self.assertLess(stopwatch.delta_ns, 10**7)
+
+            stopwatch.start()
+            start = time.perf_counter()
+            while time.perf_counter() - start < 0.02:
+                pass
+            stopwatch.stop()
+            self.assertGreater(stopwatch.delta_ns, 10**7)
@@ -0,0 +1,855 @@
+from typing import Any, Dict, Iterator, List, Optional, Union  # noqa: F401
+
+from array import array
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+import json
+import math
+import os
+import threading
+import time
+
+from lunchbox.enforce import Enforce, EnforceError
+# ------------------------------------------------------------------------------
+
+
+# TIMER-REGISTRY----------------------------------------------------------------
+# quantiles reported by snapshots, as p50, p90, p95, p99 and p999
+QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+
+
+class Histogram:
+    '''
+    Fixed memory histogram of non-negative integers, such as durations in
+    nanoseconds, with HDR-style logarithmic buckets. Each power of 2 range is
+    split into 2 ** precision linear sub-buckets, so quantile estimates have a
+    relative error of at most 1 / 2 ** precision. Values below 2 ** precision
+    are counted exactly.
+
+    Count, sum, min and max are exact. Updates are thread-safe.
+
+    Example:
+
+        >>> hist = Histogram()
+        >>> for value in [100, 200, 300, 10000]:
+                hist.record(value)
+        >>> hist.quantile(0.5)
+        201
+        >>> hist.snapshot()
+        {'count': 4, 'sum': 10600, 'min': 100, 'max': 10000, 'mean': 2650.0,
+         'p50': 201, 'p90': 10000, 'p95': 10000, 'p99': 10000, 'p999': 10000}
+    '''
+    def __init__(self, precision=5):
+        # type: (int) -> None
+        '''
+        Constructs a Histogram instance.
+
+        Args:
+            precision (int, optional): Number of sub-bucket bits per power of
+                2. Memory use is (64 - precision) * 2 ** precision * 8 bytes.
+                Default: 5, which uses 15KB and has a relative error of 3.1%.
+
+        Raises:
+            EnforceError: If precision is not an integer between 1 and 10.
+        '''
+        Enforce(precision, 'instance of', int)
+        Enforce(precision, '>=', 1)
+        Enforce(precision, '<=', 10)
+        # ----------------------------------------------------------------------
+
+        self.precision = precision
+        self._size = 1 << precision
+        self._counts = array('q', bytes(8 * (64 - precision) * self._size))
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0
+        self.min = None  # type: Optional[int]
+        self.max = None  # type: Optional[int]
+
+    def _get_index(self, value):
+        # type: (int) -> int
+        '''
+        Gets bucket index of given value.
+
+        Args:
+            value (int): Value.
+
+        Returns:
+            int: Bucket index.
+        '''
+        if value < self._size:
+            return value
+        shift = value.bit_length() - self.precision - 1
+        return ((shift + 1) << self.precision) + (value >> shift) - self._size
+
+    def _get_bounds(self, index):
+        # type: (int) -> tuple
+        '''
+        Gets lowest and highest values of given bucket.
+
+        Args:
+            index (int): Bucket index.
+
+        Returns:
+            tuple[int]: Lower and upper bound, inclusive.
+        '''
+        if index < self._size:
+            return index, index
+        shift = (index >> self.precision) - 1
+        mantissa = (index & (self._size - 1)) + self._size
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        # type: (int) -> None
+        '''
+        Records given value.
+
+        Args:
+            value (int): Non-negative integer less than 2 ** 63.
+        '''
+        if value < 0:
+            value = 0
+        index = self._get_index(value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        # type: (float) -> Optional[int]
+        '''
+        Estimates given quantile as the midpoint of the bucket containing its
+        nearest rank, clamped to min and max.
+
+        Args:
+            q (float): Quantile between 0 and 1.
+
+        Raises:
+            EnforceError: If q is not between 0 and 1.
+
+        Returns:
+            int or None: Quantile estimate, or None if histogram is empty.
+        '''
+        if not 0 <= q <= 1:
+            raise EnforceError(f'Quantile must be between 0 and 1. {q} is not.')
+        with self._lock:
+            return self._quantiles([q])[0]
+
+    def _quantiles(self, quantiles):
+        # type: (Any) -> List[Optional[int]]
+        '''
+        Estimates given ascending quantiles in a single pass over buckets.
+        Not thread-safe, callers must hold lock.
+
+        Args:
+            quantiles (list[float]): Ascending quantiles between 0 and 1.
+
+        Returns:
+            list[int or None]: Quantile estimates.
+        '''
+        if self.count == 0:
+            return [None] * len(quantiles)
+
+        output = []  # type: List[Optional[int]]
+        targets = [max(math.ceil(q * self.count), 1) for q in quantiles]
+        total = 0
+        i = 0
+        for index, count in enumerate(self._counts):
+            if count == 0:
+                continue
+            total += count
+            while i < len(targets) and total >= targets[i]:
+                lower, upper = self._get_bounds(index)
+                value = (lower + upper) // 2
+                output.append(min(max(value, self.min), self.max))
+                i += 1
+            if i == len(targets):
+                break
+        return output
+
+    def snapshot(self, reset=False):
+        # type: (bool) -> Dict[str, Any]
+        '''
+        Gets count, sum, min, max, mean and quantile estimates.
+
+        Args:
+            reset (bool, optional): Reset histogram after snapshot.
+                Default: False.
+
+        Returns:
+            dict: Statistics. Quantile keys are p50, p90, p95, p99 and p999.
+        '''
+        with self._lock:
+            output = dict(
+                count=self.count,
+                sum=self.sum,
+                min=self.min,
+                max=self.max,
+                mean=self.sum / self.count if self.count else None,
+            )  # type: Dict[str, Any]
+            values = self._quantiles(QUANTILES)
+            for q, value in zip(QUANTILES, values):
+                output['p' + str(q)[2:].ljust(2, '0')] = value
+            if reset:
+                self._reset()
+        return output
+
+    def reset(self):
+        # type: () -> None
+        '''
+        Clears all recorded values.
+        '''
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        # type: () -> None
+        '''
+        Clears all recorded values. Not thread-safe, callers must hold lock.
+        '''
+        self._counts = array('q', bytes(8 * len(self._counts)))
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+
+class TimerScope:
+    '''
+    Context manager which records the duration of its block into a Histogram.
+    Used by TimerRegistry.time, as it is cheaper than a generator based
+    context manager.
+    '''
+    __slots__ = ('_histogram', '_start_ns')
+
+    def __init__(self, histogram):
+        # type: (Histogram) -> None
+        '''
+        Constructs a TimerScope instance.
+
+        Args:
+            histogram (Histogram): Histogram to record duration into.
+        '''
+        self._histogram = histogram
+        self._start_ns = 0
+
+    def __enter__(self):
+        # type: () -> TimerScope
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        # type: (Any) -> None
+        self._histogram.record(time.perf_counter_ns() - self._start_ns)
+
+
+class TimerRegistry:
+    '''
+    Registry of named timers. Each timer feeds a fixed memory Histogram of
+    durations in nanoseconds, with count, sum, min, max and quantile
+    estimates. Timers are created on first use. Updates are thread-safe.
+
+    Example:
+
+        >>> timers = TimerRegistry()
+        >>> for query in queries:
+                with timers.time('db.query'):
+                    run(query)
+        >>> timers.snapshot(reset=True)
+        {'db.query': {'count': 50000, 'sum': 910201223, 'min': 10114,
+         'max': 201993, 'mean': 18204.0, 'p50': 16832, 'p90': 24960, ...}}
+    '''
+    def __init__(self, precision=5):
+        # type: (int) -> None
+        '''
+        Constructs a TimerRegistry instance.
+
+        Args:
+            precision (int, optional): Histogram precision. Default: 5.
+        '''
+        self.precision = precision
+        self._timers = {}  # type: Dict[str, Histogram]
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        # type: (str) -> bool
+        return name in self._timers
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._timers)
+
+    def get(self, name):
+        # type: (str) -> Histogram
+        '''
+        Gets histogram of given timer, creating it if need be.
+
+        Args:
+            name (str): Timer name.
+
+        Returns:
+            Histogram: Histogram of timer.
+        '''
+        timer = self._timers.get(name)
+        if timer is None:
+            with self._lock:
+                timer = self._timers.get(name)
+                if timer is None:
+                    timer = self._timers[name] = Histogram(self.precision)
+        return timer
+
+    def record(self, name, duration_ns):
+        # type: (str, int) -> None
+        '''
+        Records a duration for given timer.
+
+        Args:
+            name (str): Timer name.
+            duration_ns (int): Duration in nanoseconds.
+        '''
+        self.get(name).record(duration_ns)
+
+    def time(self, name):
+        # type: (str) -> TimerScope
+        '''
+        Context manager, which records the wall time of its block, with
+        time.perf_counter_ns, for given timer. Durations are recorded even if
+        the block raises.
+
+        Args:
+            name (str): Timer name.
+
+        Returns:
+            TimerScope: Context manager.
+        '''
+        return TimerScope(self.get(name))
+
+    def snapshot(self, reset=False):
+        # type: (bool) -> Dict[str, Dict[str, Any]]
+        '''
+        Gets statistics of all timers, sorted by name.
+
+        Args:
+            reset (bool, optional): Reset each timer after its snapshot, so
+                that successive snapshots cover successive periods.
+                Default: False.
+
+        Returns:
+            dict: Timer names to statistics.
+        '''
+        with self._lock:
+            timers = sorted(self._timers.items())
+        return {k: v.snapshot(reset=reset) for k, v in timers}
+
+    def reset(self):
+        # type: () -> None
+        '''
+        Resets all timers.
+        '''
+        with self._lock:
+            timers = list(self._timers.values())
+        for timer in timers:
+            timer.reset()
+
+
+# CALL-TREE---------------------------------------------------------------------
+# innermost active CallNode of current context, if a CallTree is active
+_CALL_NODE = ContextVar(
+    '_CALL_NODE', default=None
+)  # type: ContextVar[Optional[CallNode]]
+
+
+class CallNode:
+    '''
+    Node of a CallTree, which aggregates all calls of a scope under a given
+    parent scope.
+
+    Attributes:
+        name (str): Scope name.
+        parent (CallNode or None): Parent node.
+        children (dict): Scope names to child nodes, in order of first call.
+        count (int): Number of calls.
+        total_ns (int): Total time of calls in nanoseconds.
+    '''
+    __slots__ = ('name', 'parent', 'children', 'count', 'total_ns')
+
+    def __init__(self, name, parent=None):
+        # type: (str, Optional[CallNode]) -> None
+        '''
+        Constructs a CallNode instance.
+
+        Args:
+            name (str): Scope name.
+            parent (CallNode, optional): Parent node. Default: None.
+        '''
+        self.name = name
+        self.parent = parent
+        self.children = {}  # type: Dict[str, CallNode]
+        self.count = 0
+        self.total_ns = 0
+
+    def __repr__(self):
+        # type: () -> str
+        return f'CallNode({self.name!r}, count={self.count}, ' \
+            + f'total_ns={self.total_ns})'
+
+    def child(self, name):
+        # type: (str) -> CallNode
+        '''
+        Gets child node of given name, creating it if need be.
+
+        Args:
+            name (str): Scope name.
+
+        Returns:
+            CallNode: Child node.
+        '''
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = CallNode(name, self)
+        return node
+
+    @property
+    def self_ns(self):
+        # type: () -> int
+        '''
+        Total time minus total time of children in nanoseconds, floored at 0.
+        '''
+        return max(self.total_ns - sum(x.total_ns for x in self.children.values()), 0)
+
+    def walk(self, depth=0):
+        # type: (int) -> Iterator[tuple]
+        '''
+        Walks node and its descendants depth first.
+
+        Args:
+            depth (int, optional): Depth of node. Default: 0.
+
+        Yields:
+            tuple: Depth and node.
+        '''
+        yield depth, self
+        for child in self.children.values():
+            yield from child.walk(depth + 1)
+
+
+def enter_scope(name):
+    # type: (str) -> Optional[CallNode]
+    '''
+    Enters a scope of given name, under the current scope of the active
+    CallTree. Does nothing if no CallTree is active.
+
+    Args:
+        name (str): Scope name.
+
+    Returns:
+        CallNode or None: Node of scope, to be passed to exit_scope.
+    '''
+    parent = _CALL_NODE.get()
+    if parent is None:
+        return None
+    node = parent.child(name)
+    _CALL_NODE.set(node)
+    return node
+
+
+def exit_scope(node, duration_ns):
+    # type: (Optional[CallNode], Optional[int]) -> None
+    '''
+    Exits scope of given node, making its parent the current scope, and
+    records given duration.
+
+    Args:
+        node (CallNode or None): Node returned by enter_scope.
+        duration_ns (int or None): Duration in nanoseconds. If None, no call
+            is recorded.
+    '''
+    if node is None:
+        return
+    if duration_ns is not None:
+        node.count += 1
+        node.total_ns += duration_ns
+    _CALL_NODE.set(node.parent)
+
+
+class CallTree:
+    '''
+    Context manager, which records nested scopes, such as named StopWatches,
+    LogRuntimes and CallScope blocks, into a tree of CallNodes with total
+    and self time. Scopes are tracked with a context variable, so asyncio
+    tasks spawned inside the tree record into it, while other threads do not.
+
+    Example:
+
+        >>> with CallTree('handler') as tree:
+                with LogRuntime('parse', suppress=True):
+                    parse(request)
+                for query in queries:
+                    with CallScope('query'):
+                        run(query)
+        >>> print(tree.to_text())
+        NAME            TOTAL        SELF     COUNT       %
+        handler      12.302ms     0.211ms         1   100.0
+        ├── parse     2.011ms     2.011ms         1    16.3
+        └── query    10.080ms    10.080ms        50    81.9
+        >>> print(tree.to_collapsed())
+        handler 211000
+        handler;parse 2011000
+        handler;query 10080000
+    '''
+    def __init__(self, name='root'):
+        # type: (str) -> None
+        '''
+        Constructs a CallTree instance.
+
+        Args:
+            name (str, optional): Name of root scope. Default: root.
+        '''
+        self.root = CallNode(name)
+        self._start_ns = 0
+        self._token = None  # type: Any
+
+    def __enter__(self):
+        # type: () -> CallTree
+        '''
+        Activates tree in current context and starts timing root scope.
+
+        Returns:
+            CallTree: self.
+        '''
+        self._token = _CALL_NODE.set(self.root)
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        # type: (Any) -> None
+        '''
+        Records time of root scope and deactivates tree.
+        '''
+        self.root.count += 1
+        self.root.total_ns += time.perf_counter_ns() - self._start_ns
+        _CALL_NODE.reset(self._token)
+
+    def to_collapsed(self):
+        # type: () -> str
+        '''
+        Exports tree to collapsed stack format, as read by flamegraph.pl and
+        speedscope. Each line is a semicolon separated path of scope names,
+        followed by self time in nanoseconds. Zero values are omitted.
+
+        Returns:
+            str: Collapsed stacks.
+        '''
+        lines = []
+        paths = {}  # type: Dict[int, str]
+        for depth, node in self.root.walk():
+            name = node.name.replace(';', ':').replace('\n', ' ')
+            path = name if depth == 0 else paths[depth - 1] + ';' + name
+            paths[depth] = path
+            value = node.self_ns
+            if value > 0:
+                lines.append(f'{path} {value}')
+        return '\n'.join(lines)
+
+    def to_text(self):
+        # type: () -> str
+        '''
+        Exports tree to a text table of total time, self time, count and
+        percentage of root total time per scope, in milliseconds.
+
+        Returns:
+            str: Text tree.
+        '''
+        rows = []
+        prefixes = {}  # type: Dict[int, str]
+        for depth, node in self.root.walk():
+            label = node.name
+            if depth > 0:
+                siblings = list(node.parent.children.values())
+                last = node is siblings[-1]
+                label = prefixes[depth - 1] + ('└── ' if last else '├── ') + label
+                prefixes[depth] = prefixes[depth - 1] + ('    ' if last else '│   ')
+            else:
+                prefixes[depth] = ''
+            rows.append((label, node))
+
+        total = max(self.root.total_ns, 1)
+        width = max(len(x[0]) for x in rows + [('NAME', None)])
+        lines = [f'{"NAME":<{width}} {"TOTAL":>12}{"SELF":>12}{"COUNT":>10}{"%":>8}']
+        for label, node in rows:
+            line = f'{label:<{width}} {node.total_ns / 1e6:>10.3f}ms'
+            line += f'{node.self_ns / 1e6:>10.3f}ms{node.count:>10}'
+            line += f'{node.total_ns / total * 100:>8.1f}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+class CallScope:
+    '''
+    Context manager, which times its block with time.perf_counter_ns, as a
+    scope of given name in the active CallTree. Does nothing if no CallTree
+    is active.
+
+    Example:
+
+        >>> with CallScope('db.query'):
+                run(query)
+    '''
+    __slots__ = ('_name', '_node', '_start_ns')
+
+    def __init__(self, name):
+        # type: (str) -> None
+        '''
+        Constructs a CallScope instance.
+
+        Args:
+            name (str): Scope name.
+        '''
+        self._name = name
+        self._node = None  # type: Optional[CallNode]
+        self._start_ns = 0
+
+    def __enter__(self):
+        # type: () -> CallScope
+        self._node = enter_scope(self._name)
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        # type: (Any) -> None
+        exit_scope(self._node, time.perf_counter_ns() - self._start_ns)
+
+
+# TRACE-------------------------------------------------------------------------
+# active TraceRecorder of all threads, if any
+_TRACER = None  # type: Optional[TraceRecorder]
+
+
+def get_tracer():
+    # type: () -> Optional[TraceRecorder]
+    '''
+    Gets active TraceRecorder.
+
+    Returns:
+        TraceRecorder or None: Active recorder, if any.
+    '''
+    return _TRACER
+
+
+class TraceRecorder:
+    '''
+    Records trace events of LogRuntime blocks and log_runtime/runtime calls,
+    across all threads, into a fixed size ring buffer, which can be exported
+    to Chrome Trace Event JSON, for chrome://tracing or Perfetto, or to
+    speedscope JSON. Once full, the oldest events are dropped.
+
+    Each event is a tuple of name, start in nanoseconds (from
+    time.perf_counter_ns), duration in nanoseconds, thread id, process id and
+    args.
+
+    Example:
+
+        >>> with TraceRecorder(capacity=10000) as tracer:
+                serve(requests)
+        >>> tracer.write('/tmp/trace.json')
+        >>> tracer.write('/tmp/trace.speedscope.json', fmt='speedscope')
+    '''
+    def __init__(self, capacity=100000):
+        # type: (int) -> None
+        '''
+        Constructs a TraceRecorder instance.
+
+        Args:
+            capacity (int, optional): Maximum number of events kept.
+                Default: 100000.
+
+        Raises:
+            EnforceError: If capacity is not a positive integer.
+        '''
+        Enforce(capacity, 'instance of', int)
+        Enforce(capacity, '>', 0)
+        # ----------------------------------------------------------------------
+
+        self.capacity = capacity
+        self.count = 0
+        self._events = deque(maxlen=capacity)  # type: deque
+        self._threads = {}  # type: Dict[int, str]
+        self._previous = None  # type: Optional[TraceRecorder]
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._events)
+
+    def __enter__(self):
+        # type: () -> TraceRecorder
+        '''
+        Makes recorder the active one.
+
+        Returns:
+            TraceRecorder: self.
+        '''
+        global _TRACER
+        self._previous = _TRACER
+        _TRACER = self
+        return self
+
+    def __exit__(self, *args):
+        # type: (Any) -> None
+        '''
+        Restores previously active recorder.
+        '''
+        global _TRACER
+        _TRACER = self._previous
+        self._previous = None
+
+    @property
+    def dropped(self):
+        # type: () -> int
+        '''
+        Number of events dropped from ring buffer.
+        '''
+        return self.count - len(self._events)
+
+    @property
+    def events(self):
+        # type: () -> List[Dict[str, Any]]
+        '''
+        List of recorded events as dicts, oldest first.
+        '''
+        keys = ['name', 'start_ns', 'duration_ns', 'tid', 'pid', 'args']
+        return [dict(zip(keys, x)) for x in list(self._events)]
+
+    def record(self, name, start_ns, duration_ns, args=None):
+        # type: (str, int, int, Optional[Dict[str, Any]]) -> None
+        '''
+        Records a trace event in current thread and process.
+
+        Args:
+            name (str): Event name.
+            start_ns (int): Start time from time.perf_counter_ns.
+            duration_ns (int): Duration in nanoseconds.
+            args (dict, optional): JSON serializable event args.
+                Default: None.
+        '''
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self._events.append(
+            (name, start_ns, duration_ns, tid, os.getpid(), args or {})
+        )
+        self.count += 1
+
+    def clear(self):
+        # type: () -> None
+        '''
+        Removes all events.
+        '''
+        self._events.clear()
+        self._threads.clear()
+        self.count = 0
+
+    def to_chrome_trace(self):
+        # type: () -> Dict[str, Any]
+        '''
+        Exports events to Chrome Trace Event format, as complete (X) events
+        with timestamps in microseconds, plus thread name metadata events.
+
+        Returns:
+            dict: Chrome trace.
+        '''
+        events = list(self._events)
+        output = []  # type: List[Dict[str, Any]]
+        threads = set()
+        for name, start, duration, tid, pid, args in events:
+            output.append(dict(
+                name=name, ph='X', ts=start / 1000, dur=duration / 1000,
+                pid=pid, tid=tid, args=args,
+            ))
+            threads.add((pid, tid))
+        for pid, tid in sorted(threads):
+            output.append(dict(
+                name='thread_name', ph='M', pid=pid, tid=tid,
+                args=dict(name=self._threads.get(tid, str(tid))),
+            ))
+        return dict(traceEvents=output, displayTimeUnit='ns')
+
+    def to_speedscope(self, name='lunchbox'):
+        # type: (str) -> Dict[str, Any]
+        '''
+        Exports events to speedscope format, as one evented profile per
+        thread. Events that overlap without nesting, such as interleaved
+        asyncio tasks, are clipped to the end of their enclosing event.
+
+        Args:
+            name (str, optional): Name of trace. Default: lunchbox.
+
+        Returns:
+            dict: Speedscope file.
+        '''
+        frames = {}  # type: Dict[str, int]
+        spans = {}  # type: Dict[tuple, List[tuple]]
+        for item, start, duration, tid, pid, _ in list(self._events):
+            frame = frames.setdefault(item, len(frames))
+            spans.setdefault((pid, tid), []).append((start, start + duration, frame))
+
+        profiles = []
+        for (pid, tid), items in sorted(spans.items()):
+            items.sort(key=lambda x: (x[0], -x[1]))
+            events = []  # type: List[Dict[str, Any]]
+            stack = []  # type: List[tuple]
+            for start, end, frame in items:
+                while stack and stack[-1][0] <= start:
+                    close, top = stack.pop()
+                    events.append(dict(type='C', frame=top, at=close))
+                if stack:
+                    end = min(end, stack[-1][0])
+                stack.append((end, frame))
+                events.append(dict(type='O', frame=frame, at=start))
+            while stack:
+                close, top = stack.pop()
+                events.append(dict(type='C', frame=top, at=close))
+
+            thread = self._threads.get(tid, str(tid))
+            profiles.append(dict(
+                type='evented',
+                name=f'{thread} (pid {pid}, tid {tid})',
+                unit='nanoseconds',
+                startValue=items[0][0],
+                endValue=max(x['at'] for x in events),
+                events=events,
+            ))
+
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'lunchbox',
+            'shared': dict(frames=[dict(name=x) for x in frames]),
+            'profiles': profiles,
+        }
+
+    def write(self, filepath, fmt='chrome'):
+        # type: (Union[str, Path], str) -> None
+        '''
+        Writes events to given JSON file.
+
+        Args:
+            filepath (str or Path): Filepath.
+            fmt (str, optional): Format. Options: chrome, speedscope.
+                Default: chrome.
+
+        Raises:
+            EnforceError: If fmt is not legal.
+        '''
+        Enforce(fmt, 'in', ['chrome', 'speedscope'])
+        # ----------------------------------------------------------------------
+
+        if fmt == 'chrome':
+            data = self.to_chrome_trace()
+        else:
+            data = self.to_speedscope()
+        Path(filepath).write_text(json.dumps(data))
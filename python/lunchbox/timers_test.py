@@ -0,0 +1,445 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import unittest
+
+from lunchbox.enforce import EnforceError
+from lunchbox.timers import (
+    CallNode, CallScope, CallTree, Histogram, TimerRegistry, TraceRecorder,
+    enter_scope, exit_scope, get_tracer
+)
+# ------------------------------------------------------------------------------
+
+
+class HistogramTests(unittest.TestCase):
+    def test_init(self):
+        result = Histogram()
+        self.assertEqual(result.precision, 5)
+        self.assertEqual(len(result._counts), 59 * 32)
+        self.assertEqual(result.count, 0)
+        self.assertEqual(result.sum, 0)
+        self.assertIsNone(result.min)
+        self.assertIsNone(result.max)
+
+        with self.assertRaisesRegex(EnforceError, '0 is less than 1'):
+            Histogram(precision=0)
+
+        with self.assertRaisesRegex(EnforceError, '11 is greater than 10'):
+            Histogram(precision=11)
+
+    def test_get_index(self):
+        hist = Histogram(precision=3)
+        for value in [0, 1, 7, 8, 9, 15, 16, 17, 1000, 2**40 + 3, 2**63 - 1]:
+            index = hist._get_index(value)
+            lower, upper = hist._get_bounds(index)
+            self.assertLessEqual(lower, value)
+            self.assertGreaterEqual(upper, value)
+            self.assertLess(index, len(hist._counts))
+
+        # indices are contiguous
+        indices = [hist._get_index(x) for x in range(200)]
+        self.assertEqual(sorted(set(indices)), list(range(max(indices) + 1)))
+
+    def test_record(self):
+        hist = Histogram()
+        for value in [5, 3, 1000, -1]:
+            hist.record(value)
+        self.assertEqual(hist.count, 4)
+        self.assertEqual(hist.sum, 1008)
+        self.assertEqual(hist.min, 0)
+        self.assertEqual(hist.max, 1000)
+
+    def test_quantile(self):
+        hist = Histogram()
+        self.assertIsNone(hist.quantile(0.5))
+
+        for value in range(1, 11):
+            hist.record(value)
+        self.assertEqual(hist.quantile(0), 1)
+        self.assertEqual(hist.quantile(0.5), 5)
+        self.assertEqual(hist.quantile(0.9), 9)
+        self.assertEqual(hist.quantile(1), 10)
+
+        expected = 'Quantile must be between 0 and 1. 1.5 is not.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            hist.quantile(1.5)
+
+    def test_quantile_error(self):
+        random.seed(42)
+        values = [int(random.lognormvariate(10, 2)) for _ in range(10000)]
+        hist = Histogram()
+        for value in values:
+            hist.record(value)
+
+        values = sorted(values)
+        for q in [0.5, 0.9, 0.99]:
+            expected = values[int(q * len(values)) - 1]
+            result = hist.quantile(q)
+            self.assertAlmostEqual(result, expected, delta=expected / 32)
+
+    def test_snapshot(self):
+        hist = Histogram()
+        expected = dict(
+            count=0, sum=0, min=None, max=None, mean=None,
+            p50=None, p90=None, p95=None, p99=None, p999=None,
+        )
+        self.assertEqual(hist.snapshot(), expected)
+
+        for value in [100, 200, 300, 10000]:
+            hist.record(value)
+        expected = dict(
+            count=4, sum=10600, min=100, max=10000, mean=2650.0,
+            p50=201, p90=10000, p95=10000, p99=10000, p999=10000,
+        )
+        self.assertEqual(hist.snapshot(), expected)
+        self.assertEqual(hist.snapshot(reset=True), expected)
+        self.assertEqual(hist.count, 0)
+        self.assertEqual(sum(hist._counts), 0)
+
+    def test_reset(self):
+        hist = Histogram()
+        hist.record(10)
+        hist.reset()
+        self.assertEqual(hist.count, 0)
+        self.assertEqual(hist.sum, 0)
+        self.assertIsNone(hist.min)
+        self.assertIsNone(hist.max)
+        self.assertEqual(sum(hist._counts), 0)
+
+    def test_threads(self):
+        hist = Histogram()
+
+        def record():
+            for i in range(1000):
+                hist.record(i)
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(hist.count, 8000)
+        self.assertEqual(sum(hist._counts), 8000)
+        self.assertEqual(hist.sum, 8 * sum(range(1000)))
+
+
+class TimerRegistryTests(unittest.TestCase):
+    def test_get(self):
+        timers = TimerRegistry(precision=4)
+        self.assertNotIn('foo', timers)
+
+        result = timers.get('foo')
+        self.assertIsInstance(result, Histogram)
+        self.assertEqual(result.precision, 4)
+        self.assertIn('foo', timers)
+        self.assertIs(timers.get('foo'), result)
+        self.assertEqual(len(timers), 1)
+
+    def test_record(self):
+        timers = TimerRegistry()
+        timers.record('foo', 10)
+        timers.record('foo', 20)
+        self.assertEqual(timers.get('foo').count, 2)
+        self.assertEqual(timers.get('foo').sum, 30)
+
+    def test_time(self):
+        timers = TimerRegistry()
+        for _ in range(3):
+            with timers.time('foo'):
+                time.sleep(0.01)
+
+        result = timers.get('foo')
+        self.assertEqual(result.count, 3)
+        self.assertGreaterEqual(result.min, 10**7)
+
+    def test_time_error(self):
+        timers = TimerRegistry()
+        with self.assertRaises(ValueError):
+            with timers.time('foo'):
+                raise ValueError('bar')
+        self.assertEqual(timers.get('foo').count, 1)
+
+    def test_snapshot(self):
+        timers = TimerRegistry()
+        timers.record('b', 10)
+        timers.record('a', 20)
+
+        result = timers.snapshot()
+        self.assertEqual(list(result), ['a', 'b'])
+        self.assertEqual(result['a']['count'], 1)
+        self.assertEqual(result['a']['p50'], 20)
+        self.assertEqual(result['b']['sum'], 10)
+
+        result = timers.snapshot(reset=True)
+        self.assertEqual(result['a']['count'], 1)
+        result = timers.snapshot()
+        self.assertEqual(result['a']['count'], 0)
+        self.assertEqual(result['b']['count'], 0)
+
+    def test_reset(self):
+        timers = TimerRegistry()
+        timers.record('a', 20)
+        timers.reset()
+        self.assertIn('a', timers)
+        self.assertEqual(timers.get('a').count, 0)
+
+    def test_threads(self):
+        timers = TimerRegistry()
+
+        def record():
+            for i in range(500):
+                with timers.time(f'foo-{i % 5}'):
+                    pass
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        result = timers.snapshot()
+        self.assertEqual(len(result), 5)
+        self.assertEqual(sum(x['count'] for x in result.values()), 2000)
+
+
+class CallTreeTests(unittest.TestCase):
+    def get_tree(self):
+        tree = CallTree('root')
+        root = tree.root
+        root.count, root.total_ns = 1, 100
+        a = root.child('a')
+        a.count, a.total_ns = 2, 60
+        b = a.child('b')
+        b.count, b.total_ns = 1, 50
+        c = root.child('c;d')
+        c.count, c.total_ns = 1, 30
+        return tree
+
+    def test_call_node(self):
+        node = CallNode('foo')
+        self.assertIsNone(node.parent)
+        self.assertEqual(node.children, {})
+        self.assertEqual(node.count, 0)
+        self.assertEqual(node.total_ns, 0)
+
+        child = node.child('bar')
+        self.assertIs(child.parent, node)
+        self.assertIs(node.child('bar'), child)
+        self.assertEqual(repr(child), "CallNode('bar', count=0, total_ns=0)")
+
+        node.total_ns = 10
+        child.total_ns = 4
+        self.assertEqual(node.self_ns, 6)
+        child.total_ns = 40
+        self.assertEqual(node.self_ns, 0)
+
+        result = [(d, x.name) for d, x in node.walk()]
+        self.assertEqual(result, [(0, 'foo'), (1, 'bar')])
+
+    def test_scopes(self):
+        self.assertIsNone(enter_scope('foo'))
+        exit_scope(None, 10)
+
+        with CallTree() as tree:
+            with CallScope('a'):
+                with CallScope('b'):
+                    time.sleep(0.001)
+                with CallScope('b'):
+                    pass
+            with CallScope('a'):
+                pass
+            node = enter_scope('c')
+            exit_scope(node, None)
+
+        root = tree.root
+        self.assertEqual(root.count, 1)
+        self.assertEqual(list(root.children), ['a', 'c'])
+        a = root.children['a']
+        self.assertEqual(a.count, 2)
+        self.assertEqual(a.children['b'].count, 2)
+        self.assertGreaterEqual(a.children['b'].total_ns, 10**6)
+        self.assertGreaterEqual(root.total_ns, a.total_ns)
+        self.assertGreaterEqual(a.total_ns, a.children['b'].total_ns)
+        self.assertEqual(root.children['c'].count, 0)
+
+        # tree is inactive after exit
+        self.assertIsNone(enter_scope('foo'))
+
+    def test_scopes_async(self):
+        async def task(name):
+            with CallScope(name):
+                await asyncio.sleep(0.001)
+
+        async def main():
+            with CallScope('gather'):
+                await asyncio.gather(task('x'), task('y'))
+
+        with CallTree() as tree:
+            asyncio.run(main())
+
+        gather = tree.root.children['gather']
+        self.assertEqual(list(gather.children), ['x', 'y'])
+
+    def test_scopes_threads(self):
+        def record():
+            with CallScope('thread'):
+                pass
+
+        with CallTree() as tree:
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+        self.assertEqual(tree.root.children, {})
+
+    def test_to_collapsed(self):
+        result = self.get_tree().to_collapsed()
+        expected = 'root 10\nroot;a 10\nroot;a;b 50\nroot;c:d 30'
+        self.assertEqual(result, expected)
+
+    def test_to_text(self):
+        tree = self.get_tree()
+        tree.root.children['a'].child('e')
+        result = tree.to_text().split('\n')
+        self.assertEqual(len(result), 6)
+        self.assertRegex(result[0], r'^NAME +TOTAL +SELF +COUNT +%$')
+        self.assertRegex(result[1], r'^root +0\.000ms +0\.000ms +1 +100\.0$')
+        self.assertRegex(result[2], r'^├── a +0\.000ms +0\.000ms +2 +60\.0$')
+        self.assertRegex(result[3], r'^│   ├── b +0\.000ms +0\.000ms +1 +50\.0$')
+        self.assertRegex(result[4], r'^│   └── e +0\.000ms +0\.000ms +0 +0\.0$')
+        self.assertRegex(result[5], r'^└── c;d +0\.000ms +0\.000ms +1 +30\.0$')
+
+
+class TraceRecorderTests(unittest.TestCase):
+    def test_init(self):
+        result = TraceRecorder()
+        self.assertEqual(result.capacity, 100000)
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.dropped, 0)
+
+        with self.assertRaisesRegex(EnforceError, '0 is not greater than 0'):
+            TraceRecorder(capacity=0)
+
+    def test_with(self):
+        self.assertIsNone(get_tracer())
+        with TraceRecorder() as outer:
+            self.assertIs(get_tracer(), outer)
+            with TraceRecorder() as inner:
+                self.assertIs(get_tracer(), inner)
+            self.assertIs(get_tracer(), outer)
+        self.assertIsNone(get_tracer())
+
+    def test_record(self):
+        tracer = TraceRecorder()
+        tracer.record('foo', 10, 5, dict(bar='baz'))
+        tracer.record('bar', 20, 5)
+        result = tracer.events
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0]['name'], 'foo')
+        self.assertEqual(result[0]['start_ns'], 10)
+        self.assertEqual(result[0]['duration_ns'], 5)
+        self.assertEqual(result[0]['tid'], threading.get_native_id())
+        self.assertEqual(result[0]['pid'], os.getpid())
+        self.assertEqual(result[0]['args'], dict(bar='baz'))
+        self.assertEqual(result[1]['args'], {})
+
+    def test_record_ring_buffer(self):
+        tracer = TraceRecorder(capacity=3)
+        for i in range(5):
+            tracer.record(str(i), i, 1)
+        self.assertEqual(len(tracer), 3)
+        self.assertEqual(tracer.count, 5)
+        self.assertEqual(tracer.dropped, 2)
+        self.assertEqual([x['name'] for x in tracer.events], ['2', '3', '4'])
+
+        tracer.clear()
+        self.assertEqual(len(tracer), 0)
+        self.assertEqual(tracer.dropped, 0)
+
+    def test_to_chrome_trace(self):
+        tracer = TraceRecorder()
+        tracer.record('foo', 1500, 3000, dict(bar='baz'))
+        result = tracer.to_chrome_trace()
+        self.assertEqual(result['displayTimeUnit'], 'ns')
+
+        tid = threading.get_native_id()
+        pid = os.getpid()
+        expected = [
+            dict(
+                name='foo', ph='X', ts=1.5, dur=3.0, pid=pid, tid=tid,
+                args=dict(bar='baz'),
+            ),
+            dict(
+                name='thread_name', ph='M', pid=pid, tid=tid,
+                args=dict(name=threading.current_thread().name),
+            ),
+        ]
+        self.assertEqual(result['traceEvents'], expected)
+
+    def test_to_speedscope(self):
+        tracer = TraceRecorder()
+        tracer.record('b', 20, 10)
+        tracer.record('a', 0, 100)
+        tracer.record('c', 25, 100)  # overlaps b without nesting
+        tracer.record('b', 150, 10)
+        result = tracer.to_speedscope(name='foo')
+
+        self.assertEqual(result['name'], 'foo')
+        self.assertEqual(result['shared']['frames'], [
+            dict(name='b'), dict(name='a'), dict(name='c')
+        ])
+        self.assertEqual(len(result['profiles']), 1)
+        profile = result['profiles'][0]
+        self.assertEqual(profile['type'], 'evented')
+        self.assertEqual(profile['unit'], 'nanoseconds')
+        self.assertEqual(profile['startValue'], 0)
+        self.assertEqual(profile['endValue'], 160)
+
+        result = [(x['type'], x['frame'], x['at']) for x in profile['events']]
+        expected = [
+            ('O', 1, 0),
+            ('O', 0, 20),
+            ('O', 2, 25),
+            ('C', 2, 30),
+            ('C', 0, 30),
+            ('C', 1, 100),
+            ('O', 0, 150),
+            ('C', 0, 160),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_to_speedscope_threads(self):
+        tracer = TraceRecorder()
+
+        def record():
+            tracer.record('foo', 0, 10)
+
+        thread = threading.Thread(target=record, name='bar')
+        thread.start()
+        thread.join()
+        record()
+
+        result = tracer.to_speedscope()['profiles']
+        self.assertEqual(len(result), 2)
+        self.assertTrue(any(x['name'].startswith('bar (pid') for x in result))
+
+    def test_write(self):
+        tracer = TraceRecorder()
+        tracer.record('foo', 0, 10)
+        with TemporaryDirectory() as root:
+            filepath = Path(root, 'trace.json')
+            tracer.write(filepath)
+            result = json.loads(filepath.read_text())
+            self.assertEqual(result, tracer.to_chrome_trace())
+
+            tracer.write(filepath, fmt='speedscope')
+            result = json.loads(filepath.read_text())
+            self.assertEqual(result, tracer.to_speedscope())
+
+            with self.assertRaises(EnforceError):
+                tracer.write(filepath, fmt='foo')
@@ -1,19 +1,30 @@
-from typing import Any, Callable, Dict, List, Optional, Union  # noqa: F401
+from typing import (  # noqa: F401
+    Any, Awaitable, Callable, Dict, Generator, Iterable, List, Optional, Tuple,
+    Union
+)
 
 from itertools import dropwhile, takewhile
 from pathlib import Path
 from pprint import pformat
+import functools
 import inspect
 import json
 import logging
 import os
 import re
+import reprlib
+import time
+import types
+import typing
 import urllib.request
 
+import humanfriendly
 import wrapt
 
 from lunchbox.enforce import Enforce, EnforceError
-from lunchbox.stopwatch import StopWatch
+import lunchbox.enforce as lbe
+from lunchbox.stopwatch import CLOCKS, StopWatch
+import lunchbox.timers as lbtm
 
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'WARNING').upper()
 logging.basicConfig(level=LOG_LEVEL)
@@ -199,19 +210,131 @@ def recurse(item):
 
 
 # LOGGING-----------------------------------------------------------------------
+class _LoopTimer:
+    '''
+    Awaitable wrapper, which times each step of given awaitable, so that time
+    spent running on the event loop can be told apart from time suspended.
+
+    Attributes:
+        on_loop_ns (int): Total time of steps in nanoseconds.
+        wall_ns (int): Time from first step to completion in nanoseconds.
+        steps (int): Number of steps.
+    '''
+    def __init__(self, awaitable):
+        # type: (Awaitable) -> None
+        '''
+        Constructs a _LoopTimer instance.
+
+        Args:
+            awaitable (Awaitable): Coroutine, task or future.
+        '''
+        self._awaitable = awaitable
+        self.on_loop_ns = 0
+        self.wall_ns = 0
+        self.steps = 0
+
+    @property
+    def suspended_ns(self):
+        # type: () -> int
+        '''
+        Time suspended in nanoseconds.
+        '''
+        return max(self.wall_ns - self.on_loop_ns, 0)
+
+    def __await__(self):
+        # type: () -> Generator
+        clock = time.perf_counter_ns
+        iterator = self._awaitable.__await__()
+        send = iterator.send  # type: Callable
+        value = None  # type: Any
+        begin = clock()
+        try:
+            while True:
+                start = clock()
+                try:
+                    future = send(value)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    self.on_loop_ns += clock() - start
+                    self.steps += 1
+
+                try:
+                    value = yield future
+                    send = iterator.send
+                except GeneratorExit:
+                    iterator.close()
+                    raise
+                except BaseException as error:
+                    value = error
+                    send = iterator.throw
+        finally:
+            self.wall_ns = clock() - begin
+
+
+def _get_runtime_message(function, args, kwargs, stopwatch, message_, timer):
+    # type: (Callable, Any, Any, StopWatch, Optional[str], Optional[_LoopTimer]) -> str
+    '''
+    Records trace event of given function call, if a TraceRecorder is active,
+    and creates its runtime message.
+
+    Args:
+        function (function): Called function.
+        args (tuple): Arguments.
+        kwargs (dict): Keyword arguments.
+        stopwatch (StopWatch): Stopped StopWatch.
+        message_ (str or None): Message.
+        timer (_LoopTimer or None): Loop timer of coroutine function call.
+
+    Returns:
+        str: Message.
+    '''
+    tracer = lbtm.get_tracer()
+    if tracer is not None:
+        tracer.record(
+            function.__name__, stopwatch._start_ns, stopwatch.delta_ns,
+            dict(args=reprlib.repr(args), kwargs=reprlib.repr(kwargs)),
+        )
+
+    runtime = f'\n         Runtime: {stopwatch.human_readable_delta}'
+    if timer is not None:
+        runtime += '\n         On loop: '
+        runtime += humanfriendly.format_timespan(timer.on_loop_ns / 1e9)
+        runtime += '\n       Suspended: '
+        runtime += humanfriendly.format_timespan(timer.suspended_ns / 1e9)
+
+    if message_ is not None:
+        return message_ + runtime
+    return f'''{function.__name__}{runtime}
+            Args: {pformat(args)}
+          Kwargs: {pformat(kwargs)}'''
+
+
 def log_runtime(
-    function, *args, message_=None, _testing=False, log_level='info', **kwargs
+    function,
+    *args,
+    message_=None,
+    _testing=False,
+    log_level='info',
+    loop_time_=False,
+    **kwargs
 ):
-    # type (Callable, ..., Optional[str], bool, str, ...) -> Any
+    # type (Callable, ..., Optional[str], bool, str, bool, ...) -> Any
     r'''
     Logs the duration of given function called with given arguments.
 
+    If function is a coroutine function, a coroutine is returned, which
+    awaits the function call and logs its duration.
+
     Args:
         function (function): Function to be called.
         \*args (object, optional): Arguments.
         message_ (str, optional): Message to be returned. Default: None.
         _testing (bool, optional): Returns message if True. Default: False.
         log_level (str, optional): Log level. Default: info.
+        loop_time_ (bool, optional): Also log time spent running on the event
+            loop and time spent suspended, if function is a coroutine
+            function. Default: False.
         \*\*kwargs (object, optional): Keyword arguments.
 
     Raises:
@@ -222,20 +345,53 @@ def log_runtime(
     '''
     level = log_level_to_int(log_level)
 
+    if inspect.iscoroutinefunction(function):
+        return _log_runtime_async(
+            function, args, kwargs, message_, _testing, level, loop_time_
+        )
+
     # this may silently break file writes in multiprocessing
-    stopwatch = StopWatch()
+    stopwatch = StopWatch(name=function.__name__)
     stopwatch.start()
-    output = function(*args, **kwargs)
-    stopwatch.stop()
+    try:
+        output = function(*args, **kwargs)
+    finally:
+        # exits CallTree scope even if function raises
+        stopwatch.stop()
 
-    if message_ is not None:
-        message_ += f'\n         Runtime: {stopwatch.human_readable_delta}'
-    else:
-        message_ = f'''{function.__name__}
-         Runtime: {stopwatch.human_readable_delta}
-            Args: {pformat(args)}
-          Kwargs: {pformat(kwargs)}'''
+    message_ = _get_runtime_message(function, args, kwargs, stopwatch, message_, None)
+    if _testing:
+        return message_
 
+    LOGGER.log(level, message_)
+    return output
+
+
+async def _log_runtime_async(
+    function, args, kwargs, message_, _testing, level, loop_time_
+):
+    # type (Callable, Any, Any, Optional[str], bool, int, bool) -> Any
+    '''
+    Awaits given coroutine function called with given arguments and logs its
+    duration. See log_runtime.
+
+    Returns:
+        object: await function(*args, **kwargs).
+    '''
+    stopwatch = StopWatch(name=function.__name__)
+    stopwatch.start()
+    timer = None
+    try:
+        if loop_time_:
+            timer = _LoopTimer(function(*args, **kwargs))
+            output = await timer
+        else:
+            output = await function(*args, **kwargs)
+    finally:
+        # exits CallTree scope even if function raises
+        stopwatch.stop()
+
+    message_ = _get_runtime_message(function, args, kwargs, stopwatch, message_, timer)
     if _testing:
         return message_
 
@@ -248,7 +404,7 @@ def runtime(wrapped, instance, args, kwargs):
     # type: (Callable, Any, Any, Any) -> Any
     r'''
     Decorator for logging the duration of given function called with given
-    arguments.
+    arguments. Coroutine functions are awaited, see log_runtime.
 
     Args:
         wrapped (function): Function to be called.
@@ -304,10 +460,21 @@ class LogRuntime:
     '''
     LogRuntime is a class for logging the runtime of arbitrary code.
 
+    Within an active CallTree, LogRuntime is recorded as a scope named after
+    its message, or its logger name if message is empty. Likewise, while a
+    TraceRecorder is active, it is recorded as a trace event.
+
     Attributes:
         message (str): Logging message with runtime line.
         delta (datetime.timedelta): Runtime.
         human_readable_delta (str): Runtime in human readable format.
+        stopwatches (dict): Clock names to StopWatch instances.
+        cpu_ratio (float or None): CPU time / wall time, if timing includes
+            wall and process or thread clocks.
+        on_loop_ns (int or None): Time running on the event loop in
+            nanoseconds, if loop_time is True.
+        suspended_ns (int or None): Time suspended in tracked awaitables in
+            nanoseconds, if loop_time is True.
 
     Example:
 
@@ -323,6 +490,16 @@ class LogRuntime:
                 foobar()
         >>> print(log.message)
         Fooing all the bars - Runtime: 0:00:01.001069 (1 second)
+
+        >>> with LogRuntime('Foo', timing=['wall', 'process']):
+                foobar()
+        INFO:LogRuntime:Foo - Runtime: 0:00:01.001069 (1 second) - Process \
+CPU: 0:00:00.000412 (0 seconds) - CPU/wall: 0.00
+
+        >>> async with LogRuntime('Fetch', loop_time=True) as log:
+                parse(await log.track(fetch(url)))
+        INFO:LogRuntime:Fetch - Runtime: 0:00:00.203117 (0.2 seconds) - On \
+loop: 3.01 milliseconds - Suspended: 200.1 milliseconds
     '''
     def __init__(
         self,
@@ -332,6 +509,8 @@ def __init__(
         suppress=False,  # type: bool
         message_func=None,  # type: Optional[Callable[[str, StopWatch], None]]
         callback=None,  # type: Optional[Callable[[str], Any]]
+        timing=('wall',),  # type: Union[str, Iterable[str]]
+        loop_time=False,  # type: bool
     ):
         # type: (...) -> None
         '''
@@ -347,25 +526,46 @@ def __init__(
                 signature (message, StopWatch) -> str. Default: None.
             callback (function, optional): Callback function of the signature
                 (message) -> Any. Default: None.
+            timing (str or list[str], optional): StopWatch clock or clocks to
+                record: wall, system, process or thread. Message_func is
+                given the first StopWatch. Default: wall.
+            loop_time (bool, optional): Report time running on the event loop
+                and time suspended. Only awaitables wrapped with track are
+                counted as suspended. Default: False.
 
         Raises:
             EnforceError: If message is not a string.
             EnforceError: If name is not a string.
             EnforceError: If level is not legal logging level.
             EnforceError: If suppress is not a boolean.
+            EnforceError: If timing is empty or includes an illegal clock.
+            EnforceError: If loop_time is not a boolean.
         '''
         Enforce(message, 'instance of', str)
         Enforce(name, 'instance of', str)
         Enforce(suppress, 'instance of', bool)
+        Enforce(loop_time, 'instance of', bool)
+        if isinstance(timing, str):
+            timing = [timing]
+        timing = list(dict.fromkeys(timing))
+        Enforce(len(timing), '>', 0, message='Timing must include a clock.')
+        for clock in timing:
+            Enforce(clock, 'in', list(CLOCKS))
         # ----------------------------------------------------------------------
 
         self._message = message
-        self._stopwatch = StopWatch()
+        self.stopwatches = {x: StopWatch(clock=x) for x in timing}
+        self.cpu_ratio = None  # type: Optional[float]
+        self._stopwatch = self.stopwatches[timing[0]]
         self._logger = logging.getLogger(name)
         self._level = log_level_to_int(level)
         self._suppress = suppress
         self._message_func = message_func
         self._callback = callback
+        self._loop_time = loop_time
+        self._loop_timers = []  # type: List[_LoopTimer]
+        self.on_loop_ns = None  # type: Optional[int]
+        self.suspended_ns = None  # type: Optional[int]
 
     @staticmethod
     def _default_message_func(message, stopwatch):
@@ -394,29 +594,132 @@ def _default_message_func(message, stopwatch):
             msg = message + ' - ' + msg
         return msg
 
+    @staticmethod
+    def _timing_message_func(message, stopwatches):
+        # type: (str, Dict[str, StopWatch]) -> str
+        '''
+        Add runtime information of each clock to message, followed by the
+        CPU/wall ratio, if any.
+
+        Args:
+            message (str): Message.
+            stopwatches (dict): Clock names to StopWatch instances.
+
+        Returns:
+            str: Message with runtime information.
+        '''
+        labels = dict(
+            wall='Runtime',
+            system='System',
+            process='Process CPU',
+            thread='Thread CPU',
+        )
+        items = []
+        for clock, stopwatch in stopwatches.items():
+            item = f'{labels[clock]}: {stopwatch.delta} '
+            item += f'({stopwatch.human_readable_delta})'
+            items.append(item)
+
+        ratio = LogRuntime._get_cpu_ratio(stopwatches)
+        if ratio is not None:
+            items.append(f'CPU/wall: {ratio:.2f}')
+
+        msg = ' - '.join(items)
+        if message != '':
+            msg = message + ' - ' + msg
+        return msg
+
+    @staticmethod
+    def _get_cpu_ratio(stopwatches):
+        # type: (Dict[str, StopWatch]) -> Optional[float]
+        '''
+        Computes ratio of CPU time to wall time. Process CPU time is preferred
+        over thread CPU time.
+
+        Args:
+            stopwatches (dict): Clock names to StopWatch instances.
+
+        Returns:
+            float or None: Ratio, or None if wall or CPU clocks are missing.
+        '''
+        wall = stopwatches.get('wall')
+        cpu = stopwatches.get('process') or stopwatches.get('thread')
+        if wall is None or cpu is None:
+            return None
+        return cpu.delta_ns / max(wall.delta_ns, 1)
+
+    def track(self, awaitable):
+        # type: (Awaitable) -> Awaitable
+        '''
+        Wraps given awaitable, so that its time suspended is subtracted from
+        the on loop time of the block. Await the result within the block.
+
+        Args:
+            awaitable (Awaitable): Coroutine, task or future.
+
+        Returns:
+            Awaitable: Wrapped awaitable.
+        '''
+        timer = _LoopTimer(awaitable)
+        self._loop_timers.append(timer)
+        return timer
+
     def __enter__(self):
         # type: () -> LogRuntime
         '''
-        Starts stopwatch.
+        Enters CallTree scope, starts trace event and starts stopwatches.
 
         Returns:
             LogRuntime: self.
         '''
-        self._stopwatch.start()
+        self._scope = lbtm.enter_scope(self._message or self._logger.name)
+        self._tracer = lbtm.get_tracer()
+        if self._tracer is not None:
+            self._trace_ns = time.perf_counter_ns()
+        self._loop_timers = []
+        for stopwatch in self.stopwatches.values():
+            stopwatch.start()
         return self
 
     def __exit__(self, *args):
         # type: (Any) -> None
         '''
-        Stops stopwatch and logs message.
+        Stops stopwatches, records trace event, exits CallTree scope and logs
+        message.
         '''
+        stopwatches = self.stopwatches
+        for stopwatch in reversed(stopwatches.values()):
+            stopwatch.stop()
+        if self._tracer is not None:
+            self._tracer.record(
+                self._message or self._logger.name,
+                self._trace_ns,
+                time.perf_counter_ns() - self._trace_ns,
+                dict(logger=self._logger.name, level=logging.getLevelName(self._level)),
+            )
         stopwatch = self._stopwatch
-        stopwatch.stop()
-        self.delta = self._stopwatch.delta
-        self.human_readable_delta = self._stopwatch.human_readable_delta
-
-        msg_func = self._message_func or self._default_message_func
-        self.message = msg_func(self._message, stopwatch)
+        lbtm.exit_scope(self._scope, stopwatch.delta_ns)
+        self.delta = stopwatch.delta
+        self.human_readable_delta = stopwatch.human_readable_delta
+        self.cpu_ratio = self._get_cpu_ratio(stopwatches)
+
+        suffix = ''
+        if self._loop_time:
+            wall = self.stopwatches.get('wall', stopwatch).delta_ns
+            suspended_ns = min(sum(x.suspended_ns for x in self._loop_timers), wall)
+            on_loop_ns = wall - suspended_ns
+            self.suspended_ns = suspended_ns
+            self.on_loop_ns = on_loop_ns
+            on_loop = humanfriendly.format_timespan(on_loop_ns / 1e9)
+            suspended = humanfriendly.format_timespan(suspended_ns / 1e9)
+            suffix = f' - On loop: {on_loop} - Suspended: {suspended}'
+
+        if self._message_func is not None:
+            self.message = self._message_func(self._message, stopwatch)
+        elif len(stopwatches) == 1:
+            self.message = self._default_message_func(self._message, stopwatch) + suffix
+        else:
+            self.message = self._timing_message_func(self._message, stopwatches) + suffix
 
         if not self._suppress:
             self._logger.log(self._level, self.message)
@@ -424,6 +727,23 @@ def __exit__(self, *args):
         if self._callback is not None:
             self._callback(str(self.message))
 
+    async def __aenter__(self):
+        # type: () -> LogRuntime
+        '''
+        Async version of __enter__.
+
+        Returns:
+            LogRuntime: self.
+        '''
+        return self.__enter__()
+
+    async def __aexit__(self, *args):
+        # type: (Any) -> None
+        '''
+        Async version of __exit__.
+        '''
+        self.__exit__(*args)
+
 
 # HTTP-REQUESTS-----------------------------------------------------------------
 def post_to_slack(url, channel, message):
@@ -602,6 +922,213 @@ def wrapper(wrapped, instance, args, kwargs):
         LOGGER.debug(f'{wrapped} called with {params}.')
         return wrapped(*args, **kwargs)
     return wrapper(wrapped)
+
+
+def _annotation_to_types(annotation):
+    # type: (Any) -> Optional[tuple]
+    '''
+    Converts a given type annotation into a tuple of types suitable for
+    isinstance. Unions and Optionals are flattened, generics are reduced to
+    their origin and annotations which cannot be checked return None.
+
+    Args:
+        annotation (object): Type annotation.
+
+    Returns:
+        tuple or None: Tuple of types.
+    '''
+    if annotation is None or annotation is type(None):
+        return (type(None),)
+    if annotation is Any:
+        return None
+
+    origin = typing.get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        output = []  # type: List[type]
+        for arg in typing.get_args(annotation):
+            item = _annotation_to_types(arg)
+            if item is None:
+                return None
+            output.extend(item)
+        return tuple(output)
+
+    if origin is not None:
+        annotation = origin
+    if isinstance(annotation, type):
+        return (annotation,)
+    return None
+
+
+def _get_type_hints(function):
+    # type: (Callable) -> Dict[str, Any]
+    '''
+    Resolves type annotations of given function. Annotations which cannot be
+    resolved, such as forward references to names that are not globals of the
+    function's module, are skipped.
+
+    Args:
+        function (function): Function.
+
+    Returns:
+        dict: Parameter names to resolved annotations.
+    '''
+    try:
+        return typing.get_type_hints(function)
+    except NameError:
+        pass
+
+    namespace = getattr(function, '__globals__', {})
+    output = {}
+    for name, hint in getattr(function, '__annotations__', {}).items():
+        if isinstance(hint, str):
+            try:
+                hint = eval(hint, namespace)
+            except Exception:
+                continue
+        output[name] = hint
+    return output
+
+
+def _compile_signature(function):
+    # type: (Callable) -> Tuple[List[Any], Dict[str, Any], Any]
+    '''
+    Compiles type annotations of given function into instance of checks. Each
+    check is a (types, rule) tuple.
+
+    Args:
+        function (function): Function.
+
+    Returns:
+        tuple: Positional checks, ordered by argument index with None for
+            unchecked arguments, keyword checks, keyed by argument name, and
+            return value check or None.
+    '''
+    hints = _get_type_hints(function)
+    params = inspect.signature(function).parameters.values()
+    msg = '{a} is {comparator.message} {b}.'
+    positional = [
+        inspect.Parameter.POSITIONAL_ONLY,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+    ]
+
+    args_checks = []  # type: List[Any]
+    kwargs_checks = {}  # type: Dict[str, Any]
+    for param in params:
+        types_ = None
+        if param.kind in positional + [inspect.Parameter.KEYWORD_ONLY]:
+            types_ = _annotation_to_types(hints.get(param.name, Any))
+
+        check = None
+        if types_ is not None:
+            rule = Enforce.compile(
+                'instance of',
+                types_[0] if len(types_) == 1 else types_,
+                message=f'Argument {param.name}: ' + msg,
+            )
+            check = (types_, rule)
+            if param.kind is not inspect.Parameter.POSITIONAL_ONLY:
+                kwargs_checks[param.name] = check
+
+        if param.kind in positional:
+            args_checks.append(check)
+
+    return_types = _annotation_to_types(hints.get('return', Any))
+    return_check = None
+    if return_types is not None:
+        rule = Enforce.compile(
+            'instance of',
+            return_types[0] if len(return_types) == 1 else return_types,
+            message='Return value: ' + msg,
+        )
+        return_check = (return_types, rule)
+    return args_checks, kwargs_checks, return_check
+
+
+def enforce_signature(function):
+    # type: (Callable) -> Callable
+    '''
+    A decorator that enforces the type annotations of a given function when
+    called. Annotations are read once, on the first call, so that forward
+    references, such as a method returning its own class, resolve. They are
+    compiled into instance of checks. Per call overhead is one isinstance test
+    per annotated argument passed, plus one for the return value. Errors share
+    the messages of Enforce instance of checks.
+
+    Annotations which cannot be checked with isinstance, such as Any or
+    TypeVars, or which cannot be resolved, are ignored. Generic annotations,
+    such as list[int], are checked against their origin type only.
+
+    The enforcement mode is read on each call, so set_mode applies to
+    functions decorated at import. When off, calls are passed straight
+    through, and when sampled, one in every sample_rate calls of each
+    function is checked.
+
+    Coroutine functions are wrapped in coroutine functions, which check the
+    return value once it is awaited.
+
+    Example:
+
+        >>> @enforce_signature
+            def foo(a: int, b: Optional[str] = None) -> str:
+                return str(a) + (b or '')
+        >>> foo(1, 'bar')
+        '1bar'
+        >>> foo('1')
+        EnforceError: Argument a: 1 is not instance of <class 'int'>.
+
+    Args:
+        function (function): Function to be decorated.
+
+    Returns:
+        function: Decorated function.
+    '''
+    compiled = [None]  # type: List[Any]
+
+    def skip():
+        # type: () -> bool
+        return lbe._MODE == 'off' or lbe._skip(function)
+
+    def check_args(args, kwargs):
+        # type: (Any, Any) -> Any
+        if compiled[0] is None:
+            compiled[0] = _compile_signature(function)
+        args_checks, kwargs_checks, return_check = compiled[0]
+
+        for value, check in zip(args, args_checks):
+            if check is not None and not isinstance(value, check[0]):
+                raise check[1]._get_error(value, value, None)
+
+        if kwargs:
+            for name, value in kwargs.items():
+                check = kwargs_checks.get(name)
+                if check is not None and not isinstance(value, check[0]):
+                    raise check[1]._get_error(value, value, None)
+        return return_check
+
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            if lbe._MODE != 'full' and skip():
+                return await function(*args, **kwargs)
+
+            return_check = check_args(args, kwargs)
+            output = await function(*args, **kwargs)
+            if return_check is not None and not isinstance(output, return_check[0]):
+                raise return_check[1]._get_error(output, output, None)
+            return output
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if lbe._MODE != 'full' and skip():
+            return function(*args, **kwargs)
+
+        return_check = check_args(args, kwargs)
+        output = function(*args, **kwargs)
+        if return_check is not None and not isinstance(output, return_check[0]):
+            raise return_check[1]._get_error(output, output, None)
+        return output
+    return wrapper
 # ------------------------------------------------------------------------------
 
 
@@ -1,3 +1,7 @@
+from typing import Any, List, Optional
+
+import asyncio
+import inspect
 import logging
 import multiprocessing
 import os
@@ -5,7 +9,9 @@
 import unittest
 
 from lunchbox.enforce import EnforceError
+import lunchbox.enforce as lbe
 from lunchbox.stopwatch import StopWatch
+from lunchbox.timers import CallScope, CallTree, TraceRecorder
 import lunchbox.tools as lbt
 # ------------------------------------------------------------------------------
 
@@ -347,6 +353,97 @@ def test_runtime(self):
         result = _runtime_func(1, 2, 3)
         self.assertEqual(result, 6)
 
+    def test_log_runtime_async(self):
+        async def func(a, b=0):
+            time.sleep(0.01)
+            await asyncio.sleep(0.02)
+            return a + b
+
+        result = lbt.log_runtime(func, 1, b=2)
+        self.assertTrue(asyncio.iscoroutine(result))
+        self.assertEqual(asyncio.run(result), 3)
+
+        result = asyncio.run(lbt.log_runtime(func, 1, b=2, _testing=True))
+        expected = r'^func\n +Runtime: 0\.0\d seconds\n +Args: \(1,\)\n +'
+        expected += r"Kwargs: \{'b': 2\}$"
+        self.assertRegex(result, expected)
+
+        result = asyncio.run(
+            lbt.log_runtime(func, 1, message_='foo', loop_time_=True, _testing=True)
+        )
+        expected = r'^foo\n +Runtime: 0\.0\d seconds\n +On loop: 0\.0\d seconds\n'
+        expected += r' +Suspended: 0\.0\d seconds$'
+        self.assertRegex(result, expected)
+
+        with self.assertLogs('lunchbox.tools', level=logging.WARNING):
+            asyncio.run(lbt.log_runtime(func, 1, log_level='warning'))
+
+    def test_log_runtime_async_error(self):
+        async def func():
+            await asyncio.sleep(0)
+            raise ValueError('foo')
+
+        for loop_time in [False, True]:
+            with self.assertRaisesRegex(ValueError, 'foo'):
+                asyncio.run(lbt.log_runtime(func, loop_time_=loop_time))
+
+    def test_runtime_async(self):
+        @lbt.runtime
+        async def func(a, b):
+            await asyncio.sleep(0.01)
+            return a + b
+
+        result = asyncio.run(func(1, 2, message_='foo', _testing=True))
+        self.assertRegex(result, r'^foo\n +Runtime: 0\.0\d seconds$')
+
+        with self.assertLogs('lunchbox.tools', level=logging.INFO):
+            self.assertEqual(asyncio.run(func(1, 2)), 3)
+
+    def test_loop_timer(self):
+        async def func():
+            time.sleep(0.01)
+            await asyncio.sleep(0.02)
+            time.sleep(0.01)
+            return 'foo'
+
+        async def main():
+            timer = lbt._LoopTimer(func())
+            result = await timer
+            return timer, result
+
+        timer, result = asyncio.run(main())
+        self.assertEqual(result, 'foo')
+        self.assertGreaterEqual(timer.steps, 2)
+        self.assertAlmostEqual(timer.on_loop_ns, 2 * 10**7, delta=10**7)
+        self.assertAlmostEqual(timer.suspended_ns, 2 * 10**7, delta=10**7)
+        self.assertEqual(timer.wall_ns, timer.on_loop_ns + timer.suspended_ns)
+
+    def test_loop_timer_cancel(self):
+        cancelled = []
+
+        async def func():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def wrapper(timer):
+            return await timer
+
+        async def main():
+            timer = lbt._LoopTimer(func())
+            task = asyncio.ensure_future(wrapper(timer))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return timer
+
+        timer = asyncio.run(main())
+        self.assertEqual(cancelled, [True])
+        self.assertLess(timer.wall_ns, 10**9)
+
     def test_runtime_multiprocessing(self):
         args = [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
         # TODO: solve deprecation warning here
@@ -419,6 +516,121 @@ def test_api_function_required(self):
         with self.assertRaisesRegex(ValueError, expected):
             foobar_func(bar='pumpkin')
 
+    def test_enforce_signature(self):
+        @lbt.enforce_signature
+        def func(a: int, b: Optional[str] = None, *, c: float | int = 1.0) -> str:
+            return f'{a}{b}{c}'
+
+        self.assertEqual(func(1), '1None1.0')
+        self.assertEqual(func(1, 'b', c=2), '1b2')
+        self.assertEqual(func(a=1, b='b'), '1b1.0')
+        self.assertEqual(func.__name__, 'func')
+
+        expected = r"Argument a: 1 is not instance of <class 'int'>\."
+        with self.assertRaisesRegex(EnforceError, expected):
+            func('1')
+
+        with self.assertRaisesRegex(EnforceError, 'Argument a:'):
+            func(a='1')
+
+        expected = r'Argument b: 2 is not instance of \(.*str.*, .*NoneType.*\)\.'
+        with self.assertRaisesRegex(EnforceError, expected):
+            func(1, 2)
+
+        with self.assertRaisesRegex(EnforceError, 'Argument c:'):
+            func(1, c='1')
+
+    def test_enforce_signature_return(self):
+        @lbt.enforce_signature
+        def func(a) -> int:
+            return a
+
+        self.assertEqual(func(1), 1)
+        self.assertEqual(func(True), True)
+
+        expected = r"Return value: 1 is not instance of <class 'int'>\."
+        with self.assertRaisesRegex(EnforceError, expected):
+            func('1')
+
+    def test_enforce_signature_unchecked(self):
+        @lbt.enforce_signature
+        def func(a: Any, b: List[int], *args: int, **kwargs: int):
+            return a
+
+        self.assertEqual(func('a', [], 'b', c='c'), 'a')
+        with self.assertRaisesRegex(EnforceError, 'Argument b:'):
+            func('a', {})
+
+    def test_enforce_signature_method(self):
+        class Foo:
+            @lbt.enforce_signature
+            def bar(self, a: int) -> int:
+                return a
+
+        self.assertEqual(Foo().bar(1), 1)
+        with self.assertRaisesRegex(EnforceError, 'Argument a:'):
+            Foo().bar('1')
+
+    def test_enforce_signature_forward_reference(self):
+        class Foo:
+            @lbt.enforce_signature
+            def clone(self, a: 'int') -> 'Foo':
+                return Foo()
+
+        self.assertIsInstance(Foo().clone(1), Foo)
+        with self.assertRaisesRegex(EnforceError, 'Argument a:'):
+            Foo().clone('1')
+
+    def test_enforce_signature_mode(self):
+        @lbt.enforce_signature
+        def func(a: int) -> int:
+            return a
+
+        try:
+            lbe.set_mode('off')
+            self.assertEqual(func('1'), '1')
+
+            lbe.set_mode('sampled', sample_rate=2)
+            failures = 0
+            for _ in range(4):
+                try:
+                    func('1')
+                except EnforceError:
+                    failures += 1
+            self.assertEqual(failures, 2)
+        finally:
+            lbe.set_mode('full', sample_rate=100)
+
+        with self.assertRaisesRegex(EnforceError, 'Argument a:'):
+            func('1')
+
+    def test_enforce_signature_async(self):
+        @lbt.enforce_signature
+        async def func(a: int, b: int = 0) -> int:
+            await asyncio.sleep(0)
+            return a + b
+
+        self.assertTrue(inspect.iscoroutinefunction(func))
+        self.assertEqual(asyncio.run(func(1, b=2)), 3)
+
+        expected = r"Argument b: 2 is not instance of <class 'int'>\."
+        with self.assertRaisesRegex(EnforceError, expected):
+            asyncio.run(func(1, b='2'))
+
+        @lbt.enforce_signature
+        async def func2(a) -> int:
+            return a
+
+        expected = r"Return value: 1 is not instance of <class 'int'>\."
+        with self.assertRaisesRegex(EnforceError, expected):
+            asyncio.run(func2('1'))
+
+        try:
+            lbe.set_mode('off')
+            self.assertEqual(asyncio.run(func2('1')), '1')
+        finally:
+            lbe.set_mode('full')
+
     def test_try_(self):
         result = lbt.try_(lambda x: int(x), 1.0, return_item='item')
         self.assertEqual(result, 1)
@@ -496,6 +708,141 @@ def test_init_errors(self):
         with self.assertRaises(EnforceError):
             lbt.LogRuntime(suppress=99)
 
+        # timing
+        with self.assertRaisesRegex(EnforceError, 'Timing must include a clock'):
+            lbt.LogRuntime(timing=[])
+
+        with self.assertRaisesRegex(EnforceError, 'foo is not in'):
+            lbt.LogRuntime(timing=['wall', 'foo'])
+
+    def test_timing(self):
+        result = lbt.LogRuntime(timing='process')
+        self.assertEqual(list(result.stopwatches), ['process'])
+        self.assertEqual(result._stopwatch.clock, 'process')
+
+        result = lbt.LogRuntime(timing=['wall', 'thread', 'wall'])
+        self.assertEqual(list(result.stopwatches), ['wall', 'thread'])
+
+    def test_timing_message(self):
+        with lbt.LogRuntime('foo', timing=['wall', 'process'], suppress=True) as log:
+            time.sleep(0.02)
+        expected = r'foo - Runtime: 0:00:00\..* \(.* seconds?\) - '
+        expected += r'Process CPU: 0:00:00\..* \(.* seconds?\) - CPU/wall: 0\.\d\d$'
+        self.assertRegex(log.message, expected)
+        self.assertLess(log.cpu_ratio, 0.5)
+
+        with lbt.LogRuntime(timing=['thread', 'wall'], suppress=True) as log:
+            start = time.perf_counter()
+            while time.perf_counter() - start < 0.02:
+                pass
+        expected = r'^Thread CPU: .* - Runtime: .* - CPU/wall: \d\.\d\d$'
+        self.assertRegex(log.message, expected)
+        self.assertGreater(log.cpu_ratio, 0.5)
+
+        with lbt.LogRuntime(timing=['system', 'process'], suppress=True) as log:
+            pass
+        self.assertRegex(log.message, r'^System: .* - Process CPU: .*\)$')
+        self.assertIsNone(log.cpu_ratio)
+
+    def test_async_with(self):
+        async def main():
+            async with lbt.LogRuntime('foo', suppress=True) as log:
+                await asyncio.sleep(0.01)
+            return log
+
+        log = asyncio.run(main())
+        self.assertRegex(log.message, r'^foo - Runtime: 0:00:00\.0\d+ ')
+        self.assertGreaterEqual(log.stopwatches['wall'].delta_ns, 10**7)
+        self.assertIsNone(log.on_loop_ns)
+        self.assertIsNone(log.suspended_ns)
+
+    def test_loop_time(self):
+        with self.assertRaises(EnforceError):
+            lbt.LogRuntime(loop_time='foo')
+
+        async def main():
+            async with lbt.LogRuntime('foo', suppress=True, loop_time=True) as log:
+                time.sleep(0.01)
+                await log.track(asyncio.sleep(0.02))
+            return log
+
+        log = asyncio.run(main())
+        expected = r'^foo - Runtime: .* - On loop: 0\.0\d seconds - '
+        expected += r'Suspended: 0\.0\d seconds$'
+        self.assertRegex(log.message, expected)
+        self.assertAlmostEqual(log.on_loop_ns, 10**7, delta=10**7)
+        self.assertAlmostEqual(log.suspended_ns, 2 * 10**7, delta=10**7)
+        wall = log.stopwatches['wall'].delta_ns
+        self.assertEqual(log.on_loop_ns + log.suspended_ns, wall)
+
+        with lbt.LogRuntime(suppress=True, loop_time=True) as log:
+            pass
+        self.assertEqual(log.suspended_ns, 0)
+        self.assertEqual(log.on_loop_ns, log.stopwatches['wall'].delta_ns)
+
+    def test_call_tree(self):
+        with CallTree('root') as tree:
+            with lbt.LogRuntime('foo', suppress=True):
+                with lbt.LogRuntime(name='bar', suppress=True):
+                    pass
+            lbt.log_runtime(time.sleep, 0.001, _testing=True)
+
+        root = tree.root
+        self.assertEqual(list(root.children), ['foo', 'sleep'])
+        self.assertEqual(list(root.children['foo'].children), ['bar'])
+        self.assertGreaterEqual(root.children['sleep'].total_ns, 10**6)
+
+    def test_call_tree_error(self):
+        def boom():
+            raise ValueError('boom')
+
+        async def async_boom():
+            await asyncio.sleep(0)
+            raise ValueError('async_boom')
+
+        async def main():
+            with self.assertRaises(ValueError):
+                await lbt.log_runtime(async_boom)
+            with self.assertRaises(ValueError):
+                await lbt.log_runtime(async_boom, loop_time_=True)
+            with CallScope('async_after'):
+                pass
+
+        with CallTree('root') as tree:
+            with self.assertRaises(ValueError):
+                lbt.log_runtime(boom)
+            with CallScope('after'):
+                pass
+            asyncio.run(main())
+
+        root = tree.root
+        self.assertEqual(
+            list(root.children), ['boom', 'after', 'async_boom', 'async_after']
+        )
+        self.assertEqual(root.children['boom'].children, {})
+        self.assertEqual(root.children['boom'].count, 1)
+        async_boom_ = root.children['async_boom']
+        self.assertEqual(list(async_boom_.children), [])
+        self.assertEqual(async_boom_.count, 2)
+
+    def test_trace(self):
+        with TraceRecorder() as tracer:
+            with lbt.LogRuntime('foo', name='bar', suppress=True):
+                lbt.log_runtime(time.sleep, 0.001, _testing=True)
+            with lbt.LogRuntime(name='bar', level='debug', suppress=True):
+                pass
+        with lbt.LogRuntime('baz', suppress=True):
+            pass
+
+        result = tracer.events
+        self.assertEqual([x['name'] for x in result], ['sleep', 'foo', 'bar'])
+        self.assertEqual(result[0]['args'], dict(args='(0.001,)', kwargs='{}'))
+        self.assertGreaterEqual(result[0]['duration_ns'], 10**6)
+        self.assertEqual(result[1]['args'], dict(logger='bar', level='INFO'))
+        self.assertEqual(result[2]['args'], dict(logger='bar', level='DEBUG'))
+        self.assertLessEqual(result[1]['start_ns'], result[0]['start_ns'])
+        self.assertGreaterEqual(result[1]['duration_ns'], result[0]['duration_ns'])
+
     def test_with(self):
         msg = 'Foo the bars'
         with lbt.LogRuntime(msg, name='foobar', level='debug'):